@@ -4,21 +4,87 @@ P99 Distribution Analysis - LLM Calls by User
 Interactive visualization of user LLM call distribution with P99 insights
 """
 
+import importlib.util
+import os
+import sys
+import time
+
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import pandas as pd
 import numpy as np
 
+from p99 import (
+    DISTRIBUTION_BUCKETS,
+    P99_BUCKETS,
+    AnchorSimulator,
+    Dashboard,
+    equal_population_buckets,
+    log_spaced_buckets,
+    parse_edges,
+)
+from p99.backends import connect as connect_backend
+from p99.buckets import bucket_rows
+from p99.data import file_version
+from p99.drilldown import PAGE_SIZE
+from p99.fanout import DashboardFanout
+from p99.profiling import Profiler
+from p99.reference import distribution_data, p99_distribution, p99_internal, percentile_data
+from p99.report import QUICK_REFERENCE_LIMITS, pareto_split, percentile_ratios
+from p99.simulator import policy_grid
+from p99.trend import TREND_PERCENTILES, WINDOWS
+
+
+def lazy_import(name):
+    """Module whose real import runs on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# Plotly and pandas are only needed once a tab renders, by which point the
+# header and key metrics are already on screen.
+go = lazy_import("plotly.graph_objects")
+plotly_subplots = lazy_import("plotly.subplots")
+plotly_colors = lazy_import("plotly.colors")
+pd = lazy_import("pandas")
+
+# st.fragment is stable from Streamlit 1.37; fall back to a full-page rerun on
+# older versions.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
 # Page config
 st.set_page_config(
     page_title="P99 Distribution - LLM Calls",
     page_icon="📊",
     layout="wide",
-    initial_sidebar_state="collapsed"
+    # The cost cube's filters live in the sidebar.
+    initial_sidebar_state="expanded" if os.environ.get("P99_CUBE_PATH") else "collapsed"
 )
 
+# Opt-in profiling (?profile=1 or P99_PROFILE=1): times every section below,
+# tracks allocations and figure payloads, and shows them in the sidebar.
+# P99_PROFILE_DIR additionally dumps each run's cProfile stats there.
+profiler = Profiler(
+    enabled=os.environ.get("P99_PROFILE", "0") != "0" or st.query_params.get("profile", "0") != "0",
+    cprofile_dir=os.environ.get("P99_PROFILE_DIR"),
+).start()
+
+
+def plotly_chart(fig, name):
+    """st.plotly_chart, timed and with its JSON payload size when profiling."""
+    with profiler.section(f"plotly_chart: {name}"):
+        st.plotly_chart(fig, use_container_width=True)
+    if profiler.active:
+        profiler.record_payload(name, len(fig.to_json()))
+
+
+profiler.mark("css")
+
 # Custom CSS for dark theme
 st.markdown("""
 <style>
@@ -121,265 +187,801 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+profiler.mark("data")
+
 # =============================================================================
 # Data (from actual Trino queries)
 # =============================================================================
 
-# Overall percentile data
-percentile_data = {
-    'percentile': [1, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 95, 99, 99.5, 99.9, 100],
-    'llm_calls': [1, 5, 11, 22, 32, 45, 59, 78, 100, 145, 301, 626, 4864, 9251, 26196, 225066]
-}
-
-# Distribution buckets (all users) with cost data
-distribution_data = [
-    {"bucket": "1-10", "user_count": 201880, "pct": 9.81, "avg_calls": 5, "total_cost": 22561.84, "avg_cost_per_user": 0.25, "cost_per_call": 0.0238},
-    {"bucket": "11-25", "user_count": 290096, "pct": 14.10, "avg_calls": 18, "total_cost": 76513.93, "avg_cost_per_user": 0.42, "cost_per_call": 0.0149},
-    {"bucket": "26-50", "user_count": 423867, "pct": 20.60, "avg_calls": 37, "total_cost": 168686.03, "avg_cost_per_user": 0.47, "cost_per_call": 0.0108},
-    {"bucket": "51-100", "user_count": 534221, "pct": 25.96, "avg_calls": 73, "total_cost": 440967.37, "avg_cost_per_user": 0.88, "cost_per_call": 0.0114},
-    {"bucket": "101-200", "user_count": 305081, "pct": 14.83, "avg_calls": 138, "total_cost": 539024.88, "avg_cost_per_user": 1.87, "cost_per_call": 0.0128},
-    {"bucket": "201-500", "user_count": 178260, "pct": 8.66, "avg_calls": 309, "total_cost": 840252.50, "avg_cost_per_user": 4.87, "cost_per_call": 0.0153},
-    {"bucket": "501-1K", "user_count": 54749, "pct": 2.66, "avg_calls": 690, "total_cost": 650262.47, "avg_cost_per_user": 12.30, "cost_per_call": 0.0172},
-    {"bucket": "1K-2K", "user_count": 27031, "pct": 1.31, "avg_calls": 1397, "total_cost": 687718.49, "avg_cost_per_user": 26.25, "cost_per_call": 0.0182},
-    {"bucket": "2K-5K", "user_count": 22197, "pct": 1.08, "avg_calls": 3177, "total_cost": 1456276.24, "avg_cost_per_user": 66.57, "cost_per_call": 0.0207},
-    {"bucket": "5K-10K", "user_count": 11020, "pct": 0.54, "avg_calls": 7012, "total_cost": 1768262.18, "avg_cost_per_user": 161.21, "cost_per_call": 0.0229},
-    {"bucket": "10K-25K", "user_count": 7089, "pct": 0.34, "avg_calls": 15087, "total_cost": 2707505.95, "avg_cost_per_user": 382.74, "cost_per_call": 0.0253},
-    {"bucket": "25K-50K", "user_count": 1782, "pct": 0.09, "avg_calls": 33493, "total_cost": 1705092.18, "avg_cost_per_user": 956.84, "cost_per_call": 0.0286},
-    {"bucket": "50K+", "user_count": 449, "pct": 0.02, "avg_calls": 163447, "total_cost": 1051527.83, "avg_cost_per_user": 2341.93, "cost_per_call": 0.0143},
-]
+# Point P99_DATA_PATH at a per-user Parquet/CSV export (user_id, llm_calls, cost)
+# to compute every table below from raw rows instead of the pasted snapshot, or
+# P99_BACKEND_URL at a query engine (duckdb://, sqlite://, trino://) to push the
+# aggregation down to it. A columnar snapshot directory written by
+# `python -m p99.snapshot export.parquet users.p99snap` is memory-mapped instead
+# of parsed, so startup costs no data loading and every worker process shares
+# the same page cache.
+DATA_PATH = os.environ.get("P99_DATA_PATH")
+BACKEND_URL = os.environ.get("P99_BACKEND_URL")
+if DATA_PATH and not BACKEND_URL:
+    BACKEND_URL = f"memory://{os.path.abspath(DATA_PATH)}"
+# P99_CUBE_PATH points at a cost cube from `python -m p99.cube users.parquet
+# cube.npz` instead: every tab is sliceable by model, tenant, region and plan,
+# answered by merging pre-aggregated cells rather than rescanning users.
+CUBE_PATH = os.environ.get("P99_CUBE_PATH")
+if CUBE_PATH:
+    BACKEND_URL = None
+# P99_TREND_PATH adds a trend tab over a directory of per-day summaries kept by
+# `python -m p99.trend add trend/ 2026-01-31 users-2026-01-31.parquet`.
+TREND_PATH = os.environ.get("P99_TREND_PATH")
+# P99_HEAVY_PATH points at a heavy-hitters summary that `python -m p99.heavy
+# heavy.json events-*.parquet` keeps updating from the call-event stream; the
+# P99 tab then shows the current top users, refreshed every few seconds.
+HEAVY_PATH = os.environ.get("P99_HEAVY_PATH")
+HEAVY_REFRESH_SECONDS = 5
 
-# P99 users internal distribution
-p99_distribution = [
-    {"bucket": "5K-6K", "user_count": 4225, "pct": 19.92, "total_cost": 502286, "avg_calls": 5357},
-    {"bucket": "6K-7K", "user_count": 2695, "pct": 12.70, "total_cost": 397819, "avg_calls": 6476},
-    {"bucket": "7K-8K", "user_count": 2068, "pct": 9.75, "total_cost": 351818, "avg_calls": 7489},
-    {"bucket": "8K-10K", "user_count": 2906, "pct": 13.70, "total_cost": 609165, "avg_calls": 8937},
-    {"bucket": "10K-15K", "user_count": 4076, "pct": 19.21, "total_cost": 1212974, "avg_calls": 12184},
-    {"bucket": "15K-20K", "user_count": 1939, "pct": 9.14, "total_cost": 856041, "avg_calls": 17194},
-    {"bucket": "20K-30K", "user_count": 1757, "pct": 8.28, "total_cost": 1139426, "avg_calls": 24239},
-    {"bucket": "30K-50K", "user_count": 1100, "pct": 5.19, "total_cost": 1204497, "avg_calls": 37323},
-    {"bucket": "50K-75K", "user_count": 326, "pct": 1.54, "total_cost": 618632, "avg_calls": 60168},
-    {"bucket": "75K-100K", "user_count": 93, "pct": 0.44, "total_cost": 262967, "avg_calls": 85122},
-    {"bucket": "100K+", "user_count": 29, "pct": 0.14, "total_cost": 125774, "avg_calls": 127832},
-]
+# The pasted snapshot: percentile_data, distribution_data, p99_distribution and
+# p99_internal live in p99/reference.py.
+
+@st.cache_resource(show_spinner=False)
+def open_backend(url):
+    return connect_backend(url)
+
+
+@st.cache_resource(show_spinner=False)
+def start_queries(url, data_version):
+    """Issue every dataset query concurrently, once per data version for all sessions."""
+    return DashboardFanout(open_backend(url))
+
+
+def wait_for(names):
+    """Block until ``names`` have arrived; a failed query is retried on the next rerun."""
+    try:
+        for name in names:
+            fanout.result(name)
+    except Exception:
+        start_queries.clear()
+        raise
+    return fanout.dashboard()
+
+
+@st.cache_resource(show_spinner=False)
+def open_cube(path, version):
+    from p99.cube import load_cube
+    return load_cube(path)
+
+
+@st.cache_resource(show_spinner=False)
+def open_trend(path):
+    from p99.trend import TrendStore
+    return TrendStore(path)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def trend_series(version, _store, days):
+    """Trend rows for a rolling window, recomputed only when a day is added."""
+    return _store.series(days)
+
+
+def cube_filters(cube):
+    """Sidebar filter per cube dimension; an empty selection means all values."""
+    st.sidebar.markdown("### 🧊 Filters")
+    return {dim: st.sidebar.multiselect(dim.title(), cube.values(dim), key=f"cube_{dim}")
+            for dim in cube.dimensions}
+
+
+simulator = None
+backend = open_backend(BACKEND_URL) if BACKEND_URL else None
+if CUBE_PATH:
+    cube = open_cube(CUBE_PATH, file_version(CUBE_PATH))
+    filters = cube_filters(cube)
+    selection = "; ".join(f"{dim}={', '.join(values)}" for dim, values in filters.items() if values)
+    # Every cached table and figure is keyed by data_version, so each
+    # selection gets its own.
+    data_version = f"cube-{cube.version}-{selection}"
+    fanout = None
+    try:
+        dashboard = cube.dashboard(filters)
+    except ValueError:
+        st.warning("No users match the selected filters.")
+        st.stop()
+    simulator = cube.simulator(filters)
+elif BACKEND_URL:
+    data_version = backend.version()
+    selection = None
+    fanout = start_queries(BACKEND_URL, data_version)
+    # Header, footer and every tab need the key stats; the rest streams in.
+    with st.spinner("Querying data backend..."):
+        dashboard = wait_for(('totals', 'summary'))
+else:
+    data_version = "snapshot-2025-12-27"
+    selection = None
+    fanout = None
+    dashboard = Dashboard(
+        percentile_data=percentile_data,
+        distribution_data=distribution_data,
+        p99_distribution=p99_distribution,
+        p99_internal=p99_internal,
+        stats={
+            'total_users': 2057722,
+            'p99_threshold': 4864,
+            'p99_user_count': 20340,
+            'avg_calls': 302,
+            'median_calls': 59,
+            'max_calls': 225066,
+            'total_cost': 12114651.89,
+            'total_calls': 621194292,
+            'avg_cost_per_call': 0.0195,
+            'p99_total_calls': sum(b['user_count'] * b['avg_calls'] for b in p99_distribution),
+            'p99_total_cost': 7232388.14,  # Sum of 5K+ buckets
+        },
+    )
 
 # Key stats
-total_users = 2057722
-p99_threshold = 4996
-p99_user_count = 20340
-avg_calls = 302
-median_calls = 59
-max_calls = 225066
-total_cost = 12114651.89
-total_calls = 621194292
-avg_cost_per_call = 0.0195
-p99_total_cost = 7232388.14  # Sum of 5K+ buckets
+total_users = dashboard.stats['total_users']
+p99_threshold = dashboard.stats['p99_threshold']
+p99_user_count = dashboard.stats['p99_user_count']
+avg_calls = dashboard.stats['avg_calls']
+median_calls = dashboard.stats['median_calls']
+max_calls = dashboard.stats['max_calls']
+total_cost = dashboard.stats['total_cost']
+total_calls = dashboard.stats['total_calls']
+avg_cost_per_call = dashboard.stats['avg_cost_per_call']
+p99_total_calls = dashboard.stats['p99_total_calls']
+p99_total_cost = dashboard.stats['p99_total_cost']
 
 # =============================================================================
-# Header
+# Cached tables & figures
 # =============================================================================
 
-st.markdown('<h1 class="main-header">P99 Distribution Analysis</h1>', unsafe_allow_html=True)
-st.markdown('<p class="sub-header">LLM Calls per User • Top 1% Heavy Users Analysis</p>', unsafe_allow_html=True)
+# Keyed by data_version and shared across sessions, so a rerun that only
+# moves the simulator slider reuses every table and figure below.
 
-# =============================================================================
-# Key Metrics Row
-# =============================================================================
+@st.cache_resource(show_spinner=False)
+def build_frame(data_version, name, _rows):
+    """DataFrame over one dashboard table (treat as read-only)."""
+    return pd.DataFrame(_rows)
 
-col1, col2, col3, col4, col5 = st.columns(5)
 
-with col1:
-    st.markdown(f"""
-    <div class="metric-card">
-        <p class="metric-value">2.06M</p>
-        <p class="metric-label">Total Users</p>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def build_pareto_tables(data_version, _distribution_data, _stats):
+    """Cumulative table and P99 split behind the Calls vs Cost tab (treat as read-only)."""
+    split = pareto_split(_distribution_data, _stats)
+    return {
+        'corr': pd.DataFrame(split['rows']),
+        'p99_users': split['p99_users'],
+        'p99_cost': split['p99_cost'],
+        'below_p99_users': split['below_p99_users'],
+        'below_p99_cost': split['below_p99_cost'],
+        'total_cost_all': split['total_cost'],
+        'total_users_all': split['total_users'],
+        'cost_per_user_ratio': split['cost_per_user_ratio'],
+    }
 
-with col2:
-    st.markdown(f"""
-    <div class="metric-card">
-        <p class="metric-value" style="color: #f97316;">$0.020</p>
-        <p class="metric-label">Avg Cost/Call</p>
-    </div>
-    """, unsafe_allow_html=True)
 
-with col3:
-    st.markdown(f"""
-    <div class="metric-card">
-        <p class="metric-value" style="color: #a855f7;">$12.1M</p>
-        <p class="metric-label">Total LLM Cost</p>
-    </div>
-    """, unsafe_allow_html=True)
+def share(part, whole):
+    """``part`` as a percentage of ``whole``, 0 when ``whole`` is 0."""
+    return part / whole * 100 if whole else 0.0
 
-with col4:
-    st.markdown(f"""
-    <div class="metric-card">
-        <p class="metric-value" style="color: #ec4899;">59</p>
-        <p class="metric-label">Median Calls</p>
-    </div>
-    """, unsafe_allow_html=True)
 
-with col5:
-    st.markdown(f"""
-    <div class="metric-card">
-        <p class="metric-value" style="color: #10b981;">225K</p>
-        <p class="metric-label">Max Calls</p>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def build_distribution_figure(data_version, _df_dist, p99_threshold, buckets=DISTRIBUTION_BUCKETS):
+    df_dist = _df_dist
+    
+    fig = plotly_subplots.make_subplots(specs=[[{"secondary_y": True}]])
+    
+    # Color gradient based on position
+    colors = ['#00d4ff', '#00c4ef', '#00b4df', '#20a4cf', '#4094bf',
+              '#6084af', '#80749f', '#9f648f', '#be547f', '#dd446f',
+              '#ec4899', '#f97316', '#f97316']
+    if len(buckets) != len(colors):
+        colors = plotly_colors.sample_colorscale(plotly_colors.make_colorscale(colors), len(buckets))
+    
+    # Bar chart for user count
+    fig.add_trace(go.Bar(
+        x=df_dist['bucket'],
+        y=df_dist['user_count'],
+        name='Users',
+        marker=dict(
+            color=colors,
+            line=dict(color='rgba(255,255,255,0.1)', width=1)
+        ),
+        text=[f"{p:.1f}%" for p in df_dist['pct']],
+        textposition='outside',
+        textfont=dict(color='#e2e8f0', size=9),
+        hovertemplate="<b>%{x}</b><br>Users: %{y:,.0f}<extra></extra>"
+    ), secondary_y=False)
+    
+    # Line chart for cost
+    fig.add_trace(go.Scatter(
+        x=df_dist['bucket'],
+        y=df_dist['total_cost'],
+        name='Cost ($)',
+        mode='lines+markers+text',
+        line=dict(color='#10b981', width=3),
+        marker=dict(size=8, color='#10b981', symbol='diamond'),
+        text=[f"${c/1000:.0f}K" for c in df_dist['total_cost']],
+        textposition='top center',
+        textfont=dict(color='#10b981', size=8),
+        hovertemplate="<b>%{x}</b><br>Cost: $%{y:,.0f}<extra></extra>"
+    ), secondary_y=True)
+    
+    # Add P99 threshold annotation after the bucket holding the threshold
+    p99_x = int(buckets.assign(p99_threshold)) + 0.5
+    fig.add_vline(x=p99_x, line_dash="dash", line_color="#f97316", line_width=2)
+    fig.add_annotation(
+        x=p99_x, y=df_dist['user_count'].max() * 0.9,
+        text="P99 →",
+        showarrow=False,
+        font=dict(color="#f97316", size=14, family="JetBrains Mono"),
+        xshift=30
+    )
+    
+    fig.update_layout(
+        title=dict(
+            text="<b>User Distribution by LLM Call Volume</b>",
+            font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        xaxis=dict(
+            title="LLM Calls Bucket",
+            gridcolor='rgba(100,100,100,0.2)',
+            tickfont=dict(size=10)
+        ),
+        height=450,
+        margin=dict(t=80, b=60),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1
+        )
+    )
+    
+    fig.update_yaxes(
+        title_text="Number of Users",
+        gridcolor='rgba(100,100,100,0.2)',
+        type='log',
+        secondary_y=False
+    )
+    fig.update_yaxes(
+        title_text="Total Cost ($)",
+        gridcolor='rgba(100,100,100,0.1)',
+        secondary_y=True,
+        showgrid=False
+    )
+    
+    return fig
 
-st.markdown("<br>", unsafe_allow_html=True)
 
-# =============================================================================
-# Main Charts
-# =============================================================================
+@st.cache_resource(show_spinner=False)
+def build_pareto_figure(data_version, _tables, _lorenz=None):
+    df_corr = _tables['corr']
+    below_p99_cost, total_cost_all = _tables['below_p99_cost'], _tables['total_cost_all']
+    
+    fig_pareto = go.Figure()
+    
+    # With per-user costs the curve is the exact Lorenz curve, downsampled to
+    # a fixed number of points; otherwise one point per calls bucket.
+    if _lorenz is not None:
+        curve_x, curve_y = _lorenz.points()
+        curve_mode, sorted_by, curve_trace = 'lines', "cost", go.Scattergl
+    else:
+        curve_x, curve_y = list(df_corr['cum_users']) + [100], list(df_corr['cum_cost']) + [100]
+        curve_mode, sorted_by, curve_trace = 'lines+markers', "LLM calls", go.Scatter
+    
+    # Add area showing the gap between users and cost
+    fig_pareto.add_trace(curve_trace(
+        x=curve_x,
+        y=curve_y,
+        fill='tozeroy',
+        fillcolor='rgba(0, 212, 255, 0.1)',
+        line=dict(color='#00d4ff', width=3),
+        name='Cumulative Cost %',
+        mode=curve_mode,
+        marker=dict(size=10),
+        hovertemplate="Users: %{x:.1f}%<br>Cost: %{y:.1f}%<extra></extra>"
+    ))
+    
+    # Add diagonal line (perfect equality)
+    fig_pareto.add_trace(go.Scatter(
+        x=[0, 100],
+        y=[0, 100],
+        mode='lines',
+        line=dict(color='#64748b', width=2, dash='dash'),
+        name='Perfect Equality',
+        hoverinfo='skip'
+    ))
+    
+    # Add P99 marker (at 99% of users)
+    if _lorenz is not None:
+        p99_cost_pct = 100 - float(_lorenz.top_share(1))
+    else:
+        p99_cost_pct = share(below_p99_cost, total_cost_all)
+    fig_pareto.add_trace(go.Scatter(
+        x=[99],
+        y=[p99_cost_pct],
+        mode='markers+text',
+        marker=dict(size=16, color='#f97316', symbol='star'),
+        text=[f'P99: {p99_cost_pct:.0f}%'],
+        textposition='bottom left',
+        textfont=dict(color='#f97316', size=12),
+        name='P99 Threshold',
+        hovertemplate="<b>P99 Threshold</b><br>99% of users<br>Only {p99_cost_pct:.0f}% of cost<extra></extra>"
+    ))
+    
+    # Add annotation for the gap
+    fig_pareto.add_annotation(
+        x=99, y=(p99_cost_pct + 100) / 2,
+        text=f"Top 1% = {100-p99_cost_pct:.0f}%<br>of total cost",
+        showarrow=True,
+        arrowhead=2,
+        arrowcolor='#f97316',
+        font=dict(color='#f97316', size=11),
+        ax=50, ay=0,
+        bordercolor='#f97316',
+        borderwidth=1,
+        borderpad=4,
+        bgcolor='rgba(249, 115, 22, 0.1)'
+    )
+    
+    fig_pareto.update_layout(
+        title=dict(
+            text="<b>Pareto Analysis: User % vs Cost %</b>" + (
+                f" (Gini {_lorenz.gini:.2f})" if _lorenz is not None else ""),
+            font=dict(size=16, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        xaxis=dict(
+            title=f"Cumulative % of Users (sorted by {sorted_by})",
+            gridcolor='rgba(100,100,100,0.2)',
+            range=[0, 105]
+        ),
+        yaxis=dict(
+            title="Cumulative % of Cost",
+            gridcolor='rgba(100,100,100,0.2)',
+            range=[0, 105]
+        ),
+        height=400,
+        showlegend=False
+    )
+    
+    return fig_pareto
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Distribution Overview", "💰 Calls vs Cost", "💸 Cost Simulator", "🔥 P99 Deep Dive", "📊 Cumulative Distribution"])
 
-with tab1:
-    col_left, col_right = st.columns([2, 1])
+@st.cache_resource(show_spinner=False)
+def build_compare_figure(data_version, _tables):
+    p99_users, p99_cost = _tables['p99_users'], _tables['p99_cost']
+    total_cost_all, total_users_all = _tables['total_cost_all'], _tables['total_users_all']
     
-    with col_left:
-        # Distribution histogram with cost overlay
-        df_dist = pd.DataFrame(distribution_data)
-        
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Color gradient based on position
-        colors = ['#00d4ff', '#00c4ef', '#00b4df', '#20a4cf', '#4094bf',
-                  '#6084af', '#80749f', '#9f648f', '#be547f', '#dd446f',
-                  '#ec4899', '#f97316', '#f97316']
-        
-        # Bar chart for user count
-        fig.add_trace(go.Bar(
-            x=df_dist['bucket'],
-            y=df_dist['user_count'],
-            name='Users',
-            marker=dict(
-                color=colors,
-                line=dict(color='rgba(255,255,255,0.1)', width=1)
-            ),
-            text=[f"{p:.1f}%" for p in df_dist['pct']],
-            textposition='outside',
-            textfont=dict(color='#e2e8f0', size=9),
-            hovertemplate="<b>%{x}</b><br>Users: %{y:,.0f}<extra></extra>"
-        ), secondary_y=False)
-        
-        # Line chart for cost
-        fig.add_trace(go.Scatter(
-            x=df_dist['bucket'],
-            y=df_dist['total_cost'],
-            name='Cost ($)',
-            mode='lines+markers+text',
-            line=dict(color='#10b981', width=3),
-            marker=dict(size=8, color='#10b981', symbol='diamond'),
-            text=[f"${c/1000:.0f}K" for c in df_dist['total_cost']],
-            textposition='top center',
-            textfont=dict(color='#10b981', size=8),
-            hovertemplate="<b>%{x}</b><br>Cost: $%{y:,.0f}<extra></extra>"
-        ), secondary_y=True)
-        
-        # Add P99 threshold annotation
-        fig.add_vline(x=8.5, line_dash="dash", line_color="#f97316", line_width=2)
-        fig.add_annotation(
-            x=8.5, y=df_dist['user_count'].max() * 0.9,
-            text="P99 →",
-            showarrow=False,
-            font=dict(color="#f97316", size=14, family="JetBrains Mono"),
-            xshift=30
+    fig_compare = go.Figure()
+    
+    categories = ['Users', 'Total Cost']
+    p99_values = [share(p99_users, total_users_all), share(p99_cost, total_cost_all)]
+    other_values = [100-p99_values[0], 100-p99_values[1]]
+    
+    fig_compare.add_trace(go.Bar(
+        name='Bottom 99% of users',
+        x=categories,
+        y=other_values,
+        marker_color='#a855f7',
+        text=[f'{v:.1f}%' for v in other_values],
+        textposition='inside',
+        textfont=dict(size=14, color='white'),
+        hovertemplate="%{x}: %{y:.1f}%<extra>Bottom 99%</extra>"
+    ))
+    
+    fig_compare.add_trace(go.Bar(
+        name='Top 1% (P99)',
+        x=categories,
+        y=p99_values,
+        marker_color='#f97316',
+        text=[f'{v:.1f}%' for v in p99_values],
+        textposition='inside',
+        textfont=dict(size=14, color='white'),
+        hovertemplate="%{x}: %{y:.1f}%<extra>Top 1% P99</extra>"
+    ))
+    
+    fig_compare.update_layout(
+        title=dict(
+            text="<b>P99 vs Rest: Users & Cost Share</b>",
+            font=dict(size=16, color='#e2e8f0', family='Space Grotesk')
+        ),
+        barmode='stack',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        yaxis=dict(
+            title="Percentage",
+            gridcolor='rgba(100,100,100,0.2)',
+            range=[0, 105]
+        ),
+        xaxis=dict(gridcolor='rgba(100,100,100,0.2)'),
+        height=400,
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='center',
+            x=0.5
         )
-        
-        fig.update_layout(
-            title=dict(
-                text="<b>User Distribution by LLM Call Volume</b>",
-                font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', family='JetBrains Mono'),
-            xaxis=dict(
-                title="LLM Calls Bucket",
-                gridcolor='rgba(100,100,100,0.2)',
-                tickfont=dict(size=10)
-            ),
-            height=450,
-            margin=dict(t=80, b=60),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='right',
-                x=1
-            )
+    )
+    
+    return fig_compare
+
+
+def zoom_options(max_value):
+    """1-2-5 steps up to ``max_value`` for a log-scale range slider."""
+    options = [m * 10 ** e for e in range(len(str(int(max_value)))) for m in (1, 2, 5) if m * 10 ** e < max_value]
+    return options + [int(max_value)]
+
+
+# Per-user charts are binned or downsampled server-side: whatever the user
+# count, the browser gets a fixed-size grid or a few thousand points. Each
+# zoom window is re-binned from the per-user rows at the same size.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_density_figure(data_version, _backend, calls_range):
+    density = _backend.density(calls_range)
+    if density is None:
+        return None
+    users = density['users']
+    # Colour by log10(users); 2D numeric arrays go over the wire as binary.
+    z = np.where(users > 0, np.log10(np.maximum(users, 1)), np.nan).astype(np.float32)
+    
+    fig = go.Figure(go.Heatmap(
+        x=density['calls_edges'],
+        y=density['cost_edges'],
+        z=z,
+        customdata=users.astype(np.int32),
+        colorscale=[[0, '#1e293b'], [0.5, '#a855f7'], [1, '#00d4ff']],
+        colorbar=dict(title="Users", tickvals=list(range(0, 10)), ticktext=[f"{10**i:,}" for i in range(0, 10)]),
+        hovertemplate="Calls: %{x:,.0f}<br>Cost/user: $%{y:,.2f}<br>Users: %{customdata:,}<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title=dict(
+            text=f"<b>Calls vs Cost per User</b> ({density['total_users']:,} users)",
+            font=dict(size=16, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        xaxis=dict(title="LLM Calls", type='log', gridcolor='rgba(100,100,100,0.2)'),
+        yaxis=dict(title="Cost per User ($)", type='log', gridcolor='rgba(100,100,100,0.2)'),
+        height=450
+    )
+    
+    return fig
+
+
+@st.cache_resource(show_spinner=False)
+def build_p99_figure(data_version, _df_p99, buckets=P99_BUCKETS):
+    df_p99 = _df_p99
+    
+    fig2 = plotly_subplots.make_subplots(
+        rows=1, cols=2,
+        column_widths=[0.6, 0.4],
+        specs=[[{"type": "bar"}, {"type": "pie"}]],
+        subplot_titles=("P99 Users by Call Volume", "Cost Distribution")
+    )
+    
+    # Bar chart for P99 distribution
+    fig2.add_trace(go.Bar(
+        x=df_p99['bucket'],
+        y=df_p99['user_count'],
+        marker=dict(
+            color=df_p99['user_count'],
+            colorscale='Oranges',
+            line=dict(color='rgba(255,255,255,0.1)', width=1)
+        ),
+        text=[f"{p:.1f}%" for p in df_p99['pct']],
+        textposition='outside',
+        textfont=dict(color='#e2e8f0', size=9),
+        name="Users"
+    ), row=1, col=1)
+    
+    # Pie chart for cost distribution
+    fig2.add_trace(go.Pie(
+        labels=df_p99['bucket'],
+        values=df_p99['total_cost'],
+        hole=0.5,
+        marker=dict(
+            colors=['rgb(188,189,220)', 'rgb(158,154,200)', 'rgb(128,125,186)',
+                    'rgb(106,81,163)', 'rgb(84,39,143)', 'rgb(63,0,125)']
+        ),
+        textinfo='percent',
+        textfont=dict(size=10),
+        name="Cost"
+    ), row=1, col=2)
+    
+    fig2.update_layout(
+        title=dict(
+            text="<b>P99 Users Deep Dive: Call Volume & Cost Distribution</b>",
+            font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        height=450,
+        showlegend=False
+    )
+    
+    fig2.update_xaxes(gridcolor='rgba(100,100,100,0.2)', row=1, col=1)
+    fig2.update_yaxes(gridcolor='rgba(100,100,100,0.2)', row=1, col=1)
+    
+    return fig2
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_cdf_figure(data_version, _df_pct, _dashboard, _backend=None, pct_range=(0, 100)):
+    df_pct = _df_pct
+    p99_threshold = _dashboard.stats['p99_threshold']
+    lo_pct, hi_pct = pct_range
+    curve = _backend.calls_curve(lo_pct, hi_pct) if _backend is not None else None
+    
+    fig3 = go.Figure()
+    
+    if curve is not None:
+        # Exact CDF from every user, downsampled to the zoom window
+        fig3.add_trace(go.Scattergl(
+            x=curve[0],
+            y=curve[1],
+            mode='lines',
+            line=dict(color='#00d4ff', width=3),
+            fill='tozeroy',
+            fillcolor='rgba(0, 212, 255, 0.1)',
+            name='LLM Calls',
+            hovertemplate="P%{x:.3f}: %{y:,.0f} calls<extra></extra>"
+        ))
+        in_range = df_pct['percentile'].between(lo_pct, hi_pct)
+        fig3.add_trace(go.Scatter(
+            x=df_pct['percentile'][in_range],
+            y=df_pct['llm_calls'][in_range],
+            mode='markers',
+            marker=dict(size=8, color='#00d4ff', line=dict(color='white', width=2)),
+            name='Percentiles',
+            hovertemplate="P%{x}: %{y:,.0f} calls<extra></extra>"
+        ))
+    else:
+        # Add cumulative line
+        fig3.add_trace(go.Scatter(
+            x=df_pct['percentile'],
+            y=df_pct['llm_calls'],
+            mode='lines+markers',
+            line=dict(color='#00d4ff', width=3),
+            marker=dict(size=8, color='#00d4ff', line=dict(color='white', width=2)),
+            fill='tozeroy',
+            fillcolor='rgba(0, 212, 255, 0.1)',
+            name='LLM Calls',
+            hovertemplate="P%{x}: %{y:,.0f} calls<extra></extra>"
+        ))
+    
+    # Add P99 marker
+    fig3.add_trace(go.Scatter(
+        x=[99],
+        y=[p99_threshold],
+        mode='markers+text',
+        marker=dict(size=16, color='#f97316', symbol='star'),
+        text=['P99'],
+        textposition='top center',
+        textfont=dict(color='#f97316', size=12),
+        name='P99 Threshold',
+        hovertemplate=f"<b>P99</b><br>Threshold: {p99_threshold:,} calls<extra></extra>"
+    ))
+    
+    # Add annotations for key percentiles
+    key_points = [(p, _dashboard.percentile(p), f"P{p}: {_dashboard.percentile(p):,}") for p in (50, 90, 95)
+                  if lo_pct <= p <= hi_pct]
+    
+    for x, y, text in key_points:
+        fig3.add_annotation(
+            x=x, y=y,
+            text=text,
+            showarrow=True,
+            arrowhead=2,
+            arrowsize=1,
+            arrowwidth=2,
+            arrowcolor='#64748b',
+            font=dict(color='#e2e8f0', size=10),
+            ax=0, ay=-30
         )
-        
-        fig.update_yaxes(
-            title_text="Number of Users",
+    
+    fig3.update_layout(
+        title=dict(
+            text="<b>Cumulative Distribution Function (CDF)</b>",
+            font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        xaxis=dict(
+            title="Percentile",
+            gridcolor='rgba(100,100,100,0.2)',
+            dtick=10 if pct_range == (0, 100) else None,
+            range=[0, 102] if pct_range == (0, 100) else [lo_pct, hi_pct]
+        ),
+        yaxis=dict(
+            title="LLM Calls",
             gridcolor='rgba(100,100,100,0.2)',
             type='log',
-            secondary_y=False
-        )
-        fig.update_yaxes(
-            title_text="Total Cost ($)",
-            gridcolor='rgba(100,100,100,0.1)',
-            secondary_y=True,
-            showgrid=False
-        )
+            range=[0, 5.5] if pct_range == (0, 100) else None
+        ),
+        height=450,
+        showlegend=False
+    )
+    
+    return fig3
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def build_trend_figure(version, _df_trend, days):
+    df = _df_trend
+    window = "daily" if days == 1 else f"{days}-day window"
+    
+    fig = plotly_subplots.make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        row_heights=[0.6, 0.4],
+        specs=[[{}], [{"secondary_y": True}]],
+        subplot_titles=("LLM Calls per User", "P99 Users & Cost Share")
+    )
+    
+    for p, color in zip(TREND_PERCENTILES, ['#64748b', '#00d4ff', '#f97316', '#ec4899']):
+        fig.add_trace(go.Scatter(
+            x=df['date'],
+            y=df[f"p{p:g}"],
+            mode='lines',
+            line=dict(color=color, width=3 if p == 99 else 2),
+            name=f"P{p:g}",
+            hovertemplate=f"P{p:g}: " + "%{y:,.0f} calls<extra></extra>"
+        ), row=1, col=1)
+    
+    fig.add_trace(go.Bar(
+        x=df['date'],
+        y=df['p99_users'],
+        marker=dict(color='rgba(249, 115, 22, 0.5)'),
+        name="P99 users",
+        hovertemplate="P99 users: %{y:,}<extra></extra>"
+    ), row=2, col=1)
+    
+    fig.add_trace(go.Scatter(
+        x=df['date'],
+        y=df['p99_cost_share'],
+        mode='lines',
+        line=dict(color='#10b981', width=2),
+        name="P99 cost share",
+        hovertemplate="P99 cost share: %{y:.1f}%<extra></extra>"
+    ), row=2, col=1, secondary_y=True)
+    
+    fig.update_layout(
+        title=dict(
+            text=f"<b>P99 Trend</b> ({window})",
+            font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        height=600
+    )
+    
+    fig.update_xaxes(gridcolor='rgba(100,100,100,0.2)')
+    fig.update_yaxes(title_text="Calls", type='log', gridcolor='rgba(100,100,100,0.2)', row=1, col=1)
+    fig.update_yaxes(title_text="Users", gridcolor='rgba(100,100,100,0.2)', row=2, col=1)
+    fig.update_yaxes(title_text="Cost share (%)", showgrid=False, row=2, col=1, secondary_y=True)
+    
+    return fig
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def bucket_quantiles(data_version, _backend, min_calls, n):
+    """Calls at n evenly spaced quantiles of the users with ``min_calls``+ calls."""
+    return _backend.percentiles([100 * i / n for i in range(1, n)], min_calls=min_calls)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def rebucket(data_version, _backend, buckets, pct_of=None):
+    """Bucket table for user-defined edges, straight from the backend."""
+    return bucket_rows(buckets, *_backend.bucket_totals(buckets), pct_of=pct_of)
+
+
+def bucket_editor(key, default):
+    """Bucket edges picked in the UI (default, log-spaced, equal-population or custom).
+
+    Re-bucketing needs the backend; with the pasted snapshot only the
+    default buckets exist.
+    """
+    if backend is None:
+        return default
+    with st.expander("⚙️ Bucket edges"):
+        mode = st.radio("Edges", ["Default", "Log-spaced", "Equal population", "Custom"],
+                        horizontal=True, key=f"{key}_mode")
+        if mode == "Default":
+            return default
+        if mode == "Custom":
+            text = st.text_input("Lower edges (LLM calls, comma-separated)",
+                                 value=", ".join(str(e) for e in default.edges), key=f"{key}_edges")
+            try:
+                return parse_edges(text)
+            except ValueError as e:
+                st.error(str(e))
+                return default
+        n = int(st.number_input("Buckets", min_value=2, max_value=50, value=len(default), step=1, key=f"{key}_n"))
+        lo = default.edges[0]
+        if mode == "Log-spaced":
+            return log_spaced_buckets(lo, max_calls, n)
+        return equal_population_buckets(lo, bucket_quantiles(data_version, backend, lo, n))
+
+
+def render_distribution_tab():
+    col_left, col_right = st.columns([2, 1])
+    
+    with col_left:
+        # Distribution histogram with cost overlay
+        df_dist = build_frame(data_version, 'distribution', dashboard.distribution_data)
+        buckets = bucket_editor("dist_buckets", DISTRIBUTION_BUCKETS)
+        if buckets != DISTRIBUTION_BUCKETS:
+            with profiler.section("rebucket"):
+                rows = rebucket(data_version, backend, buckets, pct_of=total_users)
+            df_custom = build_frame(data_version, f"distribution:{buckets.edges}", rows)
+        else:
+            df_custom = df_dist
         
-        st.plotly_chart(fig, use_container_width=True)
+        with profiler.section("build_distribution_figure"):
+            fig = build_distribution_figure(data_version, df_custom, p99_threshold, buckets)
+        
+        plotly_chart(fig, "distribution")
     
     with col_right:
-        st.markdown("""
+        pct_le_100 = df_dist['pct'][:DISTRIBUTION_BUCKETS.assign(101)].sum()
+        st.markdown(f"""
         <div class="insight-box">
             <h4 style="color: #a855f7; margin-top: 0;">📌 Key Insights</h4>
             <ul style="color: #e2e8f0; line-height: 1.8;">
-                <li><b>70% of users</b> make ≤100 LLM calls</li>
-                <li><b>Median user</b> makes only 59 calls</li>
-                <li><b>P99 threshold</b>: ~5,000 calls</li>
+                <li><b>{pct_le_100:.0f}% of users</b> make ≤100 LLM calls</li>
+                <li><b>Median user</b> makes only {median_calls:,} calls</li>
+                <li><b>P99 threshold</b>: {p99_threshold:,} calls</li>
                 <li><b>Top 1%</b> drives disproportionate load</li>
             </ul>
         </div>
         """, unsafe_allow_html=True)
         
-        st.markdown("""
+        st.markdown(f"""
         <div class="p99-highlight">
             <h4 style="color: #f97316; margin-top: 0;">🔥 P99 Users</h4>
             <p style="color: #e2e8f0; margin-bottom: 0.5rem;">
-                <b>20,575 users</b> (1%) with <b>5K+ calls</b>
+                <b>{p99_user_count:,} users</b> ({share(p99_user_count, total_users):.0f}%) with <b>{p99_threshold:,}+ calls</b>
             </p>
             <p style="color: #64748b; font-size: 0.9rem; margin: 0;">
-                These power users account for 48% of all LLM calls
+                These power users account for {share(p99_total_calls, total_calls):.0f}% of all LLM calls
             </p>
         </div>
         """, unsafe_allow_html=True)
         
         # Quick stats table
         st.markdown("#### Percentile Quick Reference")
+        quick_pcts = [50, 75, 90, 95, 99, 99.9]
         quick_stats = pd.DataFrame({
-            'Percentile': ['P50', 'P75', 'P90', 'P95', 'P99', 'P99.9'],
-            'LLM Calls': ['59', '121', '301', '628', '4,959', '26,196']
+            'Percentile': [f"P{p}" for p in quick_pcts],
+            'LLM Calls': [f"{dashboard.percentile(p):,}" for p in quick_pcts]
         })
         st.dataframe(quick_stats, hide_index=True, use_container_width=True)
 
-with tab2:
-    # Calculate cumulative data for Pareto analysis
-    df_corr = pd.DataFrame(distribution_data)
-    df_corr['cum_users'] = df_corr['user_count'].cumsum() / df_corr['user_count'].sum() * 100
-    df_corr['cum_cost'] = df_corr['total_cost'].cumsum() / df_corr['total_cost'].sum() * 100
-    df_corr['cost_pct'] = df_corr['total_cost'] / df_corr['total_cost'].sum() * 100
-    df_corr['user_pct'] = df_corr['user_count'] / df_corr['user_count'].sum() * 100
-    
-    # P99 users are in buckets 5K+ (indexes 9-12)
-    p99_buckets = df_corr[df_corr['avg_calls'] >= 5000]
-    below_p99_buckets = df_corr[df_corr['avg_calls'] < 5000]
-    
-    p99_users = p99_buckets['user_count'].sum()
-    p99_cost = p99_buckets['total_cost'].sum()
-    below_p99_users = below_p99_buckets['user_count'].sum()
-    below_p99_cost = below_p99_buckets['total_cost'].sum()
-    
-    total_cost_all = df_corr['total_cost'].sum()
-    total_users_all = df_corr['user_count'].sum()
+
+def render_pareto_tab():
+    tables = build_pareto_tables(data_version, dashboard.distribution_data, dashboard.stats)
+    lorenz = fanout.result('lorenz') if fanout is not None else None
+    p99_users, p99_cost = tables['p99_users'], tables['p99_cost']
+    below_p99_users, below_p99_cost = tables['below_p99_users'], tables['below_p99_cost']
+    total_cost_all, total_users_all = tables['total_cost_all'], tables['total_users_all']
+    cost_ratio = tables['cost_per_user_ratio']
+    ratio_text = f"{cost_ratio:.0f}x" if cost_ratio is not None else "n/a"
     
     # Top row: Key comparison metrics
     st.markdown("### 🎯 P99 Users: Are They The Most Expensive?")
@@ -392,7 +994,7 @@ with tab2:
             <p style="color: #a855f7; font-size: 2.5rem; font-weight: bold; margin: 0; font-family: 'JetBrains Mono';">99%</p>
             <p style="color: #64748b; margin: 0.5rem 0 0 0;">of users</p>
             <p style="color: #e2e8f0; font-size: 1.5rem; font-weight: bold; margin: 0.5rem 0;">${below_p99_cost/1e6:.1f}M</p>
-            <p style="color: #64748b; margin: 0;">({below_p99_cost/total_cost_all*100:.0f}% of cost)</p>
+            <p style="color: #64748b; margin: 0;">({share(below_p99_cost, total_cost_all):.0f}% of cost)</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -400,20 +1002,21 @@ with tab2:
         st.markdown(f"""
         <div style="background: linear-gradient(145deg, rgba(249, 115, 22, 0.2), rgba(249, 115, 22, 0.05)); border: 2px solid rgba(249, 115, 22, 0.5); border-radius: 12px; padding: 1.5rem; text-align: center;">
             <p style="color: #f97316; font-size: 2.5rem; font-weight: bold; margin: 0; font-family: 'JetBrains Mono';">1%</p>
-            <p style="color: #64748b; margin: 0.5rem 0 0 0;">P99 users (5K+ calls)</p>
+            <p style="color: #64748b; margin: 0.5rem 0 0 0;">P99 users ({p99_threshold:,}+ calls)</p>
             <p style="color: #e2e8f0; font-size: 1.5rem; font-weight: bold; margin: 0.5rem 0;">${p99_cost/1e6:.1f}M</p>
-            <p style="color: #64748b; margin: 0;">({p99_cost/total_cost_all*100:.0f}% of cost)</p>
+            <p style="color: #64748b; margin: 0;">({share(p99_cost, total_cost_all):.0f}% of cost)</p>
         </div>
         """, unsafe_allow_html=True)
     
     with comp_col3:
-        cost_ratio = (p99_cost/p99_users) / (below_p99_cost/below_p99_users)
+        p99_per_user = f"${p99_cost/p99_users:.0f}/user" if p99_users else "n/a"
+        below_per_user = f"${below_p99_cost/below_p99_users:.2f}/user" if below_p99_users else "n/a"
         st.markdown(f"""
         <div style="background: linear-gradient(145deg, rgba(16, 185, 129, 0.2), rgba(16, 185, 129, 0.05)); border: 2px solid rgba(16, 185, 129, 0.5); border-radius: 12px; padding: 1.5rem; text-align: center;">
-            <p style="color: #10b981; font-size: 2.5rem; font-weight: bold; margin: 0; font-family: 'JetBrains Mono';">{cost_ratio:.0f}x</p>
+            <p style="color: #10b981; font-size: 2.5rem; font-weight: bold; margin: 0; font-family: 'JetBrains Mono';">{ratio_text}</p>
             <p style="color: #64748b; margin: 0.5rem 0 0 0;">Cost per user ratio</p>
-            <p style="color: #e2e8f0; font-size: 1rem; margin: 0.5rem 0;">P99: ${p99_cost/p99_users:.0f}/user</p>
-            <p style="color: #64748b; margin: 0;">Others: ${below_p99_cost/below_p99_users:.2f}/user</p>
+            <p style="color: #e2e8f0; font-size: 1rem; margin: 0.5rem 0;">P99: {p99_per_user}</p>
+            <p style="color: #64748b; margin: 0;">Others: {below_per_user}</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -424,209 +1027,207 @@ with tab2:
     
     with col_left:
         # Pareto chart - cumulative users vs cumulative cost
-        fig_pareto = go.Figure()
+        with profiler.section("build_pareto_figure"):
+            fig_pareto = build_pareto_figure(data_version, tables, lorenz)
         
-        # Add area showing the gap between users and cost
-        fig_pareto.add_trace(go.Scatter(
-            x=list(df_corr['cum_users']) + [100],
-            y=list(df_corr['cum_cost']) + [100],
-            fill='tozeroy',
-            fillcolor='rgba(0, 212, 255, 0.1)',
-            line=dict(color='#00d4ff', width=3),
-            name='Cumulative Cost %',
-            mode='lines+markers',
-            marker=dict(size=10),
-            hovertemplate="Users: %{x:.1f}%<br>Cost: %{y:.1f}%<extra></extra>"
-        ))
+        plotly_chart(fig_pareto, "pareto")
         
-        # Add diagonal line (perfect equality)
-        fig_pareto.add_trace(go.Scatter(
-            x=[0, 100],
-            y=[0, 100],
-            mode='lines',
-            line=dict(color='#64748b', width=2, dash='dash'),
-            name='Perfect Equality',
-            hoverinfo='skip'
-        ))
-        
-        # Add P99 marker (at 99% of users)
-        p99_cost_pct = below_p99_cost / total_cost_all * 100
-        fig_pareto.add_trace(go.Scatter(
-            x=[99],
-            y=[p99_cost_pct],
-            mode='markers+text',
-            marker=dict(size=16, color='#f97316', symbol='star'),
-            text=[f'P99: {p99_cost_pct:.0f}%'],
-            textposition='bottom left',
-            textfont=dict(color='#f97316', size=12),
-            name='P99 Threshold',
-            hovertemplate="<b>P99 Threshold</b><br>99% of users<br>Only {p99_cost_pct:.0f}% of cost<extra></extra>"
-        ))
-        
-        # Add annotation for the gap
-        fig_pareto.add_annotation(
-            x=99, y=(p99_cost_pct + 100) / 2,
-            text=f"Top 1% = {100-p99_cost_pct:.0f}%<br>of total cost",
-            showarrow=True,
-            arrowhead=2,
-            arrowcolor='#f97316',
-            font=dict(color='#f97316', size=11),
-            ax=50, ay=0,
-            bordercolor='#f97316',
-            borderwidth=1,
-            borderpad=4,
-            bgcolor='rgba(249, 115, 22, 0.1)'
-        )
-        
-        fig_pareto.update_layout(
-            title=dict(
-                text="<b>Pareto Analysis: User % vs Cost %</b>",
-                font=dict(size=16, color='#e2e8f0', family='Space Grotesk')
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', family='JetBrains Mono'),
-            xaxis=dict(
-                title="Cumulative % of Users (sorted by LLM calls)",
-                gridcolor='rgba(100,100,100,0.2)',
-                range=[0, 105]
-            ),
-            yaxis=dict(
-                title="Cumulative % of Cost",
-                gridcolor='rgba(100,100,100,0.2)',
-                range=[0, 105]
-            ),
-            height=400,
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig_pareto, use_container_width=True)
+        if lorenz is not None:
+            top_pct = st.number_input("Top % of users (by cost)", min_value=0.01, max_value=100.0,
+                                      value=1.0, step=0.5, format="%.2f", key="lorenz_top_pct")
+            st.markdown(f"""
+            <div class="insight-box">
+                <b>Top {top_pct:g}% of users</b> ({int(round(lorenz.users * top_pct / 100)):,} users)
+                account for <b>{float(lorenz.top_share(top_pct)):.1f}% of total cost</b>.
+                Gini coefficient: <b>{lorenz.gini:.3f}</b> (0 = everyone costs the same, 1 = one user costs everything).
+            </div>
+            """, unsafe_allow_html=True)
     
     with col_right:
         # Stacked bar comparing P99 vs rest
-        fig_compare = go.Figure()
-        
-        categories = ['Users', 'Total Cost']
-        p99_values = [p99_users/total_users_all*100, p99_cost/total_cost_all*100]
-        other_values = [100-p99_values[0], 100-p99_values[1]]
-        
-        fig_compare.add_trace(go.Bar(
-            name='Bottom 99% of users',
-            x=categories,
-            y=other_values,
-            marker_color='#a855f7',
-            text=[f'{v:.1f}%' for v in other_values],
-            textposition='inside',
-            textfont=dict(size=14, color='white'),
-            hovertemplate="%{x}: %{y:.1f}%<extra>Bottom 99%</extra>"
-        ))
-        
-        fig_compare.add_trace(go.Bar(
-            name='Top 1% (P99)',
-            x=categories,
-            y=p99_values,
-            marker_color='#f97316',
-            text=[f'{v:.1f}%' for v in p99_values],
-            textposition='inside',
-            textfont=dict(size=14, color='white'),
-            hovertemplate="%{x}: %{y:.1f}%<extra>Top 1% P99</extra>"
-        ))
-        
-        fig_compare.update_layout(
-            title=dict(
-                text="<b>P99 vs Rest: Users & Cost Share</b>",
-                font=dict(size=16, color='#e2e8f0', family='Space Grotesk')
-            ),
-            barmode='stack',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', family='JetBrains Mono'),
-            yaxis=dict(
-                title="Percentage",
-                gridcolor='rgba(100,100,100,0.2)',
-                range=[0, 105]
-            ),
-            xaxis=dict(gridcolor='rgba(100,100,100,0.2)'),
-            height=400,
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='center',
-                x=0.5
-            )
-        )
+        with profiler.section("build_compare_figure"):
+            fig_compare = build_compare_figure(data_version, tables)
         
-        st.plotly_chart(fig_compare, use_container_width=True)
+        plotly_chart(fig_compare, "compare")
     
     # Answer box
     st.markdown(f"""
     <div style="background: linear-gradient(145deg, rgba(249, 115, 22, 0.15), rgba(249, 115, 22, 0.05)); border: 2px solid rgba(249, 115, 22, 0.4); border-radius: 12px; padding: 1.5rem; margin-top: 1rem;">
         <h4 style="color: #f97316; margin-top: 0;">✅ Answer: YES, P99 users are disproportionately expensive</h4>
         <p style="color: #e2e8f0; line-height: 1.8; margin-bottom: 0;">
-            The <b>top 1% of users</b> (those with 5K+ LLM calls) account for:<br>
-            • <b>{p99_cost/total_cost_all*100:.0f}% of total cost</b> (${p99_cost/1e6:.1f}M)<br>
-            • Only <b>{p99_users/total_users_all*100:.1f}% of users</b> ({p99_users:,} users)<br>
-            • <b>{cost_ratio:.0f}x more expensive per user</b> than average<br><br>
+            The <b>top 1% of users</b> (those with {p99_threshold:,}+ LLM calls) account for:<br>
+            • <b>{share(p99_cost, total_cost_all):.0f}% of total cost</b> (${p99_cost/1e6:.1f}M)<br>
+            • Only <b>{share(p99_users, total_users_all):.1f}% of users</b> ({p99_users:,} users)<br>
+            • <b>{ratio_text} more expensive per user</b> than average<br><br>
             <span style="color: #64748b;">This is a classic Pareto distribution where a small fraction of heavy users drives the majority of costs.</span>
         </p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Per-user density, only when the backend can bin individual users
+    if backend is not None:
+        with profiler.section("build_density_figure"):
+            fig_density = build_density_figure(data_version, backend, None)
+        if fig_density is not None:
+            st.markdown("<br>", unsafe_allow_html=True)
+            calls_range = st.select_slider(
+                "Zoom: LLM calls range",
+                options=zoom_options(max_calls),
+                value=(1, int(max_calls)),
+                key="density_zoom",
+                help="Re-bins just the users in this range at full resolution"
+            )
+            if calls_range != (1, int(max_calls)):
+                with profiler.section("build_density_figure"):
+                    fig_density = build_density_figure(data_version, backend, tuple(calls_range))
+            plotly_chart(fig_density, "density")
 
-with tab3:
-    st.markdown("### 💸 Cost Savings Simulator")
-    st.markdown("*Set a monthly call limit to see potential cost savings*")
+
+# Simulator answers are cached per data version: with a SQL backend each one
+# is a query against the engine.
+@st.cache_data(show_spinner=False)
+def simulator_sweep(data_version, _sim, limits):
+    return _sim.sweep(list(limits))
+
+
+@st.cache_data(show_spinner=False, max_entries=4096)
+def simulate_limit(data_version, _sim, limit):
+    return _sim.simulate(limit)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def policy_sweep(data_version, _sims, limits, price_factors, overage_rate, tier_ratios):
+    return policy_grid(_sims, limits, price_factors, overage_rate, dict(tier_ratios) if tier_ratios else None)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def build_policy_figure(data_version, _grid, overage_rate, tier_ratios):
+    grid = _grid
+    baseline = grid['baseline_cost'] or 1.0
+    # 2D numeric arrays go over the wire as binary; float32 halves them.
+    savings_pct = (grid['savings'] / baseline * 100).astype(np.float32)
     
-    # Pre-computed cost data at various thresholds
-    cost_data = {
-        100: 1548917,
-        250: 2287654,
-        500: 3277752,
-        750: 3745123,
-        1000: 4175017,
-        1250: 4512456,
-        1500: 4807297,
-        1750: 5078234,
-        2000: 5322163,
-        2500: 5756789,
-        3000: 6153044,
-        4000: 6798456,
-        5000: 7351243,
-        7500: 8287654,
-        10000: 9075755,
-    }
+    fig = go.Figure(go.Heatmap(
+        x=grid['limit'],
+        y=grid['price_factor'],
+        z=savings_pct,
+        customdata=(grid['cost'] / 1e6).astype(np.float32),
+        zmid=0,
+        colorscale=[[0, '#ef4444'], [0.5, '#1e293b'], [1, '#10b981']],
+        colorbar=dict(title="Savings %"),
+        hovertemplate=("Base limit: %{x:,.0f} calls<br>Price: ×%{y:.2f}<br>"
+                       "Cost: $%{customdata:.2f}M<br>Savings: %{z:.1f}%<extra></extra>")
+    ))
     
-    users_affected_data = {
-        100: 607658,
-        250: 246696,
-        500: 124317,
-        750: 87376,
-        1000: 69568,
-        1250: 59876,
-        1500: 51948,
-        1750: 46789,
-        2000: 42537,
-        2500: 36543,
-        3000: 31713,
-        4000: 25234,
-        5000: 20340,
-        7500: 13456,
-        10000: 9320,
-    }
+    # Break-even: the policy costs exactly what today's uncapped spend does.
+    fig.add_trace(go.Contour(
+        x=grid['limit'],
+        y=grid['price_factor'],
+        z=savings_pct,
+        contours=dict(start=0, end=0, size=1, coloring='none'),
+        line=dict(color='#f97316', width=2, dash='dash'),
+        showscale=False,
+        hoverinfo='skip',
+        name="Break-even"
+    ))
     
-    total_cost_current = 12114652
-    total_users = 2057722
+    overage = "hard cap" if overage_rate == 0 else f"beyond-cap calls at {overage_rate*100:.0f}% of price"
+    tiers = ", ".join(f"{plan} ×{ratio:g}" for plan, ratio in tier_ratios) if tier_ratios else None
+    fig.update_layout(
+        title=dict(
+            text=f"<b>Savings by Limit × Price</b> ({overage}{'; ' + tiers if tiers else ''})",
+            font=dict(size=16, color='#e2e8f0', family='Space Grotesk')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', family='JetBrains Mono'),
+        xaxis=dict(title="Base Monthly Call Limit", type='log', gridcolor='rgba(100,100,100,0.2)'),
+        yaxis=dict(title="Price per Call (× current)", gridcolor='rgba(100,100,100,0.2)'),
+        height=500
+    )
     
+    return fig
+
+
+def plan_simulators(sim):
+    """A simulator per plan when the cube is sliced by plan, else ``sim`` for everyone."""
+    if not CUBE_PATH or 'plan' not in cube.dimensions:
+        return {"All users": sim}
+    sims = {}
+    for plan in filters.get('plan') or cube.values('plan'):
+        try:
+            sims[plan] = cube.simulator({**filters, 'plan': [plan]})
+        except ValueError:
+            continue  # no users on this plan under the other filters
+    return sims or {"All users": sim}
+
+
+def render_policy_grid(sim, min_limit, max_limit):
+    st.markdown("#### 🧮 Policy Grid: Limit × Price")
+    st.markdown("*Tiered caps per plan, soft caps and price changes, evaluated together*")
+    
+    sims = plan_simulators(sim)
+    col_overage, col_price = st.columns(2)
+    with col_overage:
+        overage_pct = st.number_input(
+            "Calls beyond the cap billed at (% of price)",
+            min_value=0,
+            max_value=100,
+            value=0,
+            step=5,
+            key="policy_overage",
+            help="0% is a hard cap; e.g. 20% models downgrading over-cap calls to a model a fifth of the price"
+        )
+    with col_price:
+        price_range = st.select_slider(
+            "Price per call (× current)",
+            options=[0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0],
+            value=(0.5, 2.0),
+            key="policy_price"
+        )
+    tier_ratios = None
+    if len(sims) > 1:
+        st.caption("Cap per plan, as a multiple of the base limit")
+        tier_cols = st.columns(len(sims))
+        tier_ratios = tuple(
+            (plan, float(col.number_input(plan, min_value=0.0, value=1.0, step=0.5, key=f"policy_tier_{plan}")))
+            for col, plan in zip(tier_cols, sims)
+        )
+    
+    limits = tuple(np.unique(np.rint(np.geomspace(min_limit, max_limit, 100))).tolist())
+    price_factors = tuple(np.linspace(price_range[0], price_range[1], 100).tolist())
+    with profiler.section("policy_grid"):
+        grid = policy_sweep(data_version, sims, limits, price_factors, overage_pct / 100, tier_ratios)
+        fig = build_policy_figure(data_version, grid, overage_pct / 100, tier_ratios)
+    plotly_chart(fig, "policy_grid")
+    
+    # Highest base limit that keeps spend at today's level at the highest price.
+    top_price = grid['price_factor'][-1]
+    within = np.flatnonzero(grid['savings'][-1] >= 0)
+    if len(within):
+        limit = grid['limit'][within[-1]]
+        st.caption(f"At ×{top_price:.2f} price, base limits up to {limit:,.0f} calls keep spend within "
+                   f"today's ${grid['baseline_cost']/1e6:.2f}M, capping "
+                   f"{grid['users_affected'][within[-1]]:,} users ({share(grid['users_affected'][within[-1]], total_users):.1f}%).")
+    else:
+        st.caption(f"At ×{top_price:.2f} price, no base limit in range keeps spend within "
+                   f"today's ${grid['baseline_cost']/1e6:.2f}M.")
+
+
+# The simulator reruns on its own: dragging the slider re-renders only the
+# result cards and the two charts below, not the rest of the page.
+@fragment
+def cost_simulator(sim, min_limit, max_limit, limit_step, x_vals):
     # Input controls
     col_input1, col_input2 = st.columns([2, 1])
     
     with col_input1:
         limit = st.slider(
             "**Set Monthly Call Limit per User**",
-            min_value=100,
-            max_value=10000,
-            value=1500,
-            step=100,
+            min_value=min_limit,
+            max_value=max_limit,
+            value=min(1500, max_limit),
+            step=limit_step,
             help="Drag to set the maximum number of LLM calls allowed per user per month"
         )
     
@@ -639,27 +1240,13 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
     
-    # Interpolate cost at the selected limit
-    thresholds = sorted(cost_data.keys())
+    result = simulate_limit(data_version, sim, limit)
+    cost_at_limit = result.capped_cost
+    users_affected = result.users_affected
     
-    if limit in cost_data:
-        cost_at_limit = cost_data[limit]
-        users_affected = users_affected_data[limit]
-    else:
-        # Linear interpolation
-        lower = max([t for t in thresholds if t <= limit])
-        upper = min([t for t in thresholds if t >= limit])
-        if lower == upper:
-            cost_at_limit = cost_data[lower]
-            users_affected = users_affected_data[lower]
-        else:
-            ratio = (limit - lower) / (upper - lower)
-            cost_at_limit = cost_data[lower] + ratio * (cost_data[upper] - cost_data[lower])
-            users_affected = int(users_affected_data[lower] + ratio * (users_affected_data[upper] - users_affected_data[lower]))
-    
-    savings = total_cost_current - cost_at_limit
-    savings_pct = (savings / total_cost_current) * 100
-    users_affected_pct = (users_affected / total_users) * 100
+    savings = result.savings
+    savings_pct = result.savings_pct
+    users_affected_pct = result.users_affected_pct
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -680,7 +1267,7 @@ with tab3:
         <div style="background: linear-gradient(145deg, rgba(0, 212, 255, 0.2), rgba(0, 212, 255, 0.05)); border: 2px solid rgba(0, 212, 255, 0.5); border-radius: 12px; padding: 1.5rem; text-align: center;">
             <p style="color: #64748b; margin: 0; font-size: 0.8rem;">New Monthly Cost</p>
             <p style="color: #00d4ff; font-size: 2rem; font-weight: bold; margin: 0.3rem 0; font-family: 'JetBrains Mono';">${cost_at_limit/1e6:.2f}M</p>
-            <p style="color: #64748b; margin: 0; font-size: 0.9rem;">vs ${total_cost_current/1e6:.1f}M current</p>
+            <p style="color: #64748b; margin: 0; font-size: 0.9rem;">vs ${sim.total_cost/1e6:.1f}M current</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -713,9 +1300,8 @@ with tab3:
         fig_sim = go.Figure()
         
         # Create data for all thresholds
-        x_vals = sorted(cost_data.keys())
-        y_savings = [(total_cost_current - cost_data[x]) / 1e6 for x in x_vals]
-        y_savings_pct = [(total_cost_current - cost_data[x]) / total_cost_current * 100 for x in x_vals]
+        sweep = simulator_sweep(data_version, sim, tuple(x_vals))
+        y_savings = sweep['savings'] / 1e6
         
         fig_sim.add_trace(go.Scatter(
             x=x_vals,
@@ -764,14 +1350,13 @@ with tab3:
             showlegend=False
         )
         
-        st.plotly_chart(fig_sim, use_container_width=True)
+        plotly_chart(fig_sim, "simulator")
     
     with viz_col2:
         # Users affected chart
         fig_users = go.Figure()
         
-        y_users = [users_affected_data[x] for x in x_vals]
-        y_users_pct = [users_affected_data[x] / total_users * 100 for x in x_vals]
+        y_users_pct = share(sweep['users_affected'], total_users)
         
         fig_users.add_trace(go.Scatter(
             x=x_vals,
@@ -819,204 +1404,256 @@ with tab3:
             showlegend=False
         )
         
-        st.plotly_chart(fig_users, use_container_width=True)
+        plotly_chart(fig_users, "users_affected")
+
+
+def render_simulator_tab():
+    st.markdown("### 💸 Cost Savings Simulator")
+    st.markdown("*Set a monthly call limit to see potential cost savings*")
+    
+    total_cost_current = total_cost
+    
+    if simulator is None:
+        # Pre-computed cost data at various thresholds
+        cost_data = {
+            100: 1548917,
+            250: 2287654,
+            500: 3277752,
+            750: 3745123,
+            1000: 4175017,
+            1250: 4512456,
+            1500: 4807297,
+            1750: 5078234,
+            2000: 5322163,
+            2500: 5756789,
+            3000: 6153044,
+            4000: 6798456,
+            5000: 7351243,
+            7500: 8287654,
+            10000: 9075755,
+        }
+        
+        users_affected_data = {
+            100: 607658,
+            250: 246696,
+            500: 124317,
+            750: 87376,
+            1000: 69568,
+            1250: 59876,
+            1500: 51948,
+            1750: 46789,
+            2000: 42537,
+            2500: 36543,
+            3000: 31713,
+            4000: 25234,
+            5000: 20340,
+            7500: 13456,
+            10000: 9320,
+        }
+        
+        sim = AnchorSimulator(cost_data, users_affected_data, total_cost_current, total_users)
+        min_limit, max_limit, limit_step = 100, 10000, 100
+        x_vals = sorted(cost_data.keys())
+    else:
+        # Exact per-user simulator: any limit, and a dense curve for the charts
+        sim = simulator
+        min_limit, max_limit, limit_step = 1, max(sim.max_calls, 2), 1
+        x_vals = np.unique(np.rint(np.geomspace(1, max_limit, 200)).astype(np.int64))
+    
+    with profiler.section("cost_simulator"):
+        cost_simulator(sim, min_limit, max_limit, limit_step, x_vals)
     
     # Summary table
     st.markdown("#### 📊 Quick Reference: Common Limits")
     
+    ref_limits = list(QUICK_REFERENCE_LIMITS)
+    ref = simulator_sweep(data_version, sim, tuple(ref_limits))
     quick_ref = pd.DataFrame({
-        'Limit': ['500', '1,000', '1,500', '2,000', '3,000', '5,000'],
-        'Monthly Savings': [f"${(total_cost_current - cost_data[500])/1e6:.2f}M", 
-                           f"${(total_cost_current - cost_data[1000])/1e6:.2f}M",
-                           f"${(total_cost_current - cost_data[1500])/1e6:.2f}M",
-                           f"${(total_cost_current - cost_data[2000])/1e6:.2f}M",
-                           f"${(total_cost_current - cost_data[3000])/1e6:.2f}M",
-                           f"${(total_cost_current - cost_data[5000])/1e6:.2f}M"],
-        'Savings %': [f"{(total_cost_current - cost_data[500])/total_cost_current*100:.0f}%",
-                     f"{(total_cost_current - cost_data[1000])/total_cost_current*100:.0f}%",
-                     f"{(total_cost_current - cost_data[1500])/total_cost_current*100:.0f}%",
-                     f"{(total_cost_current - cost_data[2000])/total_cost_current*100:.0f}%",
-                     f"{(total_cost_current - cost_data[3000])/total_cost_current*100:.0f}%",
-                     f"{(total_cost_current - cost_data[5000])/total_cost_current*100:.0f}%"],
-        'Users Affected': [f"{users_affected_data[500]:,} ({users_affected_data[500]/total_users*100:.1f}%)",
-                          f"{users_affected_data[1000]:,} ({users_affected_data[1000]/total_users*100:.1f}%)",
-                          f"{users_affected_data[1500]:,} ({users_affected_data[1500]/total_users*100:.1f}%)",
-                          f"{users_affected_data[2000]:,} ({users_affected_data[2000]/total_users*100:.1f}%)",
-                          f"{users_affected_data[3000]:,} ({users_affected_data[3000]/total_users*100:.1f}%)",
-                          f"{users_affected_data[5000]:,} ({users_affected_data[5000]/total_users*100:.1f}%)"]
+        'Limit': [f"{x:,}" for x in ref_limits],
+        'Monthly Savings': [f"${v/1e6:.2f}M" for v in ref['savings']],
+        'Savings %': [f"{share(v, total_cost_current):.0f}%" for v in ref['savings']],
+        'Users Affected': [f"{u:,} ({share(u, total_users):.1f}%)" for u in ref['users_affected']]
     })
     st.dataframe(quick_ref, hide_index=True, use_container_width=True)
+    
+    render_policy_grid(sim, min_limit, max_limit)
+
+
+@st.cache_resource(show_spinner=False, max_entries=128)
+def users_page(data_version, _backend, min_calls, max_calls, offset, sort):
+    return _backend.users_page(min_calls, max_calls, offset, PAGE_SIZE, sort)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def find_user(data_version, _backend, user_id):
+    return _backend.find_user(user_id)
+
+
+def user_table(rows):
+    return pd.DataFrame({
+        'Rank': [f"{r['rank']:,}" for r in rows],
+        'User ID': [str(r['user_id']) for r in rows],
+        'Calls': [f"{r['calls']:,}" for r in rows],
+        'Cost': [f"${r['cost']:,.2f}" for r in rows],
+        'Cost/Call': [f"${r['cost_per_call']:.4f}" for r in rows],
+    })
+
+
+def render_user_drilldown(buckets):
+    """Paginated users of one bucket, read a page at a time from the backend's sorted index."""
+    if backend is None:
+        return
+    ranges = {f"All P99 ({p99_threshold:,}+ calls)": (p99_threshold, None)}
+    for i, label in enumerate(buckets.labels):
+        ranges[label] = (buckets.edges[i], buckets.edges[i + 1] if i + 1 < len(buckets) else None)
+    sorts = {"calls": "Calls", "cost": "Cost", "cost_per_call": "Cost per call"}
+    
+    st.markdown("#### 🔎 Heaviest Users")
+    col_bucket, col_sort, col_search = st.columns([2, 1, 2])
+    with col_bucket:
+        choice = st.selectbox("Bucket", list(ranges), key="drill_bucket")
+    with col_sort:
+        sort = st.selectbox("Sort by", list(sorts), format_func=sorts.get, key="drill_sort")
+    with col_search:
+        query = st.text_input("Find user id", key="drill_search").strip()
+    
+    if query:
+        with profiler.section("find_user"):
+            found = find_user(data_version, backend, query)
+        if found is None:
+            st.warning(f"No user with id {query!r}.")
+        else:
+            st.caption(f"User {query} ranks #{found['rank']:,} of {total_users:,} by calls.")
+            st.dataframe(user_table([found]), hide_index=True, use_container_width=True)
+    
+    min_calls, max_calls = ranges[choice]
+    with profiler.section("users_page"):
+        first = users_page(data_version, backend, min_calls, max_calls, 0, sort)
+    if first is None:
+        return
+    total = first[0]
+    if not total:
+        st.info("No users in this bucket.")
+        return
+    pages = -(-total // PAGE_SIZE)
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"drill_page:{min_calls}:{max_calls}")
+    offset = (int(page) - 1) * PAGE_SIZE
+    with profiler.section("users_page"):
+        _, rows = users_page(data_version, backend, min_calls, max_calls, offset, sort)
+    st.caption(f"Users {offset + 1:,}-{offset + len(rows):,} of {total:,}, by {sorts[sort].lower()}")
+    st.dataframe(user_table(rows), hide_index=True, use_container_width=True)
+
 
-with tab4:
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_heavy(path, version):
+    from p99.heavy import load_heavy_hitters
+    return load_heavy_hitters(path)
+
+
+# Re-runs on its own while the page is open; without fragments it refreshes
+# with the rest of the page.
+@(st.fragment(run_every=HEAVY_REFRESH_SECONDS) if hasattr(st, "fragment") else fragment)
+def render_live_top_users():
+    st.markdown("#### 📡 Current Top Users")
+    try:
+        summary = load_heavy(HEAVY_PATH, file_version(HEAVY_PATH))
+    except FileNotFoundError:
+        st.info(f"No heavy-hitters summary at {HEAVY_PATH} yet.")
+        return
+    rows = summary.top(20)
+    if not rows:
+        st.info("No call events yet.")
+        return
+    st.caption(f"{summary.events:,} calls streamed • {len(summary):,} users tracked • "
+               f"counts over-estimate by at most {summary.floor:,} calls")
+    st.dataframe(pd.DataFrame({
+        'Rank': [r['rank'] for r in rows],
+        'User ID': [str(r['user_id']) for r in rows],
+        'Calls': [f"{r['calls']:,}" if r['calls'] == r['calls_min'] else f"≤{r['calls']:,} (≥{r['calls_min']:,})"
+                  for r in rows],
+        'Cost': [f"${r['cost']:,.2f}" for r in rows],
+        'Top 20': ["✓" if r['guaranteed'] else "?" for r in rows],
+    }), hide_index=True, use_container_width=True)
+
+
+def render_p99_tab():
     col_left, col_right = st.columns([2, 1])
     
     with col_left:
         # P99 internal distribution
-        df_p99 = pd.DataFrame(p99_distribution)
-        
-        fig2 = make_subplots(
-            rows=1, cols=2,
-            column_widths=[0.6, 0.4],
-            specs=[[{"type": "bar"}, {"type": "pie"}]],
-            subplot_titles=("P99 Users by Call Volume", "Cost Distribution")
-        )
-        
-        # Bar chart for P99 distribution
-        colors_p99 = px.colors.sequential.Oranges[3:][::-1][:11]
-        
-        fig2.add_trace(go.Bar(
-            x=df_p99['bucket'],
-            y=df_p99['user_count'],
-            marker=dict(
-                color=df_p99['user_count'],
-                colorscale='Oranges',
-                line=dict(color='rgba(255,255,255,0.1)', width=1)
-            ),
-            text=[f"{p:.1f}%" for p in df_p99['pct']],
-            textposition='outside',
-            textfont=dict(color='#e2e8f0', size=9),
-            name="Users"
-        ), row=1, col=1)
-        
-        # Pie chart for cost distribution
-        fig2.add_trace(go.Pie(
-            labels=df_p99['bucket'],
-            values=df_p99['total_cost'],
-            hole=0.5,
-            marker=dict(
-                colors=px.colors.sequential.Purples[3:]
-            ),
-            textinfo='percent',
-            textfont=dict(size=10),
-            name="Cost"
-        ), row=1, col=2)
-        
-        fig2.update_layout(
-            title=dict(
-                text="<b>P99 Users Deep Dive: Call Volume & Cost Distribution</b>",
-                font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', family='JetBrains Mono'),
-            height=450,
-            showlegend=False
-        )
+        buckets = bucket_editor("p99_buckets", P99_BUCKETS)
+        if buckets != P99_BUCKETS:
+            with profiler.section("rebucket"):
+                rows = rebucket(data_version, backend, buckets)
+            df_p99 = build_frame(data_version, f"p99_distribution:{buckets.edges}", rows)
+        else:
+            df_p99 = build_frame(data_version, 'p99_distribution', dashboard.p99_distribution)
         
-        fig2.update_xaxes(gridcolor='rgba(100,100,100,0.2)', row=1, col=1)
-        fig2.update_yaxes(gridcolor='rgba(100,100,100,0.2)', row=1, col=1)
+        with profiler.section("build_p99_figure"):
+            fig2 = build_p99_figure(data_version, df_p99, buckets)
         
-        st.plotly_chart(fig2, use_container_width=True)
+        plotly_chart(fig2, "p99")
     
     with col_right:
-        st.markdown("""
+        st.markdown(f"""
         <div class="insight-box">
             <h4 style="color: #f97316; margin-top: 0;">🎯 P99 Profile</h4>
             <p style="color: #e2e8f0;">
-                <b>Threshold:</b> 4,959+ LLM calls<br>
-                <b>Count:</b> 20,575 users<br>
-                <b>Max:</b> 225,066 calls<br>
-                <b>Total Cost:</b> $7.2M
+                <b>Threshold:</b> {p99_threshold:,}+ LLM calls<br>
+                <b>Count:</b> {p99_user_count:,} users<br>
+                <b>Max:</b> {max_calls:,} calls<br>
+                <b>Total Cost:</b> ${p99_total_cost/1e6:.1f}M
             </p>
         </div>
         """, unsafe_allow_html=True)
         
         # P99 internal percentiles
         st.markdown("#### Within P99 Users")
-        p99_internal = pd.DataFrame({
-            'Metric': ['Minimum', 'P25', 'Median', 'P75', 'P90', 'Maximum'],
-            'Calls': ['4,937', '6,552', '9,272', '15,244', '26,294', '225,066']
+        df_p99_internal = pd.DataFrame({
+            'Metric': dashboard.p99_internal['Metric'],
+            'Calls': [f"{c:,}" for c in dashboard.p99_internal['Calls']]
         })
-        st.dataframe(p99_internal, hide_index=True, use_container_width=True)
+        st.dataframe(df_p99_internal, hide_index=True, use_container_width=True)
         
-        st.markdown("""
+        top_bucket = df_p99.loc[df_p99['total_cost'].idxmax()]
+        st.markdown(f"""
         <div style="background: rgba(16, 185, 129, 0.1); border: 1px solid rgba(16, 185, 129, 0.3); border-radius: 8px; padding: 1rem; margin-top: 1rem;">
             <p style="color: #10b981; margin: 0; font-size: 0.9rem;">
-                <b>💰 Top 30K-50K bucket</b> generates the most cost ($1.2M) despite having only 1,100 users
+                <b>💰 Top {top_bucket['bucket']} bucket</b> generates the most cost (${top_bucket['total_cost']/1e6:.1f}M) with only {top_bucket['user_count']:,} users
             </p>
         </div>
         """, unsafe_allow_html=True)
+    
+    if HEAVY_PATH:
+        col_drill, col_live = st.columns([3, 2])
+        with col_drill:
+            render_user_drilldown(buckets)
+        with col_live:
+            render_live_top_users()
+    else:
+        render_user_drilldown(buckets)
+
 
-with tab5:
+def render_cdf_tab():
     col_left, col_right = st.columns([2, 1])
     
     with col_left:
         # Cumulative distribution chart
-        df_pct = pd.DataFrame(percentile_data)
-        
-        fig3 = go.Figure()
-        
-        # Add cumulative line
-        fig3.add_trace(go.Scatter(
-            x=df_pct['percentile'],
-            y=df_pct['llm_calls'],
-            mode='lines+markers',
-            line=dict(color='#00d4ff', width=3),
-            marker=dict(size=8, color='#00d4ff', line=dict(color='white', width=2)),
-            fill='tozeroy',
-            fillcolor='rgba(0, 212, 255, 0.1)',
-            name='LLM Calls',
-            hovertemplate="P%{x}: %{y:,.0f} calls<extra></extra>"
-        ))
-        
-        # Add P99 marker
-        fig3.add_trace(go.Scatter(
-            x=[99],
-            y=[4864],
-            mode='markers+text',
-            marker=dict(size=16, color='#f97316', symbol='star'),
-            text=['P99'],
-            textposition='top center',
-            textfont=dict(color='#f97316', size=12),
-            name='P99 Threshold',
-            hovertemplate="<b>P99</b><br>Threshold: 4,864 calls<extra></extra>"
-        ))
-        
-        # Add annotations for key percentiles
-        key_points = [
-            (50, 59, "P50: 59"),
-            (90, 301, "P90: 301"),
-            (95, 626, "P95: 626"),
-        ]
-        
-        for x, y, text in key_points:
-            fig3.add_annotation(
-                x=x, y=y,
-                text=text,
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor='#64748b',
-                font=dict(color='#e2e8f0', size=10),
-                ax=0, ay=-30
+        df_pct = build_frame(data_version, 'percentiles', dashboard.percentile_data)
+        pct_range = (0, 100)
+        if backend is not None:
+            pct_range = st.select_slider(
+                "Zoom: percentile range",
+                options=[0, 10, 25, 50, 75, 90, 95, 99, 99.9, 99.99, 100],
+                value=(0, 100),
+                key="cdf_zoom",
+                help="The exact CDF is re-sampled for the selected range"
             )
+        with profiler.section("build_cdf_figure"):
+            fig3 = build_cdf_figure(data_version, df_pct, dashboard, backend, tuple(pct_range))
         
-        fig3.update_layout(
-            title=dict(
-                text="<b>Cumulative Distribution Function (CDF)</b>",
-                font=dict(size=18, color='#e2e8f0', family='Space Grotesk')
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', family='JetBrains Mono'),
-            xaxis=dict(
-                title="Percentile",
-                gridcolor='rgba(100,100,100,0.2)',
-                dtick=10,
-                range=[0, 102]
-            ),
-            yaxis=dict(
-                title="LLM Calls",
-                gridcolor='rgba(100,100,100,0.2)',
-                type='log',
-                range=[0, 5.5]
-            ),
-            height=450,
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig3, use_container_width=True)
+        plotly_chart(fig3, "cdf")
     
     with col_right:
         st.markdown("""
@@ -1033,22 +1670,194 @@ with tab5:
         </div>
         """, unsafe_allow_html=True)
         
+        if dashboard.sketch is not None:
+            st.markdown("#### Percentile Lookup")
+            lookup_p = st.number_input(
+                "Any percentile",
+                min_value=0.0,
+                max_value=100.0,
+                value=99.99,
+                step=0.01,
+                format="%.2f",
+                help="Answered from a streaming quantile sketch (within 0.5% of the true value)"
+            )
+            st.markdown(f"**P{lookup_p:g}** ≈ {dashboard.sketch.percentile(lookup_p):,.0f} calls")
+        
         # Ratio comparison
         st.markdown("#### Percentile Ratios")
+        p50, p99 = (dashboard.percentile(p) for p in (50, 99))
+        ratio_rows = percentile_ratios(dashboard)
         ratios = pd.DataFrame({
-            'Comparison': ['P99 vs Median', 'P99 vs P90', 'Max vs P99', 'P99.9 vs P99'],
-            'Ratio': ['83x', '16x', '46x', '5x']
+            'Comparison': [r['comparison'] for r in ratio_rows],
+            'Ratio': [f"{r['ratio']:.0f}x" if r['ratio'] is not None else "n/a" for r in ratio_rows]
         })
+        vs_median = ratio_rows[0]['ratio']  # P99 vs Median, None when the median user makes no calls
         st.dataframe(ratios, hide_index=True, use_container_width=True)
         
-        st.markdown("""
+        st.markdown(f"""
         <div style="background: rgba(236, 72, 153, 0.1); border: 1px solid rgba(236, 72, 153, 0.3); border-radius: 8px; padding: 1rem; margin-top: 1rem;">
             <p style="color: #ec4899; margin: 0; font-size: 0.9rem;">
-                <b>⚡ P99 users make 83x more LLM calls</b> than the median user (4,959 vs 59)
+                <b>⚡ P99 users make {f'{vs_median:.0f}x' if vs_median is not None else 'n/a'} more LLM calls</b> than the median user ({p99:,} vs {p50:,})
             </p>
         </div>
         """, unsafe_allow_html=True)
 
+
+def render_trend_tab():
+    store = open_trend(TREND_PATH)
+    version = store.version()
+    
+    col_left, col_right = st.columns([3, 1])
+    
+    with col_right:
+        choice = st.radio("Window", [*WINDOWS, "Custom"], key="trend_window",
+                          help="Each point covers the window of days ending on that date")
+        if choice == "Custom":
+            days = int(st.number_input("Days", min_value=1, max_value=365, value=14, step=1, key="trend_days"))
+        else:
+            days = WINDOWS[choice]
+    
+    with profiler.section("trend_series"):
+        rows = trend_series(version, store, days)
+    if not rows:
+        with col_left:
+            st.info(f"No complete {days}-day windows in {TREND_PATH} yet.")
+        return
+    df_trend = build_frame(version, f"trend:{days}", rows)
+    
+    with col_left:
+        with profiler.section("build_trend_figure"):
+            fig = build_trend_figure(version, df_trend, days)
+        
+        plotly_chart(fig, "trend")
+    
+    with col_right:
+        last = rows[-1]
+        st.markdown(f"""
+        <div class="insight-box">
+            <h4 style="color: #f97316; margin-top: 0;">📅 {last['date']}</h4>
+            <p style="color: #e2e8f0;">
+                <b>P99:</b> {last['p99']:,} calls<br>
+                <b>P99 users:</b> {last['p99_users']:,}<br>
+                <b>P99 cost share:</b> {last['p99_cost_share']:.1f}%<br>
+                <b>User-days:</b> {last['user_days']:,}
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+        st.caption("Windows merge per-day summaries, so percentiles are over user-days: "
+                   "a user active on 5 of 7 days counts 5 times, once per day.")
+
+
+profiler.mark("header & metric cards")
+
+# =============================================================================
+# Header
+# =============================================================================
+
+st.markdown('<h1 class="main-header">P99 Distribution Analysis</h1>', unsafe_allow_html=True)
+st.markdown('<p class="sub-header">LLM Calls per User • Top 1% Heavy Users Analysis</p>', unsafe_allow_html=True)
+if selection:
+    st.caption(f"🧊 Filtered: {selection}")
+
+# =============================================================================
+# Key Metrics Row
+# =============================================================================
+
+col1, col2, col3, col4, col5 = st.columns(5)
+
+with col1:
+    st.markdown(f"""
+    <div class="metric-card">
+        <p class="metric-value">{total_users/1e6:.2f}M</p>
+        <p class="metric-label">Total Users</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col2:
+    st.markdown(f"""
+    <div class="metric-card">
+        <p class="metric-value" style="color: #f97316;">${avg_cost_per_call:.3f}</p>
+        <p class="metric-label">Avg Cost/Call</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col3:
+    st.markdown(f"""
+    <div class="metric-card">
+        <p class="metric-value" style="color: #a855f7;">${total_cost/1e6:.1f}M</p>
+        <p class="metric-label">Total LLM Cost</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col4:
+    st.markdown(f"""
+    <div class="metric-card">
+        <p class="metric-value" style="color: #ec4899;">{median_calls:,}</p>
+        <p class="metric-label">Median Calls</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col5:
+    st.markdown(f"""
+    <div class="metric-card">
+        <p class="metric-value" style="color: #10b981;">{max_calls/1e3:.0f}K</p>
+        <p class="metric-label">Max Calls</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+st.markdown("<br>", unsafe_allow_html=True)
+
+profiler.mark("tabs")
+
+# =============================================================================
+# Main Charts
+# =============================================================================
+
+tab_names = ["📈 Distribution Overview", "💰 Calls vs Cost", "💸 Cost Simulator", "🔥 P99 Deep Dive", "📊 Cumulative Distribution"]
+if TREND_PATH:
+    tab_names.append("📅 Trend")
+tab1, tab2, tab3, tab4, tab5, *tab_extra = st.tabs(tab_names)
+
+# Each tab renders as soon as the datasets it needs have arrived, in whatever
+# order the backend answers; the snapshot has everything up front.
+tab_renderers = [
+    (tab1, render_distribution_tab, ('distribution',)),
+    (tab2, render_pareto_tab, ('distribution', 'lorenz')),
+    (tab3, render_simulator_tab, ('simulator',)),
+    (tab4, render_p99_tab, ('p99_distribution',)),
+    # The exact CDF reads the simulator's sorted calls.
+    (tab5, render_cdf_tab, ('sketch', 'simulator')),
+]
+if TREND_PATH:
+    # Reads its own per-day store, not the fanout.
+    tab_renderers.append((tab_extra[0], render_trend_tab, ()))
+pending = []
+for tab, render, needs in tab_renderers:
+    with tab:
+        pending.append((tab, render, needs, st.empty()))
+        if fanout is not None:
+            pending[-1][3].info("Loading...")
+
+while pending:
+    if fanout is not None and not any(fanout.ready(needs) for _, _, needs, _ in pending):
+        fanout.wait_any({n for _, _, needs, _ in pending for n in needs})
+    for item in list(pending):
+        tab, render, needs, loading = item
+        if fanout is not None and not fanout.ready(needs):
+            continue
+        if fanout is not None:
+            dashboard = wait_for(needs)
+            simulator = fanout.result('simulator') if fanout.ready(('simulator',)) else None
+        loading.empty()
+        started = time.perf_counter()
+        with tab, profiler.section(render.__name__):
+            render()
+        # Per-tab render time of this run, read by benchmarks/bench_app.py.
+        st.session_state.setdefault('render_seconds', {})[render.__name__] = time.perf_counter() - started
+        pending.remove(item)
+
+profiler.mark("footer")
+
 # =============================================================================
 # Footer
 # =============================================================================
@@ -1058,10 +1867,10 @@ st.markdown("<br><hr style='border-color: rgba(100,100,100,0.3);'>", unsafe_allo
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    st.markdown("""
+    st.markdown(f"""
     <div style="text-align: center; color: #64748b; font-size: 0.8rem;">
         <b>Data Source:</b> Langfuse Traces<br>
-        <b>Total Users:</b> 2,057,721
+        <b>Total Users:</b> {total_users:,}
     </div>
     """, unsafe_allow_html=True)
 
@@ -1074,10 +1883,27 @@ with col2:
     """, unsafe_allow_html=True)
 
 with col3:
-    st.markdown("""
+    st.markdown(f"""
     <div style="text-align: center; color: #64748b; font-size: 0.8rem;">
-        <b>P99 Threshold:</b> 4,996 calls<br>
-        <b>Total Cost:</b> $12.1M
+        <b>P99 Threshold:</b> {p99_threshold:,} calls<br>
+        <b>Total Cost:</b> ${total_cost/1e6:.1f}M
     </div>
     """, unsafe_allow_html=True)
 
+profiler.stop()
+if profiler.enabled:
+    with st.sidebar:
+        st.markdown("### ⏱️ Profile")
+        st.caption(f"Full run: {profiler.total_seconds * 1000:,.0f} ms"
+                   + (" (allocations traced)" if profiler.trace_allocations else ""))
+        st.dataframe(pd.DataFrame(profiler.rows()), hide_index=True, use_container_width=True)
+        if profiler.payloads:
+            st.markdown("**Figure payloads**")
+            st.dataframe(pd.DataFrame({
+                'figure': list(profiler.payloads),
+                'kb': [round(n / 1024, 1) for n in profiler.payloads.values()],
+            }), hide_index=True, use_container_width=True)
+        if profiler.stats_path:
+            st.caption(f"cProfile stats: `{profiler.stats_path}`")
+            with st.expander("Top functions"):
+                st.code(profiler.top_functions())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard end to end at several user counts
+
+Writes a calibrated synthetic per-user snapshot per size, then drives
+app.py headlessly with Streamlit's AppTest in a fresh process per size,
+measuring first render, per-tab render time, Cost Simulator slider rerun
+latency, peak RSS and the size of every Plotly figure sent to the browser.
+
+    python benchmarks/bench_app.py --users 2000000 20000000 200000000 --out bench_app.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from p99.snapshot import is_snapshot, read_meta  # noqa: E402
+from p99.synthetic import write_snapshot as write_synthetic_snapshot  # noqa: E402
+
+
+def generate_snapshot(path, users, seed=0):
+    """Synthetic users calibrated to the reference tables, streamed to a snapshot."""
+    path = Path(path)
+    if not (is_snapshot(path) and read_meta(path)['users'] == users):
+        write_synthetic_snapshot(path, users, seed=seed)
+    return path
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def figure_payloads(at):
+    return [len(chart.proto.spec) for chart in at.get("plotly_chart")]
+
+
+def run_app(snapshot, slider_steps, timeout):
+    """One measurement in this process: cold first render, warm render, slider reruns."""
+    os.environ["P99_DATA_PATH"] = str(snapshot)
+    os.environ.pop("P99_BACKEND_URL", None)
+    from streamlit.testing.v1 import AppTest
+
+    t = time.perf_counter()
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout).run()
+    first_render_s = time.perf_counter() - t
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    tab_seconds = dict(at.session_state["render_seconds"])
+    payloads = figure_payloads(at)
+
+    # A second session in the same process hits the shared caches.
+    t = time.perf_counter()
+    warm = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout).run()
+    warm_render_s = time.perf_counter() - t
+    warm_tab_seconds = dict(warm.session_state["render_seconds"])
+
+    slider = at.slider[0]
+    lo, hi = max(int(slider.min), 1), int(slider.max)
+    values = np.unique(np.rint(np.geomspace(lo, hi, slider_steps)).astype(int))
+    rerun_ms = []
+    for value in values:
+        t = time.perf_counter()
+        at.slider[0].set_value(int(value)).run()
+        rerun_ms.append((time.perf_counter() - t) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    return {
+        "first_render_s": round(first_render_s, 3),
+        "warm_render_s": round(warm_render_s, 3),
+        "tab_render_s": {k: round(v, 4) for k, v in tab_seconds.items()},
+        "warm_tab_render_s": {k: round(v, 4) for k, v in warm_tab_seconds.items()},
+        "slider_rerun_ms": {
+            "median": round(statistics.median(rerun_ms), 1),
+            "p95": round(float(np.percentile(rerun_ms, 95)), 1),
+            "max": round(max(rerun_ms), 1),
+            "samples": len(rerun_ms),
+        },
+        "figure_payload_bytes": {"total": sum(payloads), "max": max(payloads, default=0),
+                                 "per_figure": payloads},
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import streamlit
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "streamlit": streamlit.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[2_000_000, 20_000_000, 200_000_000])
+    parser.add_argument("--data-dir", default="/tmp/p99-bench", help="reuse/generate snapshots here")
+    parser.add_argument("--slider-steps", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=1800, help="AppTest timeout per run (s)")
+    parser.add_argument("--out", default=None, help="write JSON results to this file")
+    parser.add_argument("--run", help=argparse.SUPPRESS)  # worker mode: measure one snapshot
+    args = parser.parse_args()
+
+    if args.run:
+        json.dump(run_app(args.run, args.slider_steps, args.timeout), sys.stdout)
+        return
+
+    results = []
+    for users in args.users:
+        t = time.perf_counter()
+        snapshot = generate_snapshot(Path(args.data_dir) / f"users-{users}.p99snap", users, seed=args.seed)
+        print(f"{users:,} users ready in {time.perf_counter() - t:.1f}s: {snapshot}", file=sys.stderr)
+        # A fresh interpreter per size, so imports, caches and peak RSS start cold.
+        proc = subprocess.run(
+            [sys.executable, __file__, "--run", str(snapshot), "--slider-steps", str(args.slider_steps),
+             "--timeout", str(args.timeout)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            result = {"users": users, "error": proc.stderr.strip().splitlines()[-1:]}
+        else:
+            result = {"users": users, **json.loads(proc.stdout)}
+        results.append(result)
+        print(json.dumps(result))
+
+    report = {"environment": environment(), "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel call-log ingestion at several worker counts
+
+Generates a synthetic, partitioned call log (one Parquet row per LLM call)
+once, then times p99.parallel.ingest_call_logs and aggregate_call_logs.
+
+    python benchmarks/bench_parallel_ingest.py --events 500000000 --workers 1 4 16
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from p99.data import COST, USER_ID  # noqa: E402
+from p99.parallel import aggregate_call_logs, ingest_call_logs  # noqa: E402
+
+
+def generate_call_log(out_dir, events, users, partitions, seed=0):
+    """Write ``partitions`` Parquet files with heavy-tailed calls per user."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = [out_dir / f"part-{i:05d}.parquet" for i in range(partitions)]
+    if all(p.exists() for p in paths):
+        return paths
+    rng = np.random.default_rng(seed)
+    # Per-user call weights from a lognormal, like the real monthly distribution.
+    weights = rng.lognormal(4.0, 1.6, users)
+    cdf = np.cumsum(weights / weights.sum())
+    per_part = np.full(partitions, events // partitions)
+    per_part[: events % partitions] += 1
+    for path, n in zip(paths, per_part):
+        ids = np.searchsorted(cdf, rng.random(n)).astype(np.int64)
+        cost = rng.gamma(2.0, 0.01, n).astype(np.float32)
+        pd.DataFrame({USER_ID: ids, COST: cost}).to_parquet(path, index=False)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500_000_000)
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--partitions", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--data-dir", default=None, help="reuse/generate the call log here")
+    parser.add_argument("--out", default=None, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or os.path.join("/tmp", f"p99-calllog-{args.events}-{args.partitions}")
+    t = time.perf_counter()
+    paths = generate_call_log(data_dir, args.events, args.users, args.partitions)
+    print(f"call log ready in {time.perf_counter() - t:.1f}s: {data_dir}", file=sys.stderr)
+
+    results = []
+    for workers in args.workers:
+        t = time.perf_counter()
+        users = ingest_call_logs(paths, workers=workers)
+        ingest_s = time.perf_counter() - t
+
+        t = time.perf_counter()
+        agg = aggregate_call_logs(paths, workers=workers)
+        aggregate_s = time.perf_counter() - t
+
+        assert int(users.calls.sum()) == agg.total_calls == args.events
+        results.append({
+            "workers": workers,
+            "events": args.events,
+            "partitions": args.partitions,
+            "users": len(users),
+            "ingest_s": round(ingest_s, 3),
+            "aggregate_s": round(aggregate_s, 3),
+            "events_per_s": round(args.events / ingest_s),
+        })
+        print(json.dumps(results[-1]))
+
+    base = results[0]["ingest_s"] * results[0]["workers"]
+    for r in results:
+        r["speedup_vs_first"] = round(results[0]["ingest_s"] / r["ingest_s"], 2)
+        r["parallel_efficiency"] = round(base / (r["ingest_s"] * r["workers"]), 2)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Import-time / cold-start report for the dashboard, checked against a budget.
+
+Each target runs in a fresh interpreter under ``-X importtime``; the
+per-module timings, total import time and wall time are compared with
+``import_budget.json``. Exits non-zero if any target is over budget or
+imports a module it must not load.
+
+    python benchmarks/import_budget.py --out import_report.json
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET = Path(__file__).resolve().parent / "import_budget.json"
+
+IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def app_import_code():
+    """The module-level import statements of app.py, i.e. what every new
+    process pays before anything is on screen."""
+    tree = ast.parse((ROOT / "app.py").read_text())
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def targets():
+    return {
+        # Imports app.py does up front; plotly and pandas must wait for a tab.
+        "app-imports": ["-c", app_import_code()],
+        # The whole script in Streamlit bare mode: imports, data and every tab.
+        "app-cold-start": [str(ROOT / "app.py")],
+        # Headless report entry point.
+        "p99-cli": ["-m", "p99", "--help"],
+    }
+
+
+def parse_importtime(stderr):
+    modules = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            modules.append({
+                'module': name,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                'top_level': len(indent) == 0,
+            })
+    return modules
+
+
+def measure(args, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{args} failed:\n{proc.stderr[-2000:]}")
+    return wall_ms, parse_importtime(proc.stderr)
+
+
+def check(name, args, budget, repeat, env, top):
+    runs = [measure(args, env) for _ in range(repeat)]
+    wall_ms, modules = min(runs, key=lambda run: run[0])
+    import_ms = sum(m['cumulative_ms'] for m in modules if m['top_level'])
+    loaded = {m['module'] for m in modules}
+    forbidden = sorted(mod for mod in budget.get('forbid', ()) if mod in loaded)
+    failures = []
+    if 'max_import_ms' in budget and import_ms > budget['max_import_ms']:
+        failures.append(f"import time {import_ms:.0f}ms > {budget['max_import_ms']}ms")
+    if 'max_wall_ms' in budget and wall_ms > budget['max_wall_ms']:
+        failures.append(f"wall time {wall_ms:.0f}ms > {budget['max_wall_ms']}ms")
+    if forbidden:
+        failures.append(f"imports {', '.join(forbidden)}")
+    return {
+        'target': name,
+        'wall_ms': round(wall_ms, 1),
+        'import_ms': round(import_ms, 1),
+        'modules': len(modules),
+        'budget': budget,
+        'ok': not failures,
+        'failures': failures,
+        'slowest_top_level': [
+            {k: m[k] for k in ('module', 'cumulative_ms')}
+            for m in sorted((m for m in modules if m['top_level']),
+                            key=lambda m: m['cumulative_ms'], reverse=True)[:top]
+        ],
+        'slowest_self': [
+            {k: m[k] for k in ('module', 'self_ms')}
+            for m in sorted(modules, key=lambda m: m['self_ms'], reverse=True)[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET))
+    parser.add_argument("--targets", nargs="+", help="Subset of targets to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per target")
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    with open(args.budget) as f:
+        budgets = json.load(f)
+    # Cold start is measured against the pasted snapshot, not a data file.
+    env = {k: v for k, v in os.environ.items() if k not in ("P99_DATA_PATH", "P99_BACKEND_URL")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+
+    results = []
+    for name, cmd in targets().items():
+        if args.targets and name not in args.targets:
+            continue
+        result = check(name, cmd, budgets.get(name, {}), args.repeat, env, args.top)
+        results.append(result)
+        status = "ok" if result['ok'] else "OVER BUDGET: " + "; ".join(result['failures'])
+        print(f"{name:16s} wall {result['wall_ms']:7.0f}ms  imports {result['import_ms']:7.0f}ms  {status}")
+        for m in result['slowest_top_level'][:5]:
+            print(f"{'':18s}{m['cumulative_ms']:8.1f}ms  {m['module']}")
+
+    report = {'python': sys.version.split()[0], 'budget_file': args.budget, 'results': results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Computation engine behind the P99 distribution dashboard
+"""
+
+import importlib
+
+# Submodules are imported on first attribute access, so e.g. the dashboard
+# only pays for pandas, multiprocessing or SQL drivers once a tab needs them.
+_EXPORTS = {
+    "PartialAggregate": "aggregate",
+    "load_aggregates": "aggregate",
+    "merge_all": "aggregate",
+    "save_aggregate": "aggregate",
+    "Backend": "backends",
+    "DuckDBBackend": "backends",
+    "InMemoryBackend": "backends",
+    "SQLiteBackend": "backends",
+    "TrinoBackend": "backends",
+    "calls_cost_density": "binning",
+    "density_grid": "binning",
+    "sorted_curve": "binning",
+    "DISTRIBUTION_BUCKETS": "buckets",
+    "P99_BUCKETS": "buckets",
+    "Buckets": "buckets",
+    "bucket_table": "buckets",
+    "equal_population_buckets": "buckets",
+    "log_spaced_buckets": "buckets",
+    "parse_edges": "buckets",
+    "CallLogAccumulator": "calllog",
+    "read_call_logs": "calllog",
+    "CostCube": "cube",
+    "load_cube": "cube",
+    "UserData": "data",
+    "file_version": "data",
+    "iter_chunks": "data",
+    "iter_jsonl_batches": "data",
+    "load_users": "data",
+    "UserIndex": "drilldown",
+    "DashboardFanout": "fanout",
+    "SpaceSaving": "heavy",
+    "load_heavy_hitters": "heavy",
+    "IncrementalState": "incremental",
+    "LorenzCurve": "lorenz",
+    "lttb": "lorenz",
+    "PERCENTILES": "metrics",
+    "Dashboard": "metrics",
+    "compute_dashboard": "metrics",
+    "aggregate_call_logs": "parallel",
+    "ingest_call_logs": "parallel",
+    "Profiler": "profiling",
+    "build_report": "report",
+    "write_report": "report",
+    "AnchorSimulator": "simulator",
+    "CostSimulator": "simulator",
+    "SimulationResult": "simulator",
+    "policy_grid": "simulator",
+    "QuantileSketch": "sketch",
+    "sketch_file": "sketch",
+    "SnapshotWriter": "snapshot",
+    "open_snapshot": "snapshot",
+    "write_snapshot": "snapshot",
+    "Calibration": "synthetic",
+    "generate_users": "synthetic",
+    "iter_users": "synthetic",
+    "TrendStore": "trend",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
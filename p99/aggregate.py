@@ -0,0 +1,228 @@
+"""
+Mergeable partial aggregates behind the dashboard tables
+"""
+
+import json
+from functools import reduce
+
+import numpy as np
+
+from .buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS, Buckets, bucket_rows, bucket_totals
+from .metrics import P99_INTERNAL, PERCENTILES, Dashboard, nearest_rank
+from .sketch import QuantileSketch
+
+TAIL_SIZE = 65536
+
+
+class PartialAggregate:
+    """Bucket histograms, a quantile sketch, sums and the heaviest users.
+
+    Partials must cover disjoint sets of users (e.g. one per user-id hash
+    shard or per worker), since every statistic is over per-user totals.
+    ``merge`` is associative and commutative, so partials can be combined in
+    any order or tree shape.
+
+    The ``tail_size`` heaviest users are kept exactly. As long as that covers
+    the top 1% the P99 threshold, count, cost and internal percentiles are
+    exact; beyond that they fall back to the sketch and histograms.
+    """
+
+    def __init__(self, distribution_buckets=DISTRIBUTION_BUCKETS, p99_buckets=P99_BUCKETS,
+                 tail_size=TAIL_SIZE, relative_accuracy=0.005):
+        self.distribution_buckets = distribution_buckets
+        self.p99_buckets = p99_buckets
+        self.tail_size = tail_size
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.dist = np.zeros((3, len(distribution_buckets)))  # users, calls, cost
+        self.p99 = np.zeros((3, len(p99_buckets)))
+        self.count = 0
+        self.total_calls = 0
+        self.total_cost = 0.0
+        self.tail_calls = np.zeros(0, dtype=np.int64)
+        self.tail_cost = np.zeros(0)
+
+    @classmethod
+    def from_users(cls, users, **kwargs):
+        return cls(**kwargs).update(users.calls, users.cost)
+
+    def _empty_like(self):
+        return PartialAggregate(self.distribution_buckets, self.p99_buckets,
+                                self.tail_size, self.sketch.relative_accuracy)
+
+    def _keep_tail(self, calls, cost):
+        if len(calls) > self.tail_size:
+            top = np.argpartition(calls, len(calls) - self.tail_size)[-self.tail_size:]
+            calls, cost = calls[top], cost[top]
+        self.tail_calls, self.tail_cost = calls, cost
+
+    def update(self, calls, cost):
+        """Fold in a chunk of per-user totals for users not seen before."""
+        calls = np.asarray(calls, dtype=np.int64)
+        cost = np.asarray(cost, dtype=np.float64)
+        self.dist += np.vstack(bucket_totals(calls, cost, self.distribution_buckets))
+        self.p99 += np.vstack(bucket_totals(calls, cost, self.p99_buckets))
+        self.sketch.update(calls)
+        self.count += len(calls)
+        self.total_calls += int(calls.sum())
+        self.total_cost += float(cost.sum())
+        self._keep_tail(np.concatenate([self.tail_calls, calls]),
+                        np.concatenate([self.tail_cost, cost]))
+        return self
+
+    def merge(self, other):
+        """Return a new aggregate over the users of both partials."""
+        if (self.distribution_buckets != other.distribution_buckets
+                or self.p99_buckets != other.p99_buckets):
+            raise ValueError("Cannot merge aggregates with different bucket edges")
+        merged = self._empty_like()
+        merged.tail_size = min(self.tail_size, other.tail_size)
+        merged.sketch = self.sketch.merge(other.sketch)
+        merged.dist = self.dist + other.dist
+        merged.p99 = self.p99 + other.p99
+        merged.count = self.count + other.count
+        merged.total_calls = self.total_calls + other.total_calls
+        merged.total_cost = self.total_cost + other.total_cost
+        merged._keep_tail(np.concatenate([self.tail_calls, other.tail_calls]),
+                          np.concatenate([self.tail_cost, other.tail_cost]))
+        return merged
+
+    __add__ = merge
+
+    # -------------------------------------------------------------------------
+    # Serialization
+    # -------------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'distribution_buckets': {'edges': list(self.distribution_buckets.edges),
+                                     'labels': list(self.distribution_buckets.labels)},
+            'p99_buckets': {'edges': list(self.p99_buckets.edges),
+                            'labels': list(self.p99_buckets.labels)},
+            'tail_size': self.tail_size,
+            'sketch': self.sketch.to_dict(),
+            'dist': self.dist.tolist(),
+            'p99': self.p99.tolist(),
+            'count': self.count,
+            'total_calls': self.total_calls,
+            'total_cost': self.total_cost,
+            'tail_calls': self.tail_calls.tolist(),
+            'tail_cost': self.tail_cost.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        agg = cls(
+            distribution_buckets=Buckets(tuple(d['distribution_buckets']['edges']),
+                                         tuple(d['distribution_buckets']['labels'])),
+            p99_buckets=Buckets(tuple(d['p99_buckets']['edges']), tuple(d['p99_buckets']['labels'])),
+            tail_size=d['tail_size'],
+        )
+        agg.sketch = QuantileSketch.from_dict(d['sketch'])
+        agg.dist = np.asarray(d['dist'], dtype=np.float64)
+        agg.p99 = np.asarray(d['p99'], dtype=np.float64)
+        agg.count = d['count']
+        agg.total_calls = d['total_calls']
+        agg.total_cost = d['total_cost']
+        agg.tail_calls = np.asarray(d['tail_calls'], dtype=np.int64)
+        agg.tail_cost = np.asarray(d['tail_cost'], dtype=np.float64)
+        return agg
+
+    def dumps(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def loads(cls, s):
+        return cls.from_dict(json.loads(s))
+
+    # -------------------------------------------------------------------------
+    # Dashboard
+    # -------------------------------------------------------------------------
+
+    def percentiles(self, percentiles):
+        """Percentiles of per-user calls: exact inside the tail, sketched below it."""
+        ranks = nearest_rank(self.count, percentiles)
+        from_top = self.count - 1 - ranks
+        tail = np.sort(self.tail_calls)[::-1]
+        values = np.asarray(self.sketch.percentile(list(percentiles)), dtype=np.float64)
+        exact = from_top < len(tail)
+        values[exact] = tail[from_top[exact]]
+        return np.rint(values).astype(np.int64)
+
+    def _p99_population(self, p99_threshold):
+        """Count, calls, cost and sorted calls of users at or above the threshold."""
+        in_tail = self.tail_calls >= p99_threshold
+        tail_complete = len(self.tail_calls) == self.count or not in_tail.all()
+        if tail_complete:
+            calls = np.sort(self.tail_calls[in_tail])
+            return len(calls), int(calls.sum()), float(self.tail_cost[in_tail].sum()), calls
+
+        # The tail is too short: estimate from the histogram, taking a
+        # user-proportional share of the bucket that holds the threshold.
+        _, call_sums, cost_sums = self.dist
+        b = int(self.distribution_buckets.assign(p99_threshold))
+        edges = self.distribution_buckets.edges
+        share = np.zeros(len(edges))
+        share[b + 1:] = 1
+        if b >= 0:
+            upper = edges[b + 1] if b + 1 < len(edges) else self.sketch.max + 1
+            share[b] = max(0.0, (upper - p99_threshold) / (upper - edges[b]))
+        count = self.count - self.sketch.rank(p99_threshold)
+        return count, int(share @ call_sums), float(share @ cost_sums), None
+
+    def to_dashboard(self, percentiles=PERCENTILES):
+        """Build the dashboard tables and KPIs from this aggregate."""
+        if self.count == 0:
+            raise ValueError("No users to summarize")
+        percentiles = tuple(sorted(set(percentiles) | {50, 99}))
+        pct_values = self.percentiles(percentiles)
+        p99_threshold = int(pct_values[percentiles.index(99)])
+        p99_count, p99_total_calls, p99_total_cost, p99_calls = self._p99_population(p99_threshold)
+
+        internal_pcts = [p for _, p in P99_INTERNAL]
+        if p99_calls is not None:
+            internal = p99_calls[nearest_rank(len(p99_calls), internal_pcts)]
+        else:
+            internal = self.percentiles([99 + p / 100 for p in internal_pcts])
+
+        stats = {
+            'total_users': self.count,
+            'p99_threshold': p99_threshold,
+            'p99_user_count': int(p99_count),
+            'avg_calls': int(round(self.total_calls / self.count)),
+            'median_calls': int(pct_values[percentiles.index(50)]),
+            'max_calls': int(self.tail_calls.max()),
+            'total_cost': self.total_cost,
+            'total_calls': self.total_calls,
+            'avg_cost_per_call': self.total_cost / self.total_calls if self.total_calls else 0.0,
+            'p99_total_calls': p99_total_calls,
+            'p99_total_cost': p99_total_cost,
+        }
+        return Dashboard(
+            percentile_data={'percentile': list(percentiles), 'llm_calls': [int(v) for v in pct_values]},
+            distribution_data=bucket_rows(self.distribution_buckets, *self.dist, pct_of=self.count),
+            p99_distribution=bucket_rows(self.p99_buckets, *self.p99),
+            p99_internal={'Metric': [name for name, _ in P99_INTERNAL], 'Calls': [int(v) for v in internal]},
+            stats=stats,
+            sketch=self.sketch,
+        )
+
+
+def merge_all(aggregates):
+    """Merge any number of partials into one."""
+    return reduce(PartialAggregate.merge, aggregates)
+
+
+def save_aggregate(aggregate, path):
+    with open(path, 'w') as f:
+        f.write(aggregate.dumps())
+
+
+def load_aggregates(paths):
+    """Load and merge partial aggregates written by ``save_aggregate``."""
+    parts = []
+    for path in paths:
+        with open(path) as f:
+            parts.append(PartialAggregate.loads(f.read()))
+    if not parts:
+        raise ValueError("No partial aggregates to load")
+    return merge_all(parts)
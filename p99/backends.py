@@ -0,0 +1,592 @@
+"""
+Pluggable data backends that push aggregation into the query engine
+
+Every backend answers the same few aggregate questions (totals, bucket
+totals, percentiles, capped cost per limit) so only small result sets ever
+reach Python. The SQL backends share one query generator and differ only in
+how percentiles are expressed and how a connection is opened.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import numpy as np
+
+from .binning import CURVE_POINTS, DENSITY_BINS, calls_cost_density, sorted_curve
+from .buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS, bucket_rows, bucket_totals
+from .data import CALLS, COST, USER_ID, file_version, load_users
+from .drilldown import PAGE_SIZE, SORTS, UserIndex, user_row
+from .lorenz import LORENZ_POINTS, LorenzCurve
+from .metrics import P99_INTERNAL, PERCENTILES, Dashboard, compute_dashboard, nearest_rank, percentiles_of
+from .simulator import CostSimulator, SimulationResult
+from .sketch import QuantileSketch
+
+DEFAULT_TABLE = "user_calls"
+VERSION_TTL = 60  # seconds a Trino table fingerprint is reused before re-checking
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+class Backend:
+    """Aggregate queries over per-user rows (user_id, llm_calls, cost)."""
+
+    def totals(self):
+        """``(users, calls, cost, max_calls)`` over all users."""
+        raise NotImplementedError
+
+    def bucket_totals(self, buckets):
+        """Per-bucket ``(users, calls, cost)`` arrays."""
+        raise NotImplementedError
+
+    def percentiles(self, percentiles, min_calls=None):
+        """Nearest-rank percentiles of calls, optionally over ``calls >= min_calls``."""
+        raise NotImplementedError
+
+    def tail_totals(self, min_calls):
+        """``(users, calls, cost)`` over users with at least ``min_calls`` calls."""
+        raise NotImplementedError
+
+    def capped(self, limits):
+        """Capped cost and affected users for each limit, as two arrays."""
+        raise NotImplementedError
+
+    def version(self):
+        """Cache key that changes when the underlying data changes."""
+        raise NotImplementedError
+
+    def sketch(self):
+        """Quantile sketch for on-demand percentiles, if the backend has one."""
+        return None
+
+    def lorenz(self):
+        """Lorenz curve of per-user cost, if the backend can compute one."""
+        return None
+
+    def density(self, calls_range=None, bins=DENSITY_BINS):
+        """Users per (calls, cost) cell on log axes, if the backend can bin per user."""
+        return None
+
+    def calls_curve(self, lo_pct=0.0, hi_pct=100.0, points=CURVE_POINTS):
+        """At most ``points`` ``(percentile, calls)`` pairs of the exact CDF between two percentiles."""
+        return None
+
+    def users_page(self, min_calls, max_calls=None, offset=0, limit=PAGE_SIZE, sort="calls"):
+        """``(users in [min_calls, max_calls), rows)`` for one page, heaviest first by ``sort``.
+
+        ``None`` if the backend has no per-user rows to page through.
+        """
+        return None
+
+    def find_user(self, user_id):
+        """One user's row with their rank by calls (1 + users with more calls), or ``None``."""
+        return None
+
+    def percentile_summary(self, percentiles=PERCENTILES):
+        """Percentiles plus the P99 threshold and the P99 users' totals and internals.
+
+        These queries depend on each other (the threshold comes first), so
+        they form one unit of work.
+        """
+        percentiles = tuple(sorted(set(percentiles) | {50, 99}))
+        pct_values = [int(v) for v in self.percentiles(percentiles)]
+        p99_threshold = pct_values[percentiles.index(99)]
+        p99_users, p99_calls, p99_cost = self.tail_totals(p99_threshold)
+        internal = self.percentiles([p for _, p in P99_INTERNAL], min_calls=p99_threshold)
+        return {
+            'percentile_data': {'percentile': list(percentiles), 'llm_calls': pct_values},
+            'p99_internal': {'Metric': [name for name, _ in P99_INTERNAL], 'Calls': [int(v) for v in internal]},
+            'p99_threshold': p99_threshold,
+            'p99_user_count': p99_users,
+            'p99_total_calls': p99_calls,
+            'p99_total_cost': p99_cost,
+        }
+
+    def dashboard(self, percentiles=PERCENTILES):
+        """Assemble every dashboard table from aggregate queries."""
+        return assemble_dashboard(
+            totals=self.totals(),
+            summary=self.percentile_summary(percentiles),
+            distribution=self.bucket_totals(DISTRIBUTION_BUCKETS),
+            p99_distribution=self.bucket_totals(P99_BUCKETS),
+            sketch=self.sketch(),
+        )
+
+    def simulator(self):
+        return BackendSimulator(self)
+
+
+def assemble_dashboard(totals=None, summary=None, distribution=None, p99_distribution=None, sketch=None):
+    """Build a ``Dashboard`` from backend results; missing parts are left ``None``.
+
+    ``stats`` needs both ``totals`` and ``summary``.
+    """
+    stats = None
+    if totals is not None and summary is not None:
+        users, calls, cost, max_calls = totals
+        if users == 0:
+            raise ValueError("No users to summarize")
+        pct = dict(zip(summary['percentile_data']['percentile'], summary['percentile_data']['llm_calls']))
+        stats = {
+            'total_users': users,
+            'p99_threshold': summary['p99_threshold'],
+            'p99_user_count': summary['p99_user_count'],
+            'avg_calls': int(round(calls / users)),
+            'median_calls': pct[50],
+            'max_calls': max_calls,
+            'total_cost': cost,
+            'total_calls': calls,
+            'avg_cost_per_call': cost / calls if calls else 0.0,
+            'p99_total_calls': summary['p99_total_calls'],
+            'p99_total_cost': summary['p99_total_cost'],
+        }
+    return Dashboard(
+        percentile_data=summary['percentile_data'] if summary else None,
+        distribution_data=(bucket_rows(DISTRIBUTION_BUCKETS, *distribution, pct_of=totals[0])
+                           if distribution is not None and totals is not None else None),
+        p99_distribution=bucket_rows(P99_BUCKETS, *p99_distribution) if p99_distribution is not None else None,
+        p99_internal=summary['p99_internal'] if summary else None,
+        stats=stats,
+        sketch=sketch,
+    )
+
+
+class BackendSimulator:
+    """Cost simulator whose capped-cost sums run inside the backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.total_users, _, self.total_cost, self.max_calls = backend.totals()
+
+    def simulate(self, limit):
+        capped_cost, affected = self.backend.capped([int(limit)])
+        return SimulationResult(
+            limit=int(limit),
+            capped_cost=float(capped_cost[0]),
+            users_affected=int(affected[0]),
+            total_cost=self.total_cost,
+            total_users=self.total_users,
+        )
+
+    def sweep(self, limits):
+        limits = np.asarray(limits)
+        capped_cost, affected = self.backend.capped([int(x) for x in limits])
+        return {
+            'limit': limits,
+            'capped_cost': capped_cost,
+            'savings': self.total_cost - capped_cost,
+            'users_affected': affected,
+        }
+
+
+class InMemoryBackend(Backend):
+    """NumPy backend over ``UserData`` already in memory."""
+
+    def __init__(self, users):
+        self.users = users
+        # The dashboard asks for the simulator from its query workers and the
+        # script thread at once; build it (and the index on it) only once.
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path):
+        backend = cls(load_users(path))
+        backend._version = file_version(path)
+        return backend
+
+    def version(self):
+        return getattr(self, '_version', f"memory-{id(self.users):x}")
+
+    def totals(self):
+        u = self.users
+        return len(u), int(u.calls.sum()), float(u.cost.sum(dtype=np.float64)), int(u.calls.max())
+
+    def _sorted(self):
+        # Once the simulator has sorted the users, re-bucketing and
+        # percentiles are binary searches instead of passes over every user.
+        return getattr(self, '_simulator', None)
+
+    def bucket_totals(self, buckets):
+        if self._sorted() is not None:
+            return self._sorted().bucket_totals(buckets)
+        return bucket_totals(self.users.calls, self.users.cost, buckets)
+
+    def percentiles(self, percentiles, min_calls=None):
+        if self._sorted() is not None:
+            calls = self._sorted().sorted_calls
+            if min_calls is not None:
+                calls = calls[np.searchsorted(calls, min_calls, side='left'):]
+            if len(calls) == 0:
+                raise ValueError("No users to summarize")
+            return calls[nearest_rank(len(calls), percentiles)]
+        calls = self.users.calls
+        if min_calls is not None:
+            calls = calls[calls >= min_calls]
+        return percentiles_of(calls, percentiles)
+
+    def tail_totals(self, min_calls):
+        mask = self.users.calls >= min_calls
+        return int(mask.sum()), int(self.users.calls[mask].sum()), float(self.users.cost[mask].sum(dtype=np.float64))
+
+    def capped(self, limits):
+        sweep = self.simulator().sweep(limits)
+        return sweep['capped_cost'], sweep['users_affected']
+
+    def sketch(self):
+        return QuantileSketch().update(self.users.calls)
+
+    def lorenz(self):
+        return LorenzCurve.from_users(self.users)
+
+    def density(self, calls_range=None, bins=DENSITY_BINS):
+        return calls_cost_density(self.users.calls, self.users.cost, calls_range, bins)
+
+    def calls_curve(self, lo_pct=0.0, hi_pct=100.0, points=CURVE_POINTS):
+        return sorted_curve(self.simulator().sorted_calls, lo_pct, hi_pct, points)
+
+    def user_index(self):
+        simulator = self.simulator()
+        with self._lock:
+            if not hasattr(self, '_user_index'):
+                self._user_index = UserIndex(self.users, simulator.order)
+        return self._user_index
+
+    def users_page(self, min_calls, max_calls=None, offset=0, limit=PAGE_SIZE, sort="calls"):
+        return self.user_index().page(min_calls, max_calls, offset, limit, sort)
+
+    def find_user(self, user_id):
+        return self.user_index().find(user_id)
+
+    def dashboard(self, percentiles=PERCENTILES):
+        return compute_dashboard(self.users, percentiles)
+
+    def simulator(self):
+        with self._lock:
+            if not hasattr(self, '_simulator'):
+                self._simulator = CostSimulator.from_users(self.users)
+        return self._simulator
+
+
+class SQLBackend(Backend):
+    """Backend over a DB-API connection and a per-user table."""
+
+    def __init__(self, connection, table=DEFAULT_TABLE):
+        if not _IDENTIFIER.match(table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.connection = connection
+        self.table = table
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _thread_connection(self):
+        """Connection for the calling thread, or ``None`` to share one under a lock."""
+        return None
+
+    def query(self, sql):
+        connection = self._thread_connection()
+        if connection is None:
+            with self._lock:
+                return self._fetch(self.connection, sql)
+        return self._fetch(connection, sql)
+
+    @staticmethod
+    def _fetch(connection, sql):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def totals(self):
+        users, calls, cost, max_calls = self.query(
+            f"SELECT COUNT(*), SUM({CALLS}), SUM({COST}), MAX({CALLS}) FROM {self.table}"
+        )[0]
+        return int(users), int(calls or 0), float(cost or 0), int(max_calls or 0)
+
+    def bucket_totals(self, buckets):
+        cases = " ".join(
+            f"WHEN {CALLS} >= {int(edge)} THEN {i}"
+            for i, edge in reversed(list(enumerate(buckets.edges)))
+        )
+        rows = self.query(
+            f"SELECT bucket, COUNT(*), SUM({CALLS}), SUM({COST}) "
+            f"FROM (SELECT CASE {cases} END AS bucket, {CALLS}, {COST} FROM {self.table}) b "
+            f"WHERE bucket IS NOT NULL GROUP BY bucket"
+        )
+        totals = np.zeros((3, len(buckets)))
+        for bucket, users, calls, cost in rows:
+            totals[:, int(bucket)] = users, calls, cost
+        return totals[0].astype(np.int64), totals[1], totals[2]
+
+    def _where(self, min_calls):
+        return "" if min_calls is None else f" WHERE {CALLS} >= {int(min_calls)}"
+
+    def percentiles(self, percentiles, min_calls=None):
+        # Portable nearest-rank: count, then fetch only the wanted ranks.
+        n = self.query(f"SELECT COUNT(*) FROM {self.table}{self._where(min_calls)}")[0][0]
+        if n == 0:
+            raise ValueError("No users to summarize")
+        ranks = nearest_rank(n, percentiles) + 1
+        wanted = ", ".join(str(r) for r in sorted(set(ranks.tolist())))
+        rows = dict(self.query(
+            f"SELECT rn, {CALLS} FROM (SELECT {CALLS}, ROW_NUMBER() OVER (ORDER BY {CALLS}) AS rn "
+            f"FROM {self.table}{self._where(min_calls)}) r WHERE rn IN ({wanted})"
+        ))
+        return np.array([rows[r] for r in ranks.tolist()], dtype=np.int64)
+
+    def tail_totals(self, min_calls):
+        users, calls, cost = self.query(
+            f"SELECT COUNT(*), SUM({CALLS}), SUM({COST}) FROM {self.table}{self._where(min_calls)}"
+        )[0]
+        return int(users), int(calls or 0), float(cost or 0)
+
+    def capped(self, limits):
+        # One GROUP BY over call counts, then the same prefix/suffix sums as
+        # CostSimulator: cost grows with distinct call counts, not users x limits.
+        rows = self.query(
+            f"SELECT {CALLS}, COUNT(*), SUM({COST}), "
+            f"SUM(CAST({COST} AS DOUBLE) / CASE WHEN {CALLS} > 0 THEN {CALLS} ELSE 1 END) "
+            f"FROM {self.table} GROUP BY {CALLS}"
+        )
+        rows.sort(key=lambda row: row[0])
+        calls = np.array([row[0] for row in rows], dtype=np.int64)
+        users, cost, cost_per_call = (np.array([row[i] or 0 for row in rows], dtype=np.float64) for i in (1, 2, 3))
+        cost_prefix = np.concatenate([[0.0], np.cumsum(cost)])
+        users_suffix = np.concatenate([np.cumsum(users[::-1])[::-1], [0.0]])
+        cpc_suffix = np.concatenate([np.cumsum(cost_per_call[::-1])[::-1], [0.0]])
+        limits = np.array([int(x) for x in limits], dtype=np.int64)
+        k = np.searchsorted(calls, limits, side='right')
+        return cost_prefix[k] + limits * cpc_suffix[k], users_suffix[k].astype(np.int64)
+
+    def lorenz(self, points=LORENZ_POINTS):
+        # Running cost at evenly spaced ranks (ten times denser in the top 1%,
+        # where the curve bends), plus the exact Gini from every rank.
+        n = self.query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+        if n == 0:
+            raise ValueError("No users to summarize")
+        step = max(1, n // points)
+        ranked = (f"SELECT {COST} AS c, ROW_NUMBER() OVER (ORDER BY {COST}) AS rn, "
+                  f"SUM({COST}) OVER (ORDER BY {COST} ROWS UNBOUNDED PRECEDING) AS cum "
+                  f"FROM {self.table}")
+        rows = self.query(
+            f"SELECT rn, cum FROM ({ranked}) r "
+            f"WHERE rn % {step} = 0 OR (rn > {n - n // 100} AND rn % {max(1, step // 10)} = 0) "
+            f"OR rn = {n} ORDER BY rn"
+        )
+        (weighted, total), = self.query(
+            f"SELECT SUM((2.0 * rn - {n} - 1) * c), SUM(c) FROM ({ranked}) r"
+        )
+        ranks = np.array([0] + [int(rn) for rn, _ in rows], dtype=np.float64)
+        cum_cost = np.array([0.0] + [float(cum) for _, cum in rows])
+        gini = float(weighted) / (n * float(total)) if total else 0.0
+        return LorenzCurve(cum_cost, n, gini, ranks=ranks)
+
+    def calls_curve(self, lo_pct=0.0, hi_pct=100.0, points=CURVE_POINTS):
+        # Evenly spaced ranks within the window; the engine does the sampling.
+        n = self.query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+        if n == 0:
+            raise ValueError("No users to summarize")
+        start = min(int(np.floor(n * lo_pct / 100)), n - 1)
+        stop = max(int(np.ceil(n * hi_pct / 100)), start + 1)
+        step = max(1, (stop - start) // points)
+        rows = self.query(
+            f"SELECT rn, {CALLS} FROM (SELECT {CALLS}, ROW_NUMBER() OVER (ORDER BY {CALLS}) AS rn "
+            f"FROM {self.table}) r WHERE rn > {start} AND rn <= {stop} "
+            f"AND ((rn - {start}) % {step} = 0 OR rn = {start + 1} OR rn = {stop}) ORDER BY rn"
+        )
+        ranks = np.array([rn for rn, _ in rows], dtype=np.float64)
+        return ranks / n * 100, np.array([calls for _, calls in rows], dtype=np.float64)
+
+    def _page(self, offset, limit):
+        return f"LIMIT {int(limit)} OFFSET {int(offset)}"
+
+    def users_page(self, min_calls, max_calls=None, offset=0, limit=PAGE_SIZE, sort="calls"):
+        # With an index on llm_calls the range is an index range scan.
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r}; expected one of {', '.join(SORTS)}")
+        where = f"WHERE {CALLS} >= {int(min_calls)}"
+        if max_calls is not None:
+            where += f" AND {CALLS} < {int(max_calls)}"
+        total = self.query(f"SELECT COUNT(*) FROM {self.table} {where}")[0][0]
+        key = {
+            "calls": CALLS,
+            "cost": COST,
+            "cost_per_call": f"CAST({COST} AS DOUBLE) / CASE WHEN {CALLS} > 0 THEN {CALLS} ELSE 1 END",
+        }[sort]
+        rows = self.query(
+            f"SELECT {USER_ID}, {CALLS}, {COST} FROM {self.table} {where} "
+            f"ORDER BY {key} DESC, {USER_ID} {self._page(offset, limit)}"
+        )
+        return int(total), [user_row(offset + i + 1, *row) for i, row in enumerate(rows)]
+
+    def find_user(self, user_id):
+        literal = str(user_id).replace("'", "''")
+        rows = self.query(
+            f"SELECT {USER_ID}, {CALLS}, {COST} FROM {self.table} "
+            f"WHERE CAST({USER_ID} AS VARCHAR) = '{literal}'"
+        )
+        if not rows:
+            return None
+        found, calls, cost = rows[0]
+        above = self.query(f"SELECT COUNT(*) FROM {self.table} WHERE {CALLS} > {int(calls)}")[0][0]
+        return user_row(above + 1, found, calls, cost)
+
+
+class SQLiteBackend(SQLBackend):
+    """SQLite file or in-memory database (window functions need SQLite 3.25+)."""
+
+    def __init__(self, path=":memory:", table=DEFAULT_TABLE, connection=None):
+        super().__init__(connection or sqlite3.connect(path, check_same_thread=False), table)
+        self.path = path
+
+    def version(self):
+        return file_version(self.path) if self.path != ":memory:" else f"sqlite-{id(self.connection):x}"
+
+    def _thread_connection(self):
+        # A file database gets one connection per thread; an in-memory one
+        # only exists on the shared connection.
+        if self.path == ":memory:":
+            return None
+        if not hasattr(self._local, 'connection'):
+            self._local.connection = sqlite3.connect(self.path, check_same_thread=False)
+        return self._local.connection
+
+    @classmethod
+    def from_users(cls, users, path=":memory:", table=DEFAULT_TABLE):
+        backend = cls(path, table)
+        backend.connection.execute(f"DROP TABLE IF EXISTS {table}")
+        backend.connection.execute(f"CREATE TABLE {table} ({USER_ID} TEXT, {CALLS} INTEGER, {COST} REAL)")
+        backend.connection.executemany(
+            f"INSERT INTO {table} VALUES (?, ?, ?)",
+            zip(users.ids().astype(str).tolist(), users.calls.tolist(), users.cost.tolist()),
+        )
+        backend.connection.commit()
+        return backend
+
+
+class DuckDBBackend(SQLBackend):
+    """DuckDB file or in-memory database; a local stand-in for Trino."""
+
+    def __init__(self, path=":memory:", table=DEFAULT_TABLE, connection=None, read_only=False):
+        if connection is None:
+            import duckdb
+            connection = duckdb.connect(str(path), read_only=read_only and path != ":memory:")
+        super().__init__(connection, table)
+        self.path = path
+
+    def version(self):
+        return file_version(self.path) if self.path != ":memory:" else f"duckdb-{id(self.connection):x}"
+
+    def _thread_connection(self):
+        # cursor() opens another connection to the same database, safe to
+        # use from this thread alongside the others.
+        if not hasattr(self._local, 'connection'):
+            self._local.connection = self.connection.cursor()
+        return self._local.connection
+
+    @classmethod
+    def from_file(cls, data_path, path=":memory:", table=DEFAULT_TABLE):
+        """Create ``table`` from a per-user Parquet/CSV export."""
+        backend = cls(path, table)
+        reader = "read_parquet" if Path(data_path).suffix in {".parquet", ".pq"} or Path(data_path).is_dir() else "read_csv_auto"
+        source = f"{data_path}/**/*.parquet" if Path(data_path).is_dir() else str(data_path)
+        backend.connection.execute(
+            f"CREATE OR REPLACE TABLE {table} AS "
+            f"SELECT {USER_ID}, {CALLS}, {COST} FROM {reader}(?)", [source]
+        )
+        return backend
+
+    def percentiles(self, percentiles, min_calls=None):
+        # quantile_disc picks actual values; the fractions are nudged to
+        # nearest-rank positions so results match the NumPy engine.
+        n = self.query(f"SELECT COUNT(*) FROM {self.table}{self._where(min_calls)}")[0][0]
+        if n == 0:
+            raise ValueError("No users to summarize")
+        fractions = ", ".join(repr(float(r / (n - 1)) if n > 1 else 0.0) for r in nearest_rank(n, percentiles))
+        (values,) = self.query(
+            f"SELECT quantile_disc({CALLS}, [{fractions}]) FROM {self.table}{self._where(min_calls)}"
+        )[0]
+        return np.asarray(values, dtype=np.int64)
+
+
+class TrinoBackend(SQLBackend):
+    """Trino/Presto cluster; percentiles use approx_percentile."""
+
+    def __init__(self, host, port=8080, user="p99", catalog=None, schema=None,
+                 table=DEFAULT_TABLE, connection=None, version_ttl=VERSION_TTL, **connect_kwargs):
+        if connection is None:
+            try:
+                import trino
+            except ImportError as exc:
+                raise ImportError("TrinoBackend requires the 'trino' package (pip install trino)") from exc
+            connection = trino.dbapi.connect(host=host, port=port, user=user,
+                                             catalog=catalog, schema=schema, **connect_kwargs)
+        super().__init__(connection, table)
+        self.url = f"trino://{user}@{host}:{port}/{catalog}/{schema}/{table}"
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_at = 0.0
+
+    def version(self):
+        # A fingerprint of the table's contents, so new data gets new cache
+        # keys; re-queried at most every ``version_ttl`` seconds.
+        now = time.monotonic()
+        if self._version is None or now - self._version_at >= self.version_ttl:
+            users, calls, cost = self.query(
+                f"SELECT COUNT(*), SUM({CALLS}), SUM({COST}) FROM {self.table}"
+            )[0]
+            self._version = f"{self.url}@{users}-{calls}-{float(cost or 0):.6f}"
+            self._version_at = now
+        return self._version
+
+    def _thread_connection(self):
+        # Each Trino cursor is an independent HTTP query.
+        return self.connection
+
+    def percentiles(self, percentiles, min_calls=None):
+        fractions = ", ".join(repr(min(float(p) / 100, 1.0)) for p in percentiles)
+        (values,) = self.query(
+            f"SELECT approx_percentile({CALLS}, ARRAY[{fractions}]) FROM {self.table}{self._where(min_calls)}"
+        )[0]
+        return np.rint(np.asarray(values, dtype=np.float64)).astype(np.int64)
+
+    def _page(self, offset, limit):
+        return f"OFFSET {int(offset)} LIMIT {int(limit)}"
+
+
+def connect(url):
+    """Open a backend from a URL.
+
+    ``memory:///path/users.parquet``, ``duckdb:///path/db.duckdb[?table=t]``,
+    ``sqlite:///path/db.sqlite[?table=t]`` or
+    ``trino://user@host:port/catalog/schema[?table=t]``. File paths may be
+    relative (``sqlite://users.db``); ``duckdb://:memory:`` and
+    ``sqlite://:memory:`` open an empty in-memory database.
+    """
+    parsed = urlparse(url)
+    params = dict(p.split("=", 1) for p in parsed.query.split("&") if "=" in p)
+    table = params.get("table", DEFAULT_TABLE)
+    # A relative path lands (partly) in netloc: sqlite://users.db
+    path = unquote(parsed.netloc + parsed.path)
+    if not path and parsed.scheme in ("memory", "duckdb", "sqlite"):
+        raise ValueError(f"Backend URL has no file path: {url!r}")
+    if parsed.scheme == "memory":
+        return InMemoryBackend.from_file(path)
+    if parsed.scheme == "duckdb":
+        return DuckDBBackend(path, table, read_only=True)
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(path, table)
+    if parsed.scheme == "trino":
+        parts = [p for p in parsed.path.split("/") if p]
+        return TrinoBackend(
+            host=parsed.hostname,
+            port=parsed.port or 8080,
+            user=parsed.username or "p99",
+            catalog=parts[0] if parts else None,
+            schema=parts[1] if len(parts) > 1 else None,
+            table=table,
+        )
+    raise ValueError(f"Unknown backend URL scheme: {parsed.scheme!r}")
@@ -0,0 +1,84 @@
+"""
+Bounded-size plot data from per-user arrays: 2D density grids and downsampled curves
+"""
+
+import numpy as np
+
+from .lorenz import lttb
+
+DENSITY_BINS = (80, 60)  # calls x cost cells, whatever the user count
+CURVE_POINTS = 2000
+
+
+def log_edges(lo, hi, bins):
+    """``bins + 1`` log-spaced edges covering ``[lo, hi]`` (``lo`` > 0)."""
+    lo = max(float(lo), np.finfo(np.float64).tiny)
+    return np.geomspace(lo, max(float(hi), lo * (1 + 1e-9)), bins + 1)
+
+
+def _bin_index(values, edges, log):
+    # Bins are [e_i, e_{i+1}) except the last, which includes its upper edge.
+    bins = len(edges) - 1
+    if log:
+        # Log-spaced edges: the bin is arithmetic on log(value), which is
+        # several times faster than a binary search per value.
+        lo, hi = np.log(edges[0]), np.log(edges[-1])
+        index = ((np.log(values) - lo) * (bins / (hi - lo))).astype(np.int64)
+        return np.clip(index, 0, bins - 1)
+    return np.minimum(np.searchsorted(edges, values, side='right') - 1, bins - 1)
+
+
+def density_grid(x, y, x_edges, y_edges, weights=None, log=False):
+    """Per-cell user counts (and ``weights`` sums) as ``(len(y_edges)-1, len(x_edges)-1)`` arrays.
+
+    Points outside ``x_edges`` are dropped; ``y`` is clamped into
+    ``y_edges`` so every kept point lands in a cell. One flat ``bincount``
+    does the 2D histogram. ``log=True`` says both edge arrays are
+    log-spaced (as from ``log_edges``).
+    """
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    keep = (x >= x_edges[0]) & (x <= x_edges[-1])
+    x, y = x[keep], np.clip(y[keep], y_edges[0], y_edges[-1])
+    cell = _bin_index(y, y_edges, log) * nx + _bin_index(x, x_edges, log)
+    counts = np.bincount(cell, minlength=nx * ny).reshape(ny, nx)
+    sums = None
+    if weights is not None:
+        sums = np.bincount(cell, weights=weights[keep], minlength=nx * ny).reshape(ny, nx)
+    return counts, sums
+
+
+def calls_cost_density(calls, cost, calls_range=None, bins=DENSITY_BINS):
+    """Users per (calls, cost per user) cell on log axes, within ``calls_range``.
+
+    Zooming into a calls range re-bins just those users at the same grid
+    size, so detail grows with zoom while the grid stays ``bins`` cells.
+    """
+    lo, hi = calls_range if calls_range is not None else (1, int(calls.max()))
+    in_range = (calls >= lo) & (calls <= hi)
+    cost_in = cost[in_range]
+    positive = cost_in[cost_in > 0]
+    if not len(positive):
+        return None
+    x_edges = log_edges(lo, hi, bins[0])
+    y_edges = log_edges(positive.min(), positive.max(), bins[1])
+    counts, cost_sums = density_grid(calls[in_range], cost_in, x_edges, y_edges, weights=cost_in, log=True)
+    return {
+        'calls_edges': x_edges,
+        'cost_edges': y_edges,
+        'users': counts,
+        'cost': cost_sums,
+        'total_users': int(in_range.sum()),
+    }
+
+
+def sorted_curve(sorted_values, lo_pct=0.0, hi_pct=100.0, points=CURVE_POINTS):
+    """``(percentile, value)`` of a sorted array between two percentiles, LTTB-downsampled.
+
+    The window is downsampled on its own, so narrowing it (zooming) brings
+    back full resolution without sending more points.
+    """
+    n = len(sorted_values)
+    start = min(int(np.floor(n * lo_pct / 100)), n - 1)
+    stop = max(int(np.ceil(n * hi_pct / 100)), start + 1)
+    idx = lttb(None, sorted_values[start:stop], points)
+    return (start + idx + 1) / n * 100, np.asarray(sorted_values[start:stop][idx], dtype=np.float64)
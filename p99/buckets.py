@@ -0,0 +1,166 @@
+"""
+Call-volume bucket definitions and vectorized bucket tables
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Buckets:
+    """Half-open call-count buckets ``[edges[i], edges[i + 1])``.
+
+    The last bucket is open-ended. Users with fewer calls than ``edges[0]``
+    fall outside every bucket.
+    """
+    edges: tuple
+    labels: tuple
+
+    def __post_init__(self):
+        if len(self.edges) != len(self.labels):
+            raise ValueError("Buckets need exactly one label per lower edge")
+        if any(b <= a for a, b in zip(self.edges, self.edges[1:])):
+            raise ValueError("Bucket edges must be strictly increasing")
+
+    def __len__(self):
+        return len(self.edges)
+
+    def assign(self, calls):
+        """Bucket index per user, ``-1`` for users below the first edge."""
+        return np.searchsorted(np.asarray(self.edges), calls, side='right') - 1
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Buckets over integer lower ``edges``, labelled like the built-in ones ("1K-2K", "50K+")."""
+        edges = tuple(int(e) for e in edges)
+        if not edges or edges[0] < 1:
+            raise ValueError("Bucket edges must start at 1 call or more")
+        labels = []
+        for i, lo in enumerate(edges):
+            prev = edges[i - 1] if i else None
+            if i + 1 == len(edges):
+                labels.append(f"{_lower_label(lo, prev)}+")
+            elif edges[i + 1] - 1 == lo:
+                labels.append(format_calls(lo))
+            else:
+                labels.append(f"{_lower_label(lo, prev)}-{format_calls(edges[i + 1] - 1)}")
+        return cls(edges, tuple(labels))
+
+
+DISTRIBUTION_BUCKETS = Buckets(
+    edges=(1, 11, 26, 51, 101, 201, 501, 1001, 2001, 5001, 10001, 25001, 50001),
+    labels=("1-10", "11-25", "26-50", "51-100", "101-200", "201-500", "501-1K",
+            "1K-2K", "2K-5K", "5K-10K", "10K-25K", "25K-50K", "50K+"),
+)
+
+P99_BUCKETS = Buckets(
+    edges=(5001, 6001, 7001, 8001, 10001, 15001, 20001, 30001, 50001, 75001, 100001),
+    labels=("5K-6K", "6K-7K", "7K-8K", "8K-10K", "10K-15K", "15K-20K",
+            "20K-30K", "30K-50K", "50K-75K", "75K-100K", "100K+"),
+)
+
+
+def format_calls(n):
+    """Short call count (500, 1K, 1.5K, 2M) when that is exact, else the full number (1,499)."""
+    n = int(n)
+    for scale, suffix in ((1_000_000, "M"), (1_000, "K")):
+        if n >= scale:
+            short = f"{n / scale:.3g}"
+            return f"{short}{suffix}" if float(short) * scale == n else f"{n:,}"
+    return str(n)
+
+
+def _lower_label(edge, prev=None):
+    # Edges one past a round number (1001, 5001) are labelled by it: "1K-2K".
+    # Not after a one-value bucket [prev, edge), which that label would name.
+    below = edge - 1
+    if below >= 1000 and below == float(f"{below:.2g}") and (prev is None or prev < below):
+        return format_calls(below)
+    return format_calls(edge)
+
+
+def _round_sig(values, digits=2):
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** (np.floor(np.log10(np.maximum(values, 1))) - digits + 1)
+    return np.rint(values / scale) * scale
+
+
+def log_spaced_buckets(lo, hi, n):
+    """``n`` buckets from ``lo`` calls, log-spaced up to ``hi`` and rounded to 2 significant digits.
+
+    The last bucket is open-ended, like the built-in ones.
+    """
+    uppers = _round_sig(np.geomspace(max(lo, 1), max(hi, lo + 1), n + 1)[1:-1])
+    return Buckets.from_edges(np.unique(np.concatenate([[lo], uppers[uppers >= lo] + 1])))
+
+
+def equal_population_buckets(lo, quantiles):
+    """Buckets from ``lo`` whose upper bounds are the calls at evenly spaced quantiles.
+
+    Pass the calls at percentiles ``100 * i / n`` for ``i = 1..n-1`` of the
+    users with at least ``lo`` calls. Ties (many users on one call count)
+    merge buckets, so fewer than ``n`` may come back.
+    """
+    quantiles = np.asarray(quantiles, dtype=np.int64)
+    return Buckets.from_edges(np.unique(np.concatenate([[lo], quantiles[quantiles >= lo] + 1])))
+
+
+def parse_edges(text):
+    """Buckets from comma/space separated lower edges, e.g. ``"1, 11, 101, 1001"``."""
+    try:
+        edges = sorted({int(float(tok)) for tok in text.replace(",", " ").split()})
+    except ValueError:
+        raise ValueError(f"Bucket edges must be numbers: {text!r}") from None
+    if not edges:
+        raise ValueError("Give at least one bucket edge")
+    return Buckets.from_edges(edges)
+
+
+def bucket_totals(calls, cost, buckets):
+    """Per-bucket user counts, call sums and cost sums in one bincount pass."""
+    idx = buckets.assign(calls)
+    inside = idx >= 0
+    if not inside.all():
+        idx, calls, cost = idx[inside], calls[inside], cost[inside]
+    n = len(buckets)
+    counts = np.bincount(idx, minlength=n)
+    call_sums = np.bincount(idx, weights=calls, minlength=n)
+    cost_sums = np.bincount(idx, weights=cost, minlength=n)
+    return counts, call_sums, cost_sums
+
+
+def bucket_rows(buckets, counts, call_sums, cost_sums, pct_of=None):
+    """Format bucket totals as the row dicts used by the dashboard tables.
+
+    ``pct_of`` is the population the ``pct`` column is relative to; it
+    defaults to the users that landed in a bucket.
+    """
+    counts = np.asarray(counts)
+    call_sums = np.asarray(call_sums, dtype=np.float64)
+    cost_sums = np.asarray(cost_sums, dtype=np.float64)
+    denom = counts.sum() if pct_of is None else pct_of
+    safe_counts = np.maximum(counts, 1)
+    avg_calls = np.rint(call_sums / safe_counts).astype(np.int64)
+    avg_cost = cost_sums / safe_counts
+    cost_per_call = cost_sums / np.maximum(call_sums, 1)
+    pct = counts / denom * 100 if denom else np.zeros(len(counts))
+    return [
+        {
+            "bucket": label,
+            "user_count": int(counts[i]),
+            "pct": round(float(pct[i]), 2),
+            "avg_calls": int(avg_calls[i]),
+            "total_calls": int(call_sums[i]),
+            "total_cost": round(float(cost_sums[i]), 2),
+            "avg_cost_per_user": round(float(avg_cost[i]), 2),
+            "cost_per_call": round(float(cost_per_call[i]), 4),
+        }
+        for i, label in enumerate(buckets.labels)
+    ]
+
+
+def bucket_table(calls, cost, buckets, pct_of=None):
+    """Bucket users by call count and return one summary row per bucket."""
+    counts, call_sums, cost_sums = bucket_totals(calls, cost, buckets)
+    return bucket_rows(buckets, counts, call_sums, cost_sums, pct_of=pct_of)
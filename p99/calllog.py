@@ -0,0 +1,148 @@
+"""
+JSON-lines call logs to per-user totals through dense int32 user ids
+"""
+
+import argparse
+import os
+import time
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import CALLS, COST, USER_ID, UserData, iter_jsonl_batches
+from .parallel import EVENT_COLUMNS
+
+
+class UserIdEncoder:
+    """Dense int32 codes for user ids, numbered in order of first appearance.
+
+    A plain dict maps each id to its code. Only a batch's distinct ids are
+    looked up, so the per-event work stays in Arrow and NumPy; the dict
+    and the id list grow with distinct users only.
+    """
+
+    def __init__(self):
+        self._codes = {}
+        self._ids = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def encode(self, ids):
+        """Codes for distinct ``ids`` (a list), giving unseen ones the next free codes."""
+        codes = np.array(list(map(self._codes.get, ids, repeat(-1, len(ids)))), dtype=np.int64)
+        missing = np.flatnonzero(codes < 0)
+        if len(missing):
+            start = len(self._ids)
+            if start + len(missing) > np.iinfo(np.int32).max:
+                raise ValueError("Too many distinct users for int32 codes")
+            new = [ids[i] for i in missing]
+            self._codes.update(zip(new, range(start, start + len(new))))
+            self._ids.extend(new)
+            codes[missing] = np.arange(start, start + len(new))
+        return codes.astype(np.int32)
+
+    def ids(self):
+        """Every id seen, indexed by code."""
+        return np.asarray(self._ids) if self._ids else np.zeros(0, dtype=object)
+
+
+class CallLogAccumulator:
+    """Per-user call and cost totals over a stream of call events.
+
+    Each Arrow batch's ids are dictionary-encoded in Arrow, so only the
+    batch's distinct ids become Python values for the encoder; totals are
+    then one ``bincount`` per column over the batch codes, added into
+    arrays indexed by the dense id. Memory grows with distinct users, not
+    with events.
+    """
+
+    def __init__(self):
+        self.encoder = UserIdEncoder()
+        self.calls = np.zeros(0, dtype=np.int64)
+        self.cost = np.zeros(0)
+        self.events = 0
+
+    def __len__(self):
+        return len(self.encoder)
+
+    def _add(self, local, uniques, cost, calls=None):
+        codes = self.encoder.encode(uniques)
+        n = len(self.encoder)
+        if n > len(self.calls):
+            capacity = max(n, 2 * len(self.calls), 1024)
+            self.calls = np.concatenate([self.calls, np.zeros(capacity - len(self.calls), dtype=np.int64)])
+            self.cost = np.concatenate([self.cost, np.zeros(capacity - len(self.cost))])
+        k = len(uniques)
+        # Codes of distinct ids are distinct, so a plain fancy-indexed add is safe.
+        self.calls[codes] += np.bincount(local, weights=calls, minlength=k).astype(np.int64)
+        self.cost[codes] += np.bincount(local, weights=cost, minlength=k)
+        self.events += len(local)
+
+    def update(self, user_ids, cost, calls=None):
+        """Fold in event rows as arrays: one call per row, or ``calls`` per row."""
+        local, uniques = pd.factorize(np.asarray(user_ids), sort=False)
+        self._add(local, uniques.tolist(), np.asarray(cost, dtype=np.float64), calls)
+        return self
+
+    def update_batch(self, batch):
+        """Fold in an Arrow record batch with ``user_id``, ``cost`` and optionally ``llm_calls``."""
+        import pyarrow.compute as pc
+        names = batch.schema.names
+        user_ids = batch.column(names.index(USER_ID))
+        if user_ids.null_count:
+            raise ValueError(f"{user_ids.null_count} call events have no {USER_ID}")
+        encoded = pc.dictionary_encode(user_ids)
+        cost = pc.fill_null(batch.column(names.index(COST)), 0).to_numpy()
+        calls = None
+        if CALLS in names:
+            calls = pc.fill_null(batch.column(names.index(CALLS)), 1).to_numpy()
+        self._add(encoded.indices.to_numpy(), encoded.dictionary.to_pylist(), cost, calls)
+        return self
+
+    def users(self):
+        n = len(self)
+        return UserData(self.encoder.ids(), self.calls[:n], self.cost[:n])
+
+
+def read_call_logs(paths, block_size=None):
+    """Per-user totals from JSON-lines call logs (one object per LLM call)."""
+    accumulator = CallLogAccumulator()
+    kwargs = {} if block_size is None else {'block_size': block_size}
+    for path in paths:
+        for batch in iter_jsonl_batches(path, EVENT_COLUMNS, **kwargs):
+            accumulator.update_batch(batch)
+    return accumulator.users()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m p99.calllog",
+        description="Reduce JSON-lines call logs (one object per LLM call) to per-user totals.")
+    parser.add_argument("out", help="Per-user output: .parquet, .csv, or a .p99snap snapshot directory")
+    parser.add_argument("logs", nargs="+", help="JSON-lines call logs with user_id and cost fields")
+    parser.add_argument("--block-mb", type=int, default=16, help="MB of lines parsed per block")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    users = read_call_logs(args.logs, block_size=args.block_mb << 20)
+    elapsed = time.perf_counter() - started
+    out = Path(args.out)
+    if out.suffix == ".p99snap":
+        from .snapshot import write_snapshot
+        write_snapshot(users, out)
+    else:
+        df = pd.DataFrame({USER_ID: users.ids(), CALLS: users.calls, COST: users.cost})
+        if out.suffix == ".csv":
+            df.to_csv(out, index=False)
+        else:
+            df.to_parquet(out, index=False)
+    size = sum(os.path.getsize(p) for p in args.logs)
+    print(f"{int(users.calls.sum()):,} calls from {len(users):,} users in {elapsed:.1f}s "
+          f"({size / elapsed / 1e6:,.0f} MB/s) -> {out}")
+
+
+if __name__ == "__main__":
+    main()
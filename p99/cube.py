@@ -0,0 +1,277 @@
+"""
+Cost cube: mergeable aggregates per (model, tenant, region, plan) with rollups
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .aggregate import PartialAggregate, merge_all
+from .data import CALLS, COST, PARQUET_SUFFIXES, file_version, iter_chunks
+from .metrics import PERCENTILES
+from .report import QUICK_REFERENCE_LIMITS
+from .simulator import AnchorSimulator, CostSimulator
+
+DIMENSIONS = ("model", "tenant", "region", "plan")
+FORMAT = "p99-cube"
+FORMAT_VERSION = 2
+# Heaviest users kept exactly per cell: the top 1% of cells up to 6,400 users.
+# Rollups whose top 1% is larger take the P99 population from the sketch and
+# histograms instead, so the cube stays a summary rather than a user copy.
+CUBE_TAIL_SIZE = 64
+
+# Capped cost is additive across disjoint cells at a fixed set of limits, so
+# every cell carries it on the same grid: 40 limits per decade up to 10M calls.
+SIMULATOR_LIMITS = np.unique(np.concatenate([
+    np.rint(np.geomspace(1, 10_000_000, 281)), QUICK_REFERENCE_LIMITS,
+]).astype(np.int64))
+
+
+def _normalize(filters):
+    """Hashable form of ``{dimension: values}``; empty or ``None`` values mean all."""
+    return tuple(sorted((dim, tuple(sorted(map(str, values))))
+                        for dim, values in (filters or {}).items() if values))
+
+
+class CostCube:
+    """One ``PartialAggregate`` plus capped-cost anchors per dimension combination.
+
+    Rows are per (user, combination): a user active on two models is a row
+    in each model's cell. Cells are disjoint, so any filter is answered by
+    merging the cells it selects - no per-user data is read again. Rollups
+    are memoized; ``precompute`` seeds the grand total and every single
+    dimension value, which covers the usual one-filter selection.
+    """
+
+    def __init__(self, dimensions, limits=SIMULATOR_LIMITS, tail_size=CUBE_TAIL_SIZE):
+        self.dimensions = tuple(dimensions)
+        self.limits = np.asarray(limits, dtype=np.int64)
+        self.tail_size = tail_size
+        self.cells = {}   # key tuple -> PartialAggregate
+        self.capped = {}  # key tuple -> (2, len(limits)) capped cost, users affected
+        self._rollups = {}
+
+    @classmethod
+    def from_file(cls, path, dimensions=DIMENSIONS, chunk_rows=1_000_000, **kwargs):
+        """Stream a per-user file with dimension columns into a cube.
+
+        Dimensions missing from the file are skipped.
+        """
+        path = Path(path)
+        if path.is_dir() or path.suffix in PARQUET_SUFFIXES:
+            import pyarrow.dataset as ds
+            present = set(ds.dataset(path, format="parquet").schema.names)
+        else:
+            import pandas as pd
+            present = set(pd.read_csv(path, nrows=0).columns)
+        dimensions = [d for d in dimensions if d in present]
+        if not dimensions:
+            raise ValueError(f"{path} has none of the cube dimensions")
+        cube = cls(dimensions, **kwargs)
+        for chunk in iter_chunks(path, columns=[CALLS, COST, *dimensions], chunk_rows=chunk_rows):
+            cube.update(chunk[CALLS].to_numpy(np.int64), chunk[COST].to_numpy(np.float64),
+                        {d: chunk[d].to_numpy() for d in dimensions})
+        return cube.precompute()
+
+    def update(self, calls, cost, dims):
+        """Fold in per-user rows; ``dims`` maps each dimension to a column of values."""
+        import pandas as pd
+        codes, uniques = zip(*(pd.factorize(np.asarray(dims[d]).astype(str)) for d in self.dimensions))
+        combined = np.zeros(len(calls), dtype=np.int64)
+        for code, values in zip(codes, uniques):
+            combined = combined * len(values) + code
+        keys, inverse = np.unique(combined, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+        for g, packed in enumerate(keys):
+            rows = order[bounds[g]:bounds[g + 1]]
+            key = []
+            for values in reversed(uniques):
+                packed, code = divmod(int(packed), len(values))
+                key.append(str(values[code]))
+            key = tuple(reversed(key))
+            self._add(key, calls[rows], cost[rows])
+        self._rollups.clear()
+        return self
+
+    def _add(self, key, calls, cost):
+        agg = self.cells.get(key)
+        if agg is None:
+            agg = self.cells[key] = PartialAggregate(tail_size=self.tail_size)
+            self.capped[key] = np.zeros((2, len(self.limits)))
+        agg.update(calls, cost)
+        sweep = CostSimulator(calls, cost).sweep(self.limits)
+        self.capped[key] += np.vstack([sweep['capped_cost'], sweep['users_affected']])
+
+    def values(self, dimension):
+        i = self.dimensions.index(dimension)
+        return sorted({key[i] for key in self.cells})
+
+    def _select(self, filters):
+        wanted = [(self.dimensions.index(dim), set(values)) for dim, values in filters]
+        return [key for key in self.cells if all(key[i] in values for i, values in wanted)]
+
+    def rollup(self, filters=None):
+        """Merged aggregate and capped-cost anchors over the cells matching ``filters``.
+
+        Returns ``(None, None)`` if nothing matches.
+        """
+        filters = _normalize(filters)
+        if filters not in self._rollups:
+            keys = self._select(filters)
+            if not keys:
+                return None, None
+            self._rollups[filters] = (merge_all(self.cells[k] for k in keys),
+                                      sum(self.capped[k] for k in keys))
+        return self._rollups[filters]
+
+    def precompute(self):
+        """Seed the grand total and every one-dimension rollup."""
+        self.rollup()
+        for dim in self.dimensions:
+            for value in self.values(dim):
+                self.rollup({dim: [value]})
+        return self
+
+    def dashboard(self, filters=None, percentiles=PERCENTILES):
+        aggregate, _ = self.rollup(filters)
+        if aggregate is None:
+            raise ValueError("No users match the filters")
+        return aggregate.to_dashboard(percentiles)
+
+    def simulator(self, filters=None):
+        """Capped-cost simulator interpolated between the cube's fixed limits."""
+        aggregate, capped = self.rollup(filters)
+        if aggregate is None:
+            raise ValueError("No users match the filters")
+        max_calls = int(aggregate.tail_calls.max())
+        keep = self.limits <= max(max_calls, 2)
+        limits = np.append(self.limits[keep], max_calls)
+        cost_at = dict(zip(limits.tolist(), np.append(capped[0][keep], aggregate.total_cost)))
+        affected_at = dict(zip(limits.tolist(), np.append(capped[1][keep], 0)))
+        return AnchorSimulator(cost_at, affected_at, aggregate.total_cost, aggregate.count, max_calls=max_calls)
+
+    # -------------------------------------------------------------------------
+    # Serialization
+    # -------------------------------------------------------------------------
+
+    def save(self, path):
+        """Write the cube as one compressed NumPy archive, a column per field across cells."""
+        keys = list(self.cells)
+        aggs = [self.cells[k] for k in keys]
+        template = aggs[0] if aggs else PartialAggregate(tail_size=self.tail_size)
+        if any(a.distribution_buckets != template.distribution_buckets or a.p99_buckets != template.p99_buckets
+               for a in aggs):
+            raise ValueError("Every cell must use the same buckets")
+        sketches = [a.sketch for a in aggs]
+        meta = {
+            'format': FORMAT,
+            'format_version': FORMAT_VERSION,
+            'dimensions': list(self.dimensions),
+            'tail_size': self.tail_size,
+            'distribution_buckets': {'edges': list(template.distribution_buckets.edges),
+                                     'labels': list(template.distribution_buckets.labels)},
+            'p99_buckets': {'edges': list(template.p99_buckets.edges),
+                            'labels': list(template.p99_buckets.labels)},
+            'relative_accuracy': template.sketch.relative_accuracy,
+            'max_bins': template.sketch.max_bins,
+        }
+        n, dims = len(keys), len(self.dimensions)
+        arrays = {
+            'meta': np.array(json.dumps(meta)),
+            'keys': np.array(keys, dtype=str).reshape(n, dims),
+            'limits': self.limits,
+            # Capped cost in float32 (1e-7 relative) roughly halves the largest array.
+            'capped_cost': np.array([self.capped[k][0] for k in keys], dtype=np.float32).reshape(n, -1),
+            'users_affected': np.array([self.capped[k][1] for k in keys], dtype=np.int64).reshape(n, -1),
+            'dist': np.array([a.dist for a in aggs]).reshape(n, 3, len(template.distribution_buckets)),
+            'p99': np.array([a.p99 for a in aggs]).reshape(n, 3, len(template.p99_buckets)),
+            'count': np.array([a.count for a in aggs], dtype=np.int64),
+            'total_calls': np.array([a.total_calls for a in aggs], dtype=np.int64),
+            'total_cost': np.array([a.total_cost for a in aggs], dtype=np.float64),
+            'tail_sizes': np.array([len(a.tail_calls) for a in aggs], dtype=np.int64),
+            'tail_calls': np.concatenate([a.tail_calls for a in aggs] or [np.zeros(0, dtype=np.int64)]),
+            'tail_cost': np.concatenate([a.tail_cost for a in aggs] or [np.zeros(0)]),
+            'sketch_sizes': np.array([len(sk._bins) for sk in sketches], dtype=np.int64),
+            'sketch_bins': np.concatenate([sk._bins for sk in sketches] or [np.zeros(0, dtype=np.int64)]),
+            'sketch_offset': np.array([sk._offset for sk in sketches], dtype=np.int64),
+            'sketch_zero_count': np.array([sk.zero_count for sk in sketches], dtype=np.int64),
+            'sketch_count': np.array([sk.count for sk in sketches], dtype=np.int64),
+            'sketch_min': np.array([sk.min if sk.count else 0 for sk in sketches], dtype=np.float64),
+            'sketch_max': np.array([sk.max if sk.count else 0 for sk in sketches], dtype=np.float64),
+        }
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def _from_arrays(cls, z):
+        # Every ``NpzFile`` lookup decompresses the array again: read each once.
+        z = {name: z[name] for name in z.files}
+        meta = json.loads(str(z['meta']))
+        if meta.get('format') != FORMAT or meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError("Not a p99 cost cube (or an unsupported version)")
+        cube = cls(meta['dimensions'], z['limits'], meta['tail_size'])
+        buckets = {name: {'edges': meta[name]['edges'], 'labels': meta[name]['labels']}
+                   for name in ('distribution_buckets', 'p99_buckets')}
+        tails = np.cumsum(np.concatenate([[0], z['tail_sizes']]))
+        bins = np.cumsum(np.concatenate([[0], z['sketch_sizes']]))
+        tail_calls, tail_cost, sketch_bins = z['tail_calls'], z['tail_cost'], z['sketch_bins']
+        for i, key in enumerate(z['keys'].tolist()):
+            key = tuple(key)
+            cube.cells[key] = PartialAggregate.from_dict(dict(
+                buckets,
+                tail_size=meta['tail_size'],
+                sketch={
+                    'relative_accuracy': meta['relative_accuracy'],
+                    'max_bins': meta['max_bins'],
+                    'offset': int(z['sketch_offset'][i]),
+                    'bins': sketch_bins[bins[i]:bins[i + 1]],
+                    'zero_count': int(z['sketch_zero_count'][i]),
+                    'count': int(z['sketch_count'][i]),
+                    'min': float(z['sketch_min'][i]),
+                    'max': float(z['sketch_max'][i]),
+                },
+                dist=z['dist'][i],
+                p99=z['p99'][i],
+                count=int(z['count'][i]),
+                total_calls=int(z['total_calls'][i]),
+                total_cost=float(z['total_cost'][i]),
+                tail_calls=tail_calls[tails[i]:tails[i + 1]],
+                tail_cost=tail_cost[tails[i]:tails[i + 1]],
+            ))
+            cube.capped[key] = np.vstack([z['capped_cost'][i], z['users_affected'][i]]).astype(np.float64)
+        return cube
+
+
+def load_cube(path):
+    """Load a cube written by ``CostCube.save`` and seed its rollups."""
+    try:
+        with np.load(path) as z:
+            cube = CostCube._from_arrays(z)
+    except (OSError, ValueError, KeyError) as exc:
+        raise ValueError(f"{path} is not a p99 cost cube (or an unsupported version)") from exc
+    cube.version = file_version(path)
+    return cube.precompute()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m p99.cube",
+        description="Build a cost cube (per-dimension aggregates) from per-user rows with dimension columns.")
+    parser.add_argument("source", help="Per-user Parquet/CSV with llm_calls, cost and dimension columns")
+    parser.add_argument("out", help="Output cube (.npz)")
+    parser.add_argument("--dimensions", nargs="+", default=list(DIMENSIONS))
+    parser.add_argument("--tail-size", type=int, default=CUBE_TAIL_SIZE,
+                        help="Heaviest users kept exactly per cell")
+    args = parser.parse_args(argv)
+
+    cube = CostCube.from_file(args.source, args.dimensions, tail_size=args.tail_size)
+    cube.save(args.out)
+    users = sum(agg.count for agg in cube.cells.values())
+    print(f"Wrote {len(cube.cells):,} cells over {', '.join(cube.dimensions)} ({users:,} rows) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Per-user rows (user_id, llm_calls, cost) loaded into NumPy arrays
+"""
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+USER_ID = "user_id"
+CALLS = "llm_calls"
+COST = "cost"
+COLUMNS = (USER_ID, CALLS, COST)
+
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+CSV_SUFFIXES = {".csv", ".gz", ".bz2", ".zst"}
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+JSONL_BLOCK_SIZE = 16 << 20  # bytes of lines parsed per block
+
+
+@dataclass
+class UserData:
+    """Column arrays for one row per user.
+
+    ``user_ids`` may instead hold integer codes into ``id_dictionary`` (as
+    read from a snapshot); ``ids()`` always returns the real ids.
+    """
+    user_ids: np.ndarray
+    calls: np.ndarray
+    cost: np.ndarray
+    id_dictionary: np.ndarray = None
+
+    def __post_init__(self):
+        self.calls = np.asarray(self.calls)
+        # float32 costs (e.g. memory-mapped from a snapshot) are kept as-is.
+        self.cost = np.asarray(self.cost)
+        if self.cost.dtype.kind != 'f':
+            self.cost = self.cost.astype(np.float64)
+        if self.user_ids is None:
+            self.user_ids = np.arange(len(self.calls))
+        if not (len(self.user_ids) == len(self.calls) == len(self.cost)):
+            raise ValueError("user_ids, calls and cost must have the same length")
+
+    def __len__(self):
+        return len(self.calls)
+
+    def ids(self, index=slice(None)):
+        """User ids of the rows at ``index``, decoded through the dictionary if any."""
+        ids = self.user_ids[index]
+        if self.id_dictionary is None:
+            return ids
+        ids = self.id_dictionary[ids]
+        if ids.dtype.kind == 'S':
+            ids = np.char.decode(ids, 'utf-8')
+        return ids
+
+    @classmethod
+    def from_frame(cls, df):
+        missing = [c for c in COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        return cls(
+            user_ids=df[USER_ID].to_numpy(),
+            calls=df[CALLS].to_numpy(dtype=np.int64),
+            cost=df[COST].to_numpy(dtype=np.float64),
+        )
+
+
+def _read_csv(path):
+    import pandas as pd
+    try:
+        import pyarrow  # noqa: F401
+        engine = "pyarrow"
+    except ImportError:
+        engine = "c"
+    return pd.read_csv(path, usecols=list(COLUMNS), engine=engine)
+
+
+def is_jsonl(path):
+    """JSON-lines file, possibly compressed (``calls.jsonl.gz``)."""
+    return any(suffix in JSONL_SUFFIXES for suffix in Path(path).suffixes)
+
+
+def _jsonl_schema(path, columns):
+    import json
+    import pyarrow as pa
+    types = {CALLS: pa.int64(), COST: pa.float64()}
+    missing = [c for c in columns if c not in types]
+    if missing:
+        # Ids may be JSON numbers or strings; the first record decides.
+        head = b""
+        with pa.input_stream(str(path), compression='detect') as f:
+            while b"\n" not in head.lstrip():
+                block = f.read(1 << 16)
+                if not block:
+                    break
+                head += block
+        first = head.lstrip().split(b"\n", 1)[0]
+        record = json.loads(first) if first.strip() else {}
+        for c in missing:
+            types[c] = pa.int64() if isinstance(record.get(c), int) else pa.string()
+    return pa.schema([(c, types[c]) for c in columns])
+
+
+def iter_jsonl_batches(path, columns=COLUMNS, block_size=JSONL_BLOCK_SIZE):
+    """Yield Arrow record batches of ``columns`` from a JSON-lines file.
+
+    Arrow parses each block of lines in one pass; fields outside ``columns``
+    are skipped rather than converted, and no Python object is created per
+    line. Memory is one block at a time.
+    """
+    import pyarrow as pa
+    import pyarrow.json as pj
+    columns = list(columns)
+    parse_options = pj.ParseOptions(explicit_schema=_jsonl_schema(path, columns), unexpected_field_behavior="ignore")
+    read_options = pj.ReadOptions(block_size=block_size)
+    stream = pa.input_stream(str(path), compression='detect')
+    if not hasattr(pj, "open_json"):
+        # pyarrow < 19 has no streaming reader: parse the whole file at once.
+        yield from pj.read_json(stream, read_options=read_options, parse_options=parse_options).to_batches()
+        return
+    with pj.open_json(stream, read_options=read_options, parse_options=parse_options) as reader:
+        yield from reader
+
+
+def iter_chunks(path, columns=COLUMNS, chunk_rows=1_000_000):
+    """Yield DataFrames of at most ``chunk_rows`` rows without loading the whole file."""
+    path = Path(path)
+    columns = list(columns)
+    if path.is_dir() or path.suffix in PARQUET_SUFFIXES:
+        import pyarrow.dataset as ds
+        for batch in ds.dataset(path, format="parquet").to_batches(columns=columns, batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif is_jsonl(path):
+        for batch in iter_jsonl_batches(path, columns):
+            for start in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(start, chunk_rows).to_pandas()
+    elif path.suffix in CSV_SUFFIXES:
+        import pandas as pd
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+    else:
+        raise ValueError(f"Unsupported data file: {path}")
+
+
+def file_version(path):
+    """Cheap content version of a data file or directory (paths, sizes, mtimes).
+
+    Used as a cache key: it changes whenever any file is rewritten.
+    """
+    from .snapshot import is_snapshot, snapshot_version
+    path = Path(path)
+    if is_snapshot(path):
+        return snapshot_version(path)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    h = hashlib.sha1()
+    for f in files:
+        stat = f.stat()
+        h.update(f"{f}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def load_users(path):
+    """Read per-user rows from a snapshot, a Parquet file/directory, a CSV or a JSON-lines file."""
+    from .snapshot import is_snapshot, open_snapshot
+    path = Path(path)
+    if is_snapshot(path):
+        return open_snapshot(path)
+    if path.is_dir() or path.suffix in PARQUET_SUFFIXES:
+        import pandas as pd
+        df = pd.read_parquet(path, columns=list(COLUMNS))
+    elif is_jsonl(path):
+        import pandas as pd
+        df = pd.concat(iter_chunks(path), ignore_index=True)
+    elif path.suffix in CSV_SUFFIXES:
+        df = _read_csv(path)
+    else:
+        raise ValueError(f"Unsupported data file: {path}")
+    return UserData.from_frame(df)
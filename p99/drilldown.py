@@ -0,0 +1,132 @@
+"""
+Sorted per-user index for paging through and searching the heaviest users
+"""
+
+import numpy as np
+
+PAGE_SIZE = 50
+SORTS = ("calls", "cost", "cost_per_call")
+
+
+def user_row(rank, user_id, calls, cost):
+    """One drill-down table row."""
+    return {
+        'rank': int(rank),
+        'user_id': user_id,
+        'calls': int(calls),
+        'cost': round(float(cost), 4),
+        'cost_per_call': round(float(cost) / max(int(calls), 1), 6),
+    }
+
+
+class UserIndex:
+    """Users ordered by calls, so any call range is a contiguous slice.
+
+    A range ``[min_calls, max_calls)`` is two binary searches into the
+    sorted calls and a page is a slice of it, so paging costs the page
+    size, not the user count. Other sort keys argsort just the range's
+    users, once per range. User id lookups go through the snapshot's
+    sorted id dictionary when there is one, else a hash index built on
+    the first search.
+    """
+
+    def __init__(self, users, order=None):
+        self.users = users
+        # ``order`` may be shared with a CostSimulator that already sorted the users.
+        self.order = np.argsort(users.calls, kind='stable') if order is None else order
+        self.sorted_calls = np.asarray(users.calls)[self.order]
+        self._range_orders = {}
+        self._id_index = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def _bounds(self, min_calls, max_calls=None):
+        start = int(np.searchsorted(self.sorted_calls, min_calls, side='left'))
+        stop = len(self) if max_calls is None else int(np.searchsorted(self.sorted_calls, max_calls, side='left'))
+        return start, max(start, stop)
+
+    def count(self, min_calls, max_calls=None):
+        start, stop = self._bounds(min_calls, max_calls)
+        return stop - start
+
+    def _range_order(self, start, stop, sort):
+        # Rows of the range by ``sort``, descending; memoized per range.
+        key = (start, stop, sort)
+        if key not in self._range_orders:
+            rows = self.order[start:stop]
+            cost = np.asarray(self.users.cost[rows], dtype=np.float64)
+            values = cost if sort == "cost" else cost / np.maximum(self.sorted_calls[start:stop], 1)
+            self._range_orders[key] = rows[np.argsort(-values, kind='stable')]
+            if len(self._range_orders) > 16:
+                self._range_orders.pop(next(iter(self._range_orders)))
+        return self._range_orders[key]
+
+    def page(self, min_calls, max_calls=None, offset=0, limit=PAGE_SIZE, sort="calls"):
+        """``(users in range, rows)`` for ``limit`` users from ``offset``, heaviest first by ``sort``."""
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r}; expected one of {', '.join(SORTS)}")
+        start, stop = self._bounds(min_calls, max_calls)
+        offset = max(0, int(offset))
+        if sort == "calls":
+            # Descending calls is the ascending slice read backwards.
+            hi = max(start, stop - offset)
+            rows = self.order[max(start, hi - limit):hi][::-1]
+        else:
+            rows = self._range_order(start, stop, sort)[offset:offset + limit]
+        return stop - start, self._rows(rows, ranks=np.arange(offset + 1, offset + 1 + len(rows)))
+
+    def _rows(self, rows, ranks):
+        ids = self.users.ids(rows).tolist()
+        calls = self.users.calls[rows].tolist()
+        cost = self.users.cost[rows].tolist()
+        return [user_row(*row) for row in zip(ranks, ids, calls, cost)]
+
+    def _row_of(self, user_id):
+        users = self.users
+        if users.id_dictionary is not None:
+            # Snapshot ids: a sorted dictionary, then the row holding that code.
+            dictionary = users.id_dictionary
+            if dictionary.dtype.kind == 'S':
+                key = str(user_id).encode('utf-8')
+            else:
+                try:
+                    key = int(user_id)
+                except ValueError:
+                    return None
+            code = int(np.searchsorted(dictionary, key))
+            if code >= len(dictionary) or dictionary[code] != key:
+                return None
+            if self._id_index is None:
+                # One row per user, so codes are a permutation: invert it.
+                self._id_index = np.full(len(dictionary), -1, dtype=np.int64)
+                self._id_index[np.asarray(users.user_ids, dtype=np.int64)] = np.arange(len(users))
+            row = int(self._id_index[code])
+            return row if row >= 0 else None
+        if self._id_index is None:
+            import pandas as pd
+            self._id_index = pd.Index(users.user_ids)
+        for key in (user_id, *_numeric(user_id)):
+            row = self._id_index.get_indexer([key])[0]
+            if row >= 0:
+                return int(row)
+        return None
+
+    def find(self, user_id):
+        """Row for ``user_id`` with its rank by calls, or ``None``.
+
+        Ties share a rank: 1 + the number of users with more calls.
+        """
+        row = self._row_of(user_id)
+        if row is None:
+            return None
+        heavier = len(self) - int(np.searchsorted(self.sorted_calls, self.users.calls[row], side='right'))
+        return self._rows(np.array([row]), ranks=[heavier + 1])[0]
+
+
+def _numeric(text):
+    # Ids typed into a search box arrive as text; integer ids also match as ints.
+    try:
+        return (int(text),)
+    except (TypeError, ValueError):
+        return ()
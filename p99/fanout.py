@@ -0,0 +1,65 @@
+"""
+Concurrent fan-out of the dashboard's independent backend queries
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .backends import assemble_dashboard
+from .buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS
+from .metrics import PERCENTILES
+
+
+class DashboardFanout:
+    """Issue every dataset query at once and hand results out as they land.
+
+    Time-to-data is the slowest query instead of the sum of all of them, and
+    callers can render whatever has already arrived. Datasets:
+
+    - ``totals``: user/call/cost totals and max calls
+    - ``summary``: percentiles, P99 threshold, P99 totals and internals
+    - ``distribution`` / ``p99_distribution``: bucket totals
+    - ``simulator``: a cost simulator ready for any limit
+    - ``sketch``: quantile sketch for on-demand percentiles (may be ``None``)
+    - ``lorenz``: Lorenz curve of per-user cost (may be ``None``)
+    """
+
+    def __init__(self, backend, percentiles=PERCENTILES, max_workers=6):
+        self.backend = backend
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="p99-fanout")
+        self.futures = {
+            'summary': self._pool.submit(backend.percentile_summary, percentiles),
+            'totals': self._pool.submit(backend.totals),
+            'distribution': self._pool.submit(backend.bucket_totals, DISTRIBUTION_BUCKETS),
+            'p99_distribution': self._pool.submit(backend.bucket_totals, P99_BUCKETS),
+            'simulator': self._pool.submit(backend.simulator),
+            'sketch': self._pool.submit(backend.sketch),
+            'lorenz': self._pool.submit(backend.lorenz),
+        }
+        self._pool.shutdown(wait=False)
+
+    def ready(self, names):
+        return all(self.futures[n].done() for n in names)
+
+    def result(self, name, timeout=None):
+        """Block until ``name`` arrives; re-raises the query's exception."""
+        return self.futures[name].result(timeout)
+
+    def wait_any(self, names, timeout=None):
+        """Block until at least one of ``names`` has finished."""
+        pending = [self.futures[n] for n in names if not self.futures[n].done()]
+        if pending:
+            wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+    def _done(self, name):
+        future = self.futures[name]
+        return future.result() if future.done() else None
+
+    def dashboard(self):
+        """Dashboard over the datasets that have arrived so far."""
+        return assemble_dashboard(
+            totals=self._done('totals'),
+            summary=self._done('summary'),
+            distribution=self._done('distribution'),
+            p99_distribution=self._done('p99_distribution'),
+            sketch=self._done('sketch'),
+        )
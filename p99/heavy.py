@@ -0,0 +1,196 @@
+"""
+Streaming heavy hitters: the top users by calls over a call-event stream in bounded memory
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import COST, USER_ID, iter_chunks
+from .parallel import EVENT_COLUMNS
+
+CAPACITY = 4096
+FORMAT = "p99-heavy-hitters"
+FORMAT_VERSION = 1
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters over call events, fed a batch at a time.
+
+    At most ``capacity`` users are monitored. Each batch is counted exactly
+    (one factorize and bincount) and merged in: a user already monitored
+    adds its batch calls; a new one enters at ``floor`` - the smallest
+    monitored count, the most an unmonitored user can have - and the
+    ``capacity`` largest are kept. Merging two summaries works the same
+    way, so shards can be summarised separately and combined.
+
+    Guarantees: a monitored count over-estimates the true calls by at most
+    its ``error``, which is at most ``floor`` <= events / capacity, and any
+    user with more calls than ``floor`` is monitored. Cost is what was seen
+    while the user was monitored, so it is a lower bound.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.ids = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.errors = np.zeros(0, dtype=np.int64)
+        self.cost = np.zeros(0)
+        self.events = 0
+        self.total_cost = 0.0
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def floor(self):
+        """Upper bound on the calls of any unmonitored user (0 until the summary is full)."""
+        return int(self.counts.min()) if len(self) >= self.capacity else 0
+
+    def update(self, user_ids, cost=None, calls=None):
+        """Fold in a batch of events: one call per row, or ``calls`` per row if given."""
+        user_ids = np.asarray(user_ids)
+        if not len(user_ids):
+            return self
+        codes, uniques = pd.factorize(user_ids, sort=False)
+        n = len(uniques)
+        counts = np.bincount(codes, weights=calls, minlength=n).astype(np.int64)
+        batch_cost = np.zeros(n) if cost is None else np.bincount(codes, weights=cost, minlength=n)
+        self.events += int(counts.sum())
+        self.total_cost += float(batch_cost.sum())
+        self._merge(np.asarray(uniques), counts, np.zeros(n, dtype=np.int64), batch_cost, 0)
+        return self
+
+    def merge(self, other):
+        """Fold in another summary (e.g. from another shard of the stream)."""
+        if other.ids is not None:
+            self.events += other.events
+            self.total_cost += other.total_cost
+            self._merge(other.ids, other.counts, other.errors, other.cost, other.floor)
+        return self
+
+    def _merge(self, ids, counts, errors, cost, other_floor):
+        if self.ids is None:
+            self.ids = ids[:0]
+        floor = self.floor
+        n_self = len(self)
+        codes, uniques = pd.factorize(np.concatenate([self.ids, ids]), sort=False)
+        m = len(uniques)
+        in_self = np.zeros(m, dtype=bool)
+        in_self[codes[:n_self]] = True
+        in_other = np.zeros(m, dtype=bool)
+        in_other[codes[n_self:]] = True
+        # A side that does not monitor a user may still have missed up to its floor.
+        missed = np.where(in_self, 0, floor) + np.where(in_other, 0, other_floor)
+        merged_counts = np.bincount(codes, weights=np.concatenate([self.counts, counts]), minlength=m)
+        merged_errors = np.bincount(codes, weights=np.concatenate([self.errors, errors]), minlength=m)
+        merged_cost = np.bincount(codes, weights=np.concatenate([self.cost, cost]), minlength=m)
+        merged_counts = merged_counts.astype(np.int64) + missed
+        merged_errors = merged_errors.astype(np.int64) + missed
+        keep = slice(None)
+        if m > self.capacity:
+            keep = np.argpartition(-merged_counts, self.capacity - 1)[:self.capacity]
+        self.ids = np.asarray(uniques)[keep]
+        self.counts, self.errors, self.cost = merged_counts[keep], merged_errors[keep], merged_cost[keep]
+
+    def top(self, n=20):
+        """The ``n`` heaviest monitored users, as table rows.
+
+        ``calls_min`` is a guaranteed lower bound; ``guaranteed`` marks users
+        certain to be among the true top ``n`` (their lower bound beats the
+        next user's estimate).
+        """
+        if self.ids is None:
+            return []
+        order = np.argsort(-self.counts, kind='stable')
+        head = order[:n]
+        next_count = int(self.counts[order[n]]) if len(order) > n else self.floor
+        lower = self.counts - self.errors
+        return [
+            {
+                'rank': rank,
+                'user_id': self.ids[i].item() if hasattr(self.ids[i], 'item') else self.ids[i],
+                'calls': int(self.counts[i]),
+                'calls_min': int(lower[i]),
+                'cost': round(float(self.cost[i]), 4),
+                'guaranteed': bool(lower[i] >= next_count),
+            }
+            for rank, i in enumerate(head, start=1)
+        ]
+
+    # -------------------------------------------------------------------------
+    # Serialization
+    # -------------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'format': FORMAT,
+            'format_version': FORMAT_VERSION,
+            'capacity': self.capacity,
+            'events': self.events,
+            'total_cost': self.total_cost,
+            'ids': [] if self.ids is None else self.ids.tolist(),
+            'counts': self.counts.tolist(),
+            'errors': self.errors.tolist(),
+            'cost': self.cost.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get('format') != FORMAT or d.get('format_version') != FORMAT_VERSION:
+            raise ValueError("Not a p99 heavy-hitters summary (or an unsupported version)")
+        summary = cls(d['capacity'])
+        summary.events, summary.total_cost = d['events'], d['total_cost']
+        if d['ids']:
+            summary.ids = np.asarray(d['ids'])
+            summary.counts = np.asarray(d['counts'], dtype=np.int64)
+            summary.errors = np.asarray(d['errors'], dtype=np.int64)
+            summary.cost = np.asarray(d['cost'], dtype=np.float64)
+        return summary
+
+    def save(self, path):
+        """Write atomically, so a dashboard polling the file never reads half of it."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.to_dict(), f)
+        tmp.replace(path)
+
+
+def load_heavy_hitters(path):
+    with open(path) as f:
+        return SpaceSaving.from_dict(json.load(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m p99.heavy",
+        description="Fold call-event files (one row per LLM call) into a heavy-hitters summary.")
+    parser.add_argument("summary", help="Summary JSON; created if missing, else updated in place")
+    parser.add_argument("events", nargs="+", help="Parquet/CSV call logs with user_id and cost columns")
+    parser.add_argument("--capacity", type=int, default=CAPACITY,
+                        help="Users monitored; counts are within events/capacity")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--top", type=int, default=10, help="Users to print afterwards")
+    args = parser.parse_args(argv)
+
+    path = Path(args.summary)
+    summary = load_heavy_hitters(path) if path.exists() else SpaceSaving(args.capacity)
+    for events in args.events:
+        for chunk in iter_chunks(events, EVENT_COLUMNS, chunk_rows=args.chunk_rows):
+            summary.update(chunk[USER_ID].to_numpy(), chunk[COST].to_numpy())
+        summary.save(path)
+    print(f"{summary.events:,} events, {len(summary):,} users monitored, "
+          f"counts within {summary.floor:,} calls")
+    for row in summary.top(args.top):
+        mark = "" if row['guaranteed'] else " ?"
+        print(f"{row['rank']:>4}  {row['user_id']}  {row['calls']:,} calls (>= {row['calls_min']:,}){mark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Incremental daily updates of per-user totals and the dashboard aggregates
+"""
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import PartialAggregate
+from .buckets import bucket_totals
+from .data import CALLS, COLUMNS, COST, USER_ID, UserData, iter_chunks
+from .parallel import group_by_user
+
+
+class IncrementalState:
+    """Month-to-date per-user totals plus the aggregates derived from them.
+
+    ``apply_day`` takes one day's per-user call/cost deltas and adjusts the
+    totals, bucket histograms, quantile sketch and heaviest-user tail for the
+    users active that day only, so a daily refresh costs O(active users)
+    rather than a rescan of the month.
+    """
+
+    # New user ids are looked up in a small side index until it grows past
+    # this fraction of the main one, which is then rebuilt.
+    REBUILD_FRACTION = 0.1
+
+    def __init__(self, aggregate=None):
+        self.aggregate = aggregate or PartialAggregate()
+        self.user_ids = np.zeros(0, dtype=object)
+        self.calls = np.zeros(0, dtype=np.int64)
+        self.cost = np.zeros(0)
+        self._size = 0
+        self._index = pd.Index([])
+        self._recent = pd.Index([])
+        self._tail_pos = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_users(cls, users, **aggregate_kwargs):
+        state = cls(PartialAggregate(**aggregate_kwargs))
+        state.user_ids = np.asarray(users.ids())
+        state.calls = np.asarray(users.calls, dtype=np.int64).copy()
+        state.cost = np.asarray(users.cost, dtype=np.float64).copy()
+        state._size = len(state.calls)
+        state._index = pd.Index(state.user_ids)
+        state.aggregate.update(state.calls, state.cost)
+        state._set_tail(np.arange(state._size))
+        return state
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def users(self):
+        """Current month-to-date totals as ``UserData`` (views, not copies)."""
+        n = self._size
+        return UserData(self.user_ids[:n], self.calls[:n], self.cost[:n])
+
+    # -------------------------------------------------------------------------
+    # User-id index
+    # -------------------------------------------------------------------------
+
+    def _lookup(self, ids):
+        pos = self._index.get_indexer(ids)
+        missing = pos < 0
+        if missing.any() and len(self._recent):
+            recent = self._recent.get_indexer(ids[missing])
+            pos[missing] = np.where(recent >= 0, recent + len(self._index), -1)
+        return pos
+
+    def _append(self, ids):
+        """Give new users the next dense positions, growing storage geometrically."""
+        start, end = self._size, self._size + len(ids)
+        if end > len(self.calls):
+            capacity = max(end, 2 * len(self.calls), 1024)
+            if start == 0:
+                dtype = ids.dtype
+            else:
+                dtype = self.user_ids.dtype if ids.dtype == self.user_ids.dtype else object
+            self.user_ids = np.concatenate([self.user_ids[:start].astype(dtype), np.empty(capacity - start, dtype=dtype)])
+            self.calls = np.concatenate([self.calls[:start], np.zeros(capacity - start, dtype=np.int64)])
+            self.cost = np.concatenate([self.cost[:start], np.zeros(capacity - start)])
+        self.user_ids[start:end] = ids
+        self._size = end
+        self._recent = self._recent.append(pd.Index(ids))
+        if len(self._recent) > self.REBUILD_FRACTION * max(len(self._index), 1):
+            self._index = pd.Index(self.user_ids[:end])
+            self._recent = pd.Index([])
+        return np.arange(start, end)
+
+    # -------------------------------------------------------------------------
+    # Updates
+    # -------------------------------------------------------------------------
+
+    def apply_day(self, user_ids, calls, cost):
+        """Fold in one day's per-user deltas (rows may repeat a user)."""
+        ids, d_calls, d_cost = group_by_user(np.asarray(user_ids), np.asarray(cost, dtype=np.float64),
+                                             np.asarray(calls, dtype=np.int64))
+        pos = self._lookup(ids)
+        new = pos < 0
+        if new.any():
+            pos[new] = self._append(ids[new])
+
+        old_calls, old_cost = self.calls[pos], self.cost[pos]
+        new_calls, new_cost = old_calls + d_calls, old_cost + d_cost
+        self.calls[pos], self.cost[pos] = new_calls, new_cost
+
+        agg = self.aggregate
+        existed = ~new
+        for hist, buckets in ((agg.dist, agg.distribution_buckets), (agg.p99, agg.p99_buckets)):
+            hist -= _bucket_sums(buckets, old_calls[existed], old_cost[existed])
+            hist += _bucket_sums(buckets, new_calls, new_cost)
+        agg.sketch.remove(old_calls[existed])
+        agg.sketch.update(new_calls)
+        agg.count += int(new.sum())
+        agg.total_calls += int(d_calls.sum())
+        agg.total_cost += float(d_cost.sum())
+
+        # Totals only grow, so today's top-K is among yesterday's top-K and
+        # today's active users.
+        self._set_tail(pd.unique(np.concatenate([self._tail_pos, pos])))
+        return self
+
+    def _set_tail(self, candidates):
+        k = self.aggregate.tail_size
+        if len(candidates) > k:
+            top = np.argpartition(self.calls[candidates], len(candidates) - k)[-k:]
+            candidates = candidates[top]
+        self._tail_pos = candidates
+        self.aggregate.tail_calls = self.calls[candidates].copy()
+        self.aggregate.tail_cost = self.cost[candidates].copy()
+
+    def apply_file(self, path, chunk_rows=1_000_000):
+        """Fold in a day's per-user delta file with the usual user_id/llm_calls/cost columns."""
+        for chunk in iter_chunks(path, COLUMNS, chunk_rows=chunk_rows):
+            self.apply_day(chunk[USER_ID].to_numpy(), chunk[CALLS].to_numpy(), chunk[COST].to_numpy())
+        return self
+
+    def dashboard(self):
+        return self.aggregate.to_dashboard()
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def save(self, path):
+        """Write totals and aggregates to one ``.npz`` file."""
+        n = self._size
+        np.savez(path, user_ids=self.user_ids[:n], calls=self.calls[:n], cost=self.cost[:n],
+                 tail_pos=self._tail_pos, aggregate=np.array(self.aggregate.dumps()))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as z:
+            state = cls(PartialAggregate.loads(str(z['aggregate'])))
+            state.user_ids = z['user_ids']
+            state.calls = z['calls'].copy()
+            state.cost = z['cost'].copy()
+            state._tail_pos = z['tail_pos']
+        state._size = len(state.calls)
+        state._index = pd.Index(state.user_ids)
+        return state
+
+
+def _bucket_sums(buckets, calls, cost):
+    return np.vstack(bucket_totals(calls, cost, buckets))
@@ -0,0 +1,107 @@
+"""
+Exact Lorenz curve, Gini coefficient and top-k% cost shares
+"""
+
+import numpy as np
+
+LORENZ_POINTS = 2000  # points sent to the browser, whatever the user count
+TOP_SHARES = (0.1, 1, 5, 10, 20, 50)
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points that keep the shape of ``(x, y)``.
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept and
+    every bucket in between contributes the point forming the largest
+    triangle with the previously kept point and the next bucket's mean.
+    ``x=None`` means evenly spaced x (the index), without materialising it.
+    Only one bucket is ever sliced at a time, so ``y`` may be a memory map.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs at least 3 output points")
+
+    def xs(start, stop):
+        return np.arange(start, stop, dtype=np.float64) if x is None else np.asarray(x[start:stop], dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nxt_lo, nxt_hi = hi, min(int((i + 2) * every) + 1, n)
+        avg_x = xs(nxt_lo, nxt_hi).mean()
+        avg_y = np.asarray(y[nxt_lo:nxt_hi], dtype=np.float64).mean()
+        ax, ay = xs(a, a + 1)[0], float(y[a])
+        area = np.abs((ax - avg_x) * (np.asarray(y[lo:hi], dtype=np.float64) - ay)
+                      - (ax - xs(lo, hi)) * (avg_y - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+class LorenzCurve:
+    """Cumulative cost of users sorted by cost, cheapest first.
+
+    ``cum_cost[j]`` is the total cost of the ``ranks[j]`` cheapest users.
+    Built from per-user costs the curve has every user (``ranks`` is
+    ``None``, meaning ``0..n``); a SQL backend sends a sample of ranks
+    instead and the curve is interpolated between them. ``gini`` is exact
+    either way.
+    """
+
+    def __init__(self, cum_cost, users, gini, ranks=None):
+        self.cum_cost = np.asarray(cum_cost, dtype=np.float64)
+        self.users = int(users)
+        self.total_cost = float(self.cum_cost[-1]) if len(self.cum_cost) else 0.0
+        self.gini = float(gini)
+        self.ranks = None if ranks is None else np.asarray(ranks, dtype=np.float64)
+
+    @classmethod
+    def from_costs(cls, cost):
+        n = len(cost)
+        if n == 0:
+            raise ValueError("No users to summarize")
+        cum_cost = np.zeros(n + 1)
+        np.cumsum(np.sort(cost), out=cum_cost[1:], dtype=np.float64)
+        total = cum_cost[-1]
+        # G = (n + 1 - 2 * sum_i L(i/n)) / n, with L the cost share of the i cheapest.
+        gini = (n + 1 - 2 * cum_cost[1:].sum() / total) / n if total else 0.0
+        return cls(cum_cost, n, gini)
+
+    @classmethod
+    def from_users(cls, users):
+        return cls.from_costs(users.cost)
+
+    def _cost_at(self, rank):
+        """Cost of the ``rank`` cheapest users, linear between known ranks."""
+        rank = np.clip(np.asarray(rank, dtype=np.float64), 0, self.users)
+        if self.ranks is not None:
+            return np.interp(rank, self.ranks, self.cum_cost)
+        lo = np.floor(rank).astype(np.int64)
+        hi = np.minimum(lo + 1, self.users)
+        return self.cum_cost[lo] + (rank - lo) * (self.cum_cost[hi] - self.cum_cost[lo])
+
+    def top_share(self, pct):
+        """Percent of total cost from the most expensive ``pct`` percent of users."""
+        if not self.total_cost:
+            return np.zeros_like(np.asarray(pct, dtype=np.float64))
+        below = self._cost_at(self.users * (1 - np.asarray(pct, dtype=np.float64) / 100))
+        return (self.total_cost - below) / self.total_cost * 100
+
+    def top_shares(self, pcts=TOP_SHARES):
+        return [{'top_pct': p, 'cost_pct': float(s)} for p, s in zip(pcts, self.top_share(pcts))]
+
+    def points(self, max_points=LORENZ_POINTS):
+        """``(users %, cost %)`` arrays of the curve, LTTB-downsampled to ``max_points``."""
+        idx = lttb(self.ranks, self.cum_cost, max_points)
+        ranks = idx.astype(np.float64) if self.ranks is None else self.ranks[idx]
+        scale = 100 / self.total_cost if self.total_cost else 0.0
+        return ranks / self.users * 100, self.cum_cost[idx] * scale
+
+    def summary(self, pcts=TOP_SHARES):
+        return {'users': self.users, 'total_cost': self.total_cost, 'gini': self.gini,
+                'top_shares': self.top_shares(pcts)}
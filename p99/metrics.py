@@ -0,0 +1,96 @@
+"""
+Dashboard tables and key stats computed from per-user arrays
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS, bucket_table
+from .sketch import QuantileSketch
+
+PERCENTILES = (1, 5, 10, 20, 30, 40, 50, 60, 70, 75, 80, 90, 95, 99, 99.5, 99.9, 100)
+P99_INTERNAL = (("Minimum", 0), ("P25", 25), ("Median", 50), ("P75", 75), ("P90", 90), ("Maximum", 100))
+
+
+@dataclass
+class Dashboard:
+    """Everything the dashboard tabs read, in the shapes ``app.py`` uses."""
+    percentile_data: dict
+    distribution_data: list
+    p99_distribution: list
+    p99_internal: dict
+    stats: dict = field(default_factory=dict)
+    sketch: QuantileSketch = None  # for on-demand percentiles not in percentile_data
+
+    def percentile(self, p):
+        return self.percentile_data['llm_calls'][self.percentile_data['percentile'].index(p)]
+
+
+def nearest_rank(n, percentiles):
+    """Zero-based nearest-rank index of each percentile in a sample of ``n``."""
+    p = np.asarray(percentiles, dtype=np.float64)
+    return np.clip(np.ceil(p / 100 * n).astype(np.int64) - 1, 0, n - 1)
+
+
+def percentiles_of(values, percentiles):
+    """Nearest-rank percentiles via a single multi-pivot partition (no full sort)."""
+    ranks = nearest_rank(len(values), percentiles)
+    kth = np.unique(ranks)
+    return np.partition(values, kth)[ranks]
+
+
+def compute_dashboard(users, percentiles=PERCENTILES):
+    """Compute every table and KPI shown on the dashboard from ``UserData``."""
+    calls, cost = users.calls, users.cost
+    n = len(calls)
+    if n == 0:
+        raise ValueError("No users to summarize")
+    # The median and P99 feed the KPIs, so they are always computed.
+    percentiles = tuple(sorted(set(percentiles) | {50, 99}))
+
+    pct_values = percentiles_of(calls, percentiles)
+    p99_threshold = int(pct_values[percentiles.index(99)])
+
+    # The P99 population is everyone at or above the threshold; its internal
+    # percentiles come from the (small) tail, which is cheap to sort.
+    in_p99 = calls >= p99_threshold
+    p99_calls = np.sort(calls[in_p99])
+    p99_cost = cost[in_p99]
+
+    total_calls = int(calls.sum())
+    total_cost = float(cost.sum(dtype=np.float64))
+    p99_total_calls = int(p99_calls.sum())
+    p99_total_cost = float(p99_cost.sum(dtype=np.float64))
+
+    internal_ranks = nearest_rank(len(p99_calls), [p for _, p in P99_INTERNAL])
+    p99_internal = {
+        'Metric': [name for name, _ in P99_INTERNAL],
+        'Calls': [int(v) for v in p99_calls[internal_ranks]],
+    }
+
+    stats = {
+        'total_users': n,
+        'p99_threshold': p99_threshold,
+        'p99_user_count': int(in_p99.sum()),
+        'avg_calls': int(round(total_calls / n)),
+        'median_calls': int(pct_values[percentiles.index(50)]),
+        'max_calls': int(calls.max()),
+        'total_cost': total_cost,
+        'total_calls': total_calls,
+        'avg_cost_per_call': total_cost / total_calls if total_calls else 0.0,
+        'p99_total_calls': p99_total_calls,
+        'p99_total_cost': p99_total_cost,
+    }
+
+    return Dashboard(
+        percentile_data={
+            'percentile': list(percentiles),
+            'llm_calls': [int(v) for v in pct_values],
+        },
+        distribution_data=bucket_table(calls, cost, DISTRIBUTION_BUCKETS, pct_of=n),
+        p99_distribution=bucket_table(calls, cost, P99_BUCKETS),
+        p99_internal=p99_internal,
+        stats=stats,
+        sketch=QuantileSketch().update(calls),
+    )
@@ -0,0 +1,125 @@
+"""
+Process-pool ingestion of partitioned raw call logs into per-user totals
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import PartialAggregate, merge_all
+from .data import COST, USER_ID, UserData, iter_chunks
+
+EVENT_COLUMNS = (USER_ID, COST)  # one row per LLM call
+
+
+def group_by_user(user_ids, cost, calls=None):
+    """Sum calls and cost per distinct user id.
+
+    Without ``calls`` every row counts as one call; with it, rows are
+    already partial per-user counters being combined.
+    """
+    codes, uniques = pd.factorize(user_ids, sort=False)
+    n = len(uniques)
+    if calls is None:
+        user_calls = np.bincount(codes, minlength=n)
+    else:
+        user_calls = np.bincount(codes, weights=calls, minlength=n).astype(np.int64)
+    user_cost = np.bincount(codes, weights=cost, minlength=n)
+    return np.asarray(uniques), user_calls, user_cost
+
+
+def shard_of(user_ids, shards):
+    """Stable shard number per user id, the same in every process."""
+    return (pd.util.hash_array(np.asarray(user_ids)) % np.uint64(shards)).astype(np.int64)
+
+
+def _map_partition(index, path, shards, out_dir, chunk_rows):
+    """Reduce one partition to per-user counters, split into user-id shards."""
+    parts = [group_by_user(chunk[USER_ID].to_numpy(), chunk[COST].to_numpy())
+             for chunk in iter_chunks(path, EVENT_COLUMNS, chunk_rows=chunk_rows)]
+    if not parts:
+        return []
+    if len(parts) == 1:
+        ids, calls, cost = parts[0]
+    else:
+        ids, calls, cost = (np.concatenate(col) for col in zip(*parts))
+        ids, calls, cost = group_by_user(ids, cost, calls)
+
+    shard = shard_of(ids, shards)
+    order = np.argsort(shard, kind='stable')
+    bounds = np.cumsum(np.bincount(shard, minlength=shards))[:-1]
+    written = []
+    for s, idx in enumerate(np.split(order, bounds)):
+        if len(idx):
+            out = os.path.join(out_dir, f"shard{s:05d}-part{index:06d}.npz")
+            np.savez(out, ids=ids[idx], calls=calls[idx], cost=cost[idx])
+            written.append((s, out))
+    return written
+
+
+def _reduce_shard(files, as_aggregate):
+    """Combine every mapper's counters for one shard of users."""
+    ids, calls, cost = [], [], []
+    for f in files:
+        with np.load(f, allow_pickle=True) as z:
+            ids.append(z['ids'])
+            calls.append(z['calls'])
+            cost.append(z['cost'])
+    ids, calls, cost = group_by_user(np.concatenate(ids), np.concatenate(cost), np.concatenate(calls))
+    if as_aggregate:
+        return PartialAggregate().update(calls, cost)
+    return ids, calls, cost
+
+
+def _run(fn, jobs, pool):
+    if pool is None:
+        return [fn(*job) for job in jobs]
+    return list(pool.map(fn, *zip(*jobs))) if jobs else []
+
+
+def _ingest(paths, workers, shards, chunk_rows, as_aggregate):
+    paths = [str(p) for p in paths]
+    if not paths:
+        raise ValueError("No call-log partitions to ingest")
+    workers = workers or os.cpu_count() or 1
+    shards = shards or max(1, workers * 2)
+    with tempfile.TemporaryDirectory(prefix="p99-ingest-") as out_dir:
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            mapped = _run(_map_partition, [(i, p, shards, out_dir, chunk_rows) for i, p in enumerate(paths)], pool)
+            by_shard = {}
+            for written in mapped:
+                for s, f in written:
+                    by_shard.setdefault(s, []).append(f)
+            return _run(_reduce_shard, [(files, as_aggregate) for _, files in sorted(by_shard.items())], pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+
+def ingest_call_logs(paths, workers=None, shards=None, chunk_rows=2_000_000):
+    """Build per-user call and cost totals from raw call-log partitions.
+
+    Each partition (a Parquet or CSV file with one row per call) is reduced
+    to per-user counters in a worker process and split into user-id hash
+    shards; each shard is then combined in parallel. Shards hold disjoint
+    users, so the result is a plain concatenation.
+    """
+    reduced = _ingest(paths, workers, shards, chunk_rows, as_aggregate=False)
+    if not reduced:
+        return UserData(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+    ids, calls, cost = (np.concatenate(col) for col in zip(*reduced))
+    return UserData(ids, calls, cost)
+
+
+def aggregate_call_logs(paths, workers=None, shards=None, chunk_rows=2_000_000):
+    """Like ``ingest_call_logs`` but each shard returns only a ``PartialAggregate``.
+
+    Per-user arrays never leave the workers, so the parent only merges a few
+    small histograms.
+    """
+    reduced = _ingest(paths, workers, shards, chunk_rows, as_aggregate=True)
+    return merge_all(reduced) if reduced else PartialAggregate()
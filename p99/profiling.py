@@ -0,0 +1,157 @@
+"""
+Opt-in per-run instrumentation: section timings, allocations, payload sizes
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Section:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    alloc_net: int = 0  # bytes still allocated at the end of the section
+    alloc_peak: int = 0  # peak bytes above the level at its start
+    _start: float = field(default=0.0, repr=False)
+    _mem_start: int = field(default=0, repr=False)
+
+
+class Profiler:
+    """Wall time and allocations per named section of one script run.
+
+    Sections nest: ``section`` is a context manager for blocks, ``mark``
+    closes the previous mark and opens the next for straight-line module
+    code. A disabled profiler does nothing, so call sites need no guards.
+    Allocations come from ``tracemalloc`` (slows the run down while on);
+    with ``cprofile_dir`` the run's cProfile stats are dumped there too.
+    """
+
+    def __init__(self, enabled=True, trace_allocations=True, cprofile_dir=None):
+        self.enabled = enabled
+        self.trace_allocations = enabled and trace_allocations
+        self.cprofile_dir = cprofile_dir if enabled else None
+        self.sections = []
+        self.payloads = {}
+        self.stats_path = None
+        self._stack = []
+        self._mark = None
+        self._profile = None
+        self._started = None
+        self._own_tracing = False
+        self._stopped = False
+
+    def start(self):
+        if not self.enabled:
+            return self
+        self._started = time.perf_counter()
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        if self.cprofile_dir:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:  # another profiler owns this interpreter
+                self._profile = None
+        return self
+
+    def _memory(self):
+        if not self.trace_allocations:
+            return 0, 0
+        return tracemalloc.get_traced_memory()
+
+    def _open(self, name):
+        current, peak = self._memory()
+        if self._stack:
+            # Resetting the peak for the child must not lose the parent's.
+            parent = self._stack[-1]
+            parent.alloc_peak = max(parent.alloc_peak, peak - parent._mem_start)
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+        section = Section(name, len(self._stack), _start=time.perf_counter(), _mem_start=current)
+        self.sections.append(section)
+        self._stack.append(section)
+        return section
+
+    def _close(self, section):
+        while self._stack and self._stack[-1] is not section:
+            self._close(self._stack[-1])
+        section.seconds = time.perf_counter() - section._start
+        current, peak = self._memory()
+        section.alloc_net = current - section._mem_start
+        section.alloc_peak = max(section.alloc_peak, peak - section._mem_start)
+        self._stack.pop()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.alloc_peak = max(parent.alloc_peak, section.alloc_peak + section._mem_start - parent._mem_start)
+
+    @property
+    def active(self):
+        return self.enabled and self._started is not None and not self._stopped
+
+    @contextmanager
+    def section(self, name):
+        if not self.active:
+            yield
+            return
+        section = self._open(name)
+        try:
+            yield
+        finally:
+            self._close(section)
+
+    def mark(self, name):
+        """End the previous top-level mark (and anything open inside it) and start ``name``."""
+        if not self.active:
+            return
+        if self._mark is not None and self._mark in self._stack:
+            self._close(self._mark)
+        self._mark = self._open(name)
+
+    def record_payload(self, name, nbytes):
+        if self.active:
+            self.payloads[name] = nbytes
+
+    def stop(self):
+        """Close every open section; dump cProfile stats if configured."""
+        if not self.active:
+            return self
+        self._stopped = True
+        while self._stack:
+            self._close(self._stack[-1])
+        self.total_seconds = time.perf_counter() - self._started
+        if self._own_tracing:
+            tracemalloc.stop()
+        if self._profile is not None:
+            self._profile.disable()
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            self.stats_path = os.path.join(
+                self.cprofile_dir, f"run-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(self):x}.pstats")
+            self._profile.dump_stats(self.stats_path)
+        return self
+
+    def rows(self):
+        return [
+            {
+                'section': "  " * s.depth + s.name,
+                'ms': round(s.seconds * 1000, 1),
+                'alloc_net_kb': round(s.alloc_net / 1024, 1) if self.trace_allocations else None,
+                'alloc_peak_kb': round(s.alloc_peak / 1024, 1) if self.trace_allocations else None,
+            }
+            for s in self.sections
+        ]
+
+    def top_functions(self, limit=15, sort='cumulative'):
+        """The cProfile report as text, if cProfile was on."""
+        if self._profile is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,50 @@
+"""
+Dashboard tables from the Trino queries of 2025-12-27
+
+The pasted snapshot the dashboard shows without a data source, and the
+calibration target for the synthetic workload generator.
+"""
+
+# Overall percentile data
+percentile_data = {
+    'percentile': [1, 5, 10, 20, 30, 40, 50, 60, 70, 75, 80, 90, 95, 99, 99.5, 99.9, 100],
+    'llm_calls': [1, 5, 11, 22, 32, 45, 59, 78, 100, 121, 145, 301, 626, 4864, 9251, 26196, 225066]
+}
+
+# Distribution buckets (all users) with cost data
+distribution_data = [
+    {"bucket": "1-10", "user_count": 201880, "pct": 9.81, "avg_calls": 5, "total_cost": 22561.84, "avg_cost_per_user": 0.25, "cost_per_call": 0.0238},
+    {"bucket": "11-25", "user_count": 290096, "pct": 14.10, "avg_calls": 18, "total_cost": 76513.93, "avg_cost_per_user": 0.42, "cost_per_call": 0.0149},
+    {"bucket": "26-50", "user_count": 423867, "pct": 20.60, "avg_calls": 37, "total_cost": 168686.03, "avg_cost_per_user": 0.47, "cost_per_call": 0.0108},
+    {"bucket": "51-100", "user_count": 534221, "pct": 25.96, "avg_calls": 73, "total_cost": 440967.37, "avg_cost_per_user": 0.88, "cost_per_call": 0.0114},
+    {"bucket": "101-200", "user_count": 305081, "pct": 14.83, "avg_calls": 138, "total_cost": 539024.88, "avg_cost_per_user": 1.87, "cost_per_call": 0.0128},
+    {"bucket": "201-500", "user_count": 178260, "pct": 8.66, "avg_calls": 309, "total_cost": 840252.50, "avg_cost_per_user": 4.87, "cost_per_call": 0.0153},
+    {"bucket": "501-1K", "user_count": 54749, "pct": 2.66, "avg_calls": 690, "total_cost": 650262.47, "avg_cost_per_user": 12.30, "cost_per_call": 0.0172},
+    {"bucket": "1K-2K", "user_count": 27031, "pct": 1.31, "avg_calls": 1397, "total_cost": 687718.49, "avg_cost_per_user": 26.25, "cost_per_call": 0.0182},
+    {"bucket": "2K-5K", "user_count": 22197, "pct": 1.08, "avg_calls": 3177, "total_cost": 1456276.24, "avg_cost_per_user": 66.57, "cost_per_call": 0.0207},
+    {"bucket": "5K-10K", "user_count": 11020, "pct": 0.54, "avg_calls": 7012, "total_cost": 1768262.18, "avg_cost_per_user": 161.21, "cost_per_call": 0.0229},
+    {"bucket": "10K-25K", "user_count": 7089, "pct": 0.34, "avg_calls": 15087, "total_cost": 2707505.95, "avg_cost_per_user": 382.74, "cost_per_call": 0.0253},
+    {"bucket": "25K-50K", "user_count": 1782, "pct": 0.09, "avg_calls": 33493, "total_cost": 1705092.18, "avg_cost_per_user": 956.84, "cost_per_call": 0.0286},
+    {"bucket": "50K+", "user_count": 449, "pct": 0.02, "avg_calls": 163447, "total_cost": 1051527.83, "avg_cost_per_user": 2341.93, "cost_per_call": 0.0143},
+]
+
+# P99 users internal distribution
+p99_distribution = [
+    {"bucket": "5K-6K", "user_count": 4225, "pct": 19.92, "total_cost": 502286, "avg_calls": 5357},
+    {"bucket": "6K-7K", "user_count": 2695, "pct": 12.70, "total_cost": 397819, "avg_calls": 6476},
+    {"bucket": "7K-8K", "user_count": 2068, "pct": 9.75, "total_cost": 351818, "avg_calls": 7489},
+    {"bucket": "8K-10K", "user_count": 2906, "pct": 13.70, "total_cost": 609165, "avg_calls": 8937},
+    {"bucket": "10K-15K", "user_count": 4076, "pct": 19.21, "total_cost": 1212974, "avg_calls": 12184},
+    {"bucket": "15K-20K", "user_count": 1939, "pct": 9.14, "total_cost": 856041, "avg_calls": 17194},
+    {"bucket": "20K-30K", "user_count": 1757, "pct": 8.28, "total_cost": 1139426, "avg_calls": 24239},
+    {"bucket": "30K-50K", "user_count": 1100, "pct": 5.19, "total_cost": 1204497, "avg_calls": 37323},
+    {"bucket": "50K-75K", "user_count": 326, "pct": 1.54, "total_cost": 618632, "avg_calls": 60168},
+    {"bucket": "75K-100K", "user_count": 93, "pct": 0.44, "total_cost": 262967, "avg_calls": 85122},
+    {"bucket": "100K+", "user_count": 29, "pct": 0.14, "total_cost": 125774, "avg_calls": 127832},
+]
+
+# Percentiles within the P99 users
+p99_internal = {
+    'Metric': ['Minimum', 'P25', 'Median', 'P75', 'P90', 'Maximum'],
+    'Calls': [4937, 6552, 9272, 15244, 26294, 225066]
+}
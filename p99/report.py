@@ -0,0 +1,201 @@
+"""
+Headless report: every dashboard table and KPI as JSON/Parquet, no Streamlit
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+QUICK_REFERENCE_LIMITS = (500, 1000, 1500, 2000, 3000, 5000)
+SWEEP_POINTS = 200
+
+
+def pareto_split(distribution_data, stats):
+    """Cumulative user/cost shares per bucket and the P99 vs rest split.
+
+    The split is the users at or above ``stats['p99_threshold']``, the same
+    population as the P99 KPIs and the Lorenz curve's top 1%.
+    """
+    users = np.array([row['user_count'] for row in distribution_data], dtype=np.float64)
+    cost = np.array([row['total_cost'] for row in distribution_data], dtype=np.float64)
+    bucket_users, bucket_cost = users.sum(), cost.sum()
+
+    # An empty slice (or one that costs nothing) has 0% shares rather than NaN.
+    user_scale = 100 / bucket_users if bucket_users else 0.0
+    cost_scale = 100 / bucket_cost if bucket_cost else 0.0
+    rows = []
+    for row, cum_users, cum_cost, user_pct, cost_pct in zip(
+        distribution_data,
+        np.cumsum(users) * user_scale,
+        np.cumsum(cost) * cost_scale,
+        users * user_scale,
+        cost * cost_scale,
+    ):
+        rows.append(dict(row, cum_users=float(cum_users), cum_cost=float(cum_cost),
+                         user_pct=float(user_pct), cost_pct=float(cost_pct)))
+
+    total_users, total_cost = int(stats['total_users']), float(stats['total_cost'])
+    p99_users, p99_cost = int(stats['p99_user_count']), float(stats['p99_total_cost'])
+    below_users, below_cost = total_users - p99_users, total_cost - p99_cost
+    if p99_users and below_users and below_cost:
+        cost_ratio = (p99_cost / p99_users) / (below_cost / below_users)
+    else:
+        cost_ratio = None
+    return {
+        'rows': rows,
+        'p99_threshold': int(stats['p99_threshold']),
+        'p99_users': p99_users,
+        'p99_cost': p99_cost,
+        'below_p99_users': below_users,
+        'below_p99_cost': below_cost,
+        'total_users': total_users,
+        'total_cost': total_cost,
+        'cost_per_user_ratio': cost_ratio,
+    }
+
+
+def percentile_ratios(dashboard):
+    """The P99-vs-others call ratios shown next to the CDF."""
+    p50, p90, p99, p999, p100 = (dashboard.percentile(p) for p in (50, 90, 99, 99.9, 100))
+    pairs = [
+        ('P99 vs Median', p99, p50),
+        ('P99 vs P90', p99, p90),
+        ('Max vs P99', p100, p99),
+        ('P99.9 vs P99', p999, p99),
+    ]
+    return [{'comparison': name, 'ratio': num / den if den else None} for name, num, den in pairs]
+
+
+def p99_deep_dive(dashboard):
+    """Profile of the top 1%: KPIs, internal percentiles and bucket split."""
+    stats = dashboard.stats
+    buckets = dashboard.p99_distribution
+    top = max(buckets, key=lambda row: row['total_cost']) if buckets else None
+    return {
+        'threshold': stats['p99_threshold'],
+        'user_count': stats['p99_user_count'],
+        'max_calls': stats['max_calls'],
+        'total_calls': stats.get('p99_total_calls'),
+        'total_cost': stats['p99_total_cost'],
+        'internal': [{'metric': m, 'calls': int(c)}
+                     for m, c in zip(dashboard.p99_internal['Metric'], dashboard.p99_internal['Calls'])],
+        'buckets': buckets,
+        'top_cost_bucket': top['bucket'] if top else None,
+    }
+
+
+def sweep_limits(simulator, points=SWEEP_POINTS):
+    """Log-spaced limits from 1 to the heaviest user, plus the quick-reference ones."""
+    max_calls = getattr(simulator, 'max_calls', None)
+    if max_calls is None:
+        dense = simulator.limits
+    else:
+        dense = np.rint(np.geomspace(1, max(max_calls, 2), points))
+    return np.unique(np.concatenate([dense, QUICK_REFERENCE_LIMITS]).astype(np.int64))
+
+
+def simulator_rows(simulator, limits):
+    sweep = simulator.sweep(limits)
+    total_cost, total_users = simulator.total_cost, simulator.total_users
+    return [
+        {
+            'limit': int(limit),
+            'capped_cost': float(capped),
+            'savings': float(savings),
+            'savings_pct': float(savings / total_cost * 100) if total_cost else 0.0,
+            'users_affected': int(affected),
+            'users_affected_pct': float(affected / total_users * 100) if total_users else 0.0,
+        }
+        for limit, capped, savings, affected in zip(
+            sweep['limit'], sweep['capped_cost'], sweep['savings'], sweep['users_affected'])
+    ]
+
+
+def build_report(dashboard, simulator=None, limits=None, lorenz=None):
+    """Every table behind the dashboard tabs as plain JSON-able data."""
+    report = {
+        'stats': {k: (v.item() if isinstance(v, np.generic) else v) for k, v in dashboard.stats.items()},
+        'percentiles': [{'percentile': p, 'llm_calls': int(v)}
+                        for p, v in zip(dashboard.percentile_data['percentile'],
+                                        dashboard.percentile_data['llm_calls'])],
+        'percentile_ratios': percentile_ratios(dashboard),
+        'distribution': dashboard.distribution_data,
+        'pareto': pareto_split(dashboard.distribution_data, dashboard.stats),
+        'p99': p99_deep_dive(dashboard),
+    }
+    if simulator is not None:
+        limits = sweep_limits(simulator) if limits is None else limits
+        report['simulator'] = simulator_rows(simulator, limits)
+        report['quick_reference'] = simulator_rows(simulator, QUICK_REFERENCE_LIMITS)
+    if lorenz is not None:
+        report['lorenz'] = lorenz.summary()
+    return report
+
+
+# Report sections written as one Parquet table each.
+TABLES = {
+    'percentiles': lambda r: r['percentiles'],
+    'percentile_ratios': lambda r: r['percentile_ratios'],
+    'distribution': lambda r: r['pareto']['rows'],
+    'p99_distribution': lambda r: r['p99']['buckets'],
+    'p99_internal': lambda r: r['p99']['internal'],
+    'simulator': lambda r: r.get('simulator'),
+    'quick_reference': lambda r: r.get('quick_reference'),
+    'lorenz_top_shares': lambda r: r.get('lorenz', {}).get('top_shares'),
+}
+
+
+def write_report(report, json_path=None, parquet_dir=None):
+    """Write the report as one JSON document and/or one Parquet file per table."""
+    if json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    if parquet_dir:
+        import pandas as pd
+        out = Path(parquet_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, get in TABLES.items():
+            rows = get(report)
+            if rows:
+                pd.DataFrame(rows).to_parquet(out / f"{name}.parquet", index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m p99",
+        description="Compute every P99 dashboard table without Streamlit and write JSON/Parquet.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--data", default=os.environ.get("P99_DATA_PATH"),
+                        help="Per-user Parquet/CSV export or snapshot directory (default: $P99_DATA_PATH)")
+    source.add_argument("--backend", default=os.environ.get("P99_BACKEND_URL"),
+                        help="Backend URL, e.g. duckdb:///path/db.duckdb (default: $P99_BACKEND_URL)")
+    parser.add_argument("--out", default="-", help="JSON output path, '-' for stdout (default)")
+    parser.add_argument("--parquet-dir", help="Also write one Parquet file per table here")
+    parser.add_argument("--limits", type=int, nargs="+", help="Simulator limits (default: log-spaced sweep)")
+    parser.add_argument("--no-simulator", action="store_true", help="Skip the cost simulator sweep")
+    args = parser.parse_args(argv)
+
+    from .backends import connect
+    if args.backend:
+        url = args.backend
+    elif args.data:
+        url = f"memory://{os.path.abspath(args.data)}"
+    else:
+        parser.error("one of --data or --backend (or $P99_DATA_PATH / $P99_BACKEND_URL) is required")
+
+    start = time.perf_counter()
+    backend = connect(url)
+    dashboard = backend.dashboard()
+    simulator = None if args.no_simulator else backend.simulator()
+    report = build_report(dashboard, simulator, args.limits, lorenz=backend.lorenz())
+    report['source'] = {'url': url, 'version': backend.version(),
+                        'seconds': round(time.perf_counter() - start, 3)}
+    write_report(report, args.out, args.parquet_dir)
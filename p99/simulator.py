@@ -0,0 +1,180 @@
+"""
+Monthly call-limit cost simulator
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    """Outcome of capping every user at ``limit`` calls per month."""
+    limit: int
+    capped_cost: float
+    users_affected: int
+    total_cost: float
+    total_users: int
+
+    @property
+    def savings(self):
+        return self.total_cost - self.capped_cost
+
+    @property
+    def savings_pct(self):
+        return self.savings / self.total_cost * 100 if self.total_cost else 0.0
+
+    @property
+    def users_affected_pct(self):
+        return self.users_affected / self.total_users * 100 if self.total_users else 0.0
+
+
+class CostSimulator:
+    """Exact capped-cost simulator over sorted per-user call counts.
+
+    Capping a user at ``limit`` calls keeps their own cost per call, so the
+    capped cost is the full cost of everyone at or under the limit plus
+    ``limit * cost_i / calls_i`` for everyone above it. Both terms are prefix
+    and suffix sums over users sorted by calls, so any limit is a single
+    binary search.
+    """
+
+    def __init__(self, calls, cost):
+        calls = np.asarray(calls)
+        cost = np.asarray(cost, dtype=np.float64)
+        order = np.argsort(calls, kind='stable')
+        self.order = order  # row of each sorted user, shared with the user drill-down
+        self.sorted_calls = calls[order]
+        sorted_cost = cost[order]
+
+        n = len(calls)
+        self.total_users = n
+        self.cost_prefix = np.zeros(n + 1)
+        np.cumsum(sorted_cost, out=self.cost_prefix[1:])
+        self.calls_prefix = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(self.sorted_calls, out=self.calls_prefix[1:])
+        # Suffix sums of each user's cost per call, for the capped users.
+        cost_per_call = sorted_cost / np.maximum(self.sorted_calls, 1)
+        self.cpc_suffix = np.zeros(n + 1)
+        self.cpc_suffix[:n] = np.cumsum(cost_per_call[::-1])[::-1]
+        self.total_cost = float(self.cost_prefix[-1])
+        self.total_calls = int(self.calls_prefix[-1])
+
+    @classmethod
+    def from_users(cls, users):
+        return cls(users.calls, users.cost)
+
+    @property
+    def max_calls(self):
+        return int(self.sorted_calls[-1]) if self.total_users else 0
+
+    def _capped(self, limits):
+        limits = np.asarray(limits)
+        k = np.searchsorted(self.sorted_calls, limits, side='right')
+        capped_cost = self.cost_prefix[k] + limits * self.cpc_suffix[k]
+        capped_calls = self.calls_prefix[k] + limits * (self.total_users - k)
+        return capped_cost, capped_calls, self.total_users - k
+
+    def bucket_totals(self, buckets):
+        """Per-bucket ``(users, calls, cost)`` from the prefix sums: one binary search per edge."""
+        bounds = np.append(np.searchsorted(self.sorted_calls, buckets.edges, side='left'), self.total_users)
+        return (np.diff(bounds), np.diff(self.calls_prefix[bounds]).astype(np.float64),
+                np.diff(self.cost_prefix[bounds]))
+
+    def simulate(self, limit):
+        capped_cost, _, affected = self._capped(limit)
+        return SimulationResult(
+            limit=int(limit),
+            capped_cost=float(capped_cost),
+            users_affected=int(affected),
+            total_cost=self.total_cost,
+            total_users=self.total_users,
+        )
+
+    def sweep(self, limits):
+        """Vectorized ``simulate`` over many limits, as column arrays."""
+        limits = np.asarray(limits)
+        capped_cost, capped_calls, affected = self._capped(limits)
+        return {
+            'limit': limits,
+            'capped_cost': capped_cost,
+            'capped_calls': capped_calls,
+            'savings': self.total_cost - capped_cost,
+            'users_affected': affected,
+        }
+
+
+class AnchorSimulator:
+    """Simulator over pre-computed anchor limits, linearly interpolated.
+
+    Used for the pasted snapshot and the cost cube, where no per-user rows
+    are available. ``max_calls``, if known, lets callers offer any limit up
+    to the heaviest user instead of just the anchors.
+    """
+
+    def __init__(self, cost_at, users_affected_at, total_cost, total_users, max_calls=None):
+        self.limits = np.array(sorted(cost_at))
+        self.costs = np.array([cost_at[k] for k in self.limits], dtype=np.float64)
+        self.affected = np.array([users_affected_at[k] for k in self.limits], dtype=np.float64)
+        self.total_cost = total_cost
+        self.total_users = total_users
+        self.max_calls = max_calls
+
+    def simulate(self, limit):
+        return SimulationResult(
+            limit=int(limit),
+            capped_cost=float(np.interp(limit, self.limits, self.costs)),
+            users_affected=int(np.interp(limit, self.limits, self.affected)),
+            total_cost=self.total_cost,
+            total_users=self.total_users,
+        )
+
+    def sweep(self, limits):
+        limits = np.asarray(limits)
+        capped_cost = np.interp(limits, self.limits, self.costs)
+        return {
+            'limit': limits,
+            'capped_cost': capped_cost,
+            'savings': self.total_cost - capped_cost,
+            'users_affected': np.interp(limits, self.limits, self.affected).astype(np.int64),
+        }
+
+
+def policy_grid(simulators, limits, price_factors, overage_rate=0.0, tier_ratios=None):
+    """Cost of a call policy at every (price factor, limit) pair.
+
+    ``simulators`` maps each plan to its simulator (a single entry for one
+    plan covering everyone). Plan ``p`` is capped at ``limits *
+    tier_ratios[p]`` calls. Calls beyond a cap are billed at
+    ``overage_rate`` of their price: 0 is a hard cap, 0.2 a downgrade to a
+    model at a fifth of the price, 1 no cap. Every price is then scaled by
+    the price factor.
+
+    Beyond-cap cost is ``total - capped`` at each limit, so the whole grid
+    is one ``sweep`` per plan - binary searches into sorted prefix sums -
+    plus an outer product with the price factors; its cost does not depend
+    on the user count. ``cost`` and ``savings`` are
+    ``(len(price_factors), len(limits))``; savings are against today's
+    uncapped cost at the current price.
+    """
+    limits = np.asarray(limits, dtype=np.float64)
+    price_factors = np.asarray(price_factors, dtype=np.float64)
+    capped = np.zeros(len(limits))
+    affected = np.zeros(len(limits), dtype=np.int64)
+    baseline = 0.0
+    for plan, sim in simulators.items():
+        ratio = 1.0 if tier_ratios is None else tier_ratios.get(plan, 1.0)
+        sweep = sim.sweep(np.maximum(np.rint(limits * ratio), 0).astype(np.int64))
+        capped += sweep['capped_cost']
+        affected += np.asarray(sweep['users_affected'], dtype=np.int64)
+        baseline += sim.total_cost
+    policy_cost = capped + overage_rate * (baseline - capped)
+    cost = np.outer(price_factors, policy_cost)
+    return {
+        'limit': limits,
+        'price_factor': price_factors,
+        'cost': cost,
+        'savings': baseline - cost,
+        'users_affected': affected,
+        'baseline_cost': baseline,
+    }
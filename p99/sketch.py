@@ -0,0 +1,203 @@
+"""
+Bounded-memory streaming quantile sketch with relative-error guarantees
+"""
+
+import math
+
+import numpy as np
+
+from .data import CALLS, iter_chunks
+
+
+class QuantileSketch:
+    """DDSketch-style quantile sketch over positive values.
+
+    Values are counted in logarithmic bins of ratio ``gamma``, so every
+    quantile is answered within ``relative_accuracy`` of a true sample value,
+    including the deep tail (P99.99 and beyond). When more than ``max_bins``
+    bins are live the lowest ones are collapsed together, which keeps memory
+    bounded while preserving accuracy in the upper tail.
+    """
+
+    def __init__(self, relative_accuracy=0.005, max_bins=4096):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._bins = np.zeros(0, dtype=np.int64)
+        self._offset = 0  # key of self._bins[0]
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def _key(self, values):
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    def _value(self, key):
+        # Midpoint of bin (gamma^(k-1), gamma^k] with equal relative error both ways.
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _add_bins(self, lo, counts):
+        """Add ``counts`` for keys ``lo, lo + 1, ...`` into the store."""
+        hi = lo + len(counts)
+        if len(self._bins) == 0:
+            self._bins = counts.astype(np.int64)
+            self._offset = lo
+        else:
+            new_lo = min(lo, self._offset)
+            new_hi = max(hi, self._offset + len(self._bins))
+            if new_lo != self._offset or new_hi != self._offset + len(self._bins):
+                grown = np.zeros(new_hi - new_lo, dtype=np.int64)
+                start = self._offset - new_lo
+                grown[start:start + len(self._bins)] = self._bins
+                self._bins, self._offset = grown, new_lo
+            self._bins[lo - self._offset:hi - self._offset] += counts
+        self._collapse()
+
+    def _collapse(self):
+        nonzero = np.flatnonzero(self._bins)
+        if len(nonzero) == 0:
+            self._bins, self._offset = np.zeros(0, dtype=np.int64), 0
+            return
+        self._offset += nonzero[0]
+        self._bins = self._bins[nonzero[0]:nonzero[-1] + 1]
+        excess = len(self._bins) - self.max_bins
+        if excess > 0:
+            folded = self._bins[:excess + 1].sum()
+            self._bins = self._bins[excess:].copy()
+            self._bins[0] = folded
+            self._offset += excess
+
+    def update(self, values, weights=None):
+        """Add a chunk of non-negative values (optionally weighted by counts)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        if weights is None:
+            weights = np.ones(len(values), dtype=np.int64)
+        else:
+            weights = np.asarray(weights, dtype=np.int64).ravel()
+        if values.min() < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        self.count += int(weights.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values > 0
+        self.zero_count += int(weights[~positive].sum())
+        if positive.any():
+            keys = self._key(values[positive])
+            lo = int(keys.min())
+            self._add_bins(lo, np.bincount(keys - lo, weights=weights[positive]).astype(np.int64))
+        return self
+
+    def remove(self, values, weights=None):
+        """Take back values previously added, e.g. a user's stale monthly total.
+
+        ``min``/``max`` are left as-is, so they become bounds rather than exact
+        extremes after removals.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        if weights is None:
+            weights = np.ones(len(values), dtype=np.int64)
+        else:
+            weights = np.asarray(weights, dtype=np.int64).ravel()
+        self.count -= int(weights.sum())
+        positive = values > 0
+        self.zero_count -= int(weights[~positive].sum())
+        if positive.any() and len(self._bins):
+            # Values folded into the lowest bin by a collapse are removed from it.
+            keys = np.clip(self._key(values[positive]), self._offset, self._offset + len(self._bins) - 1)
+            self._bins -= np.bincount(keys - self._offset, weights=weights[positive],
+                                      minlength=len(self._bins)).astype(np.int64)
+            self._collapse()
+        return self
+
+    def quantile(self, q):
+        """Approximate value at quantile ``q`` in ``[0, 1]`` (scalar or array)."""
+        if self.count == 0:
+            raise ValueError("Cannot query an empty sketch")
+        q = np.asarray(q, dtype=np.float64)
+        if ((q < 0) | (q > 1)).any():
+            raise ValueError("Quantiles must be in [0, 1]")
+        # Nearest-rank, matching the exact percentiles in ``metrics``.
+        rank = np.clip(np.ceil(q * self.count) - 1, 0, self.count - 1)
+        cum = self.zero_count + np.cumsum(self._bins)
+        idx = np.searchsorted(cum, rank, side='right')
+        idx = np.minimum(idx, len(self._bins) - 1) if len(self._bins) else idx
+        values = np.where(
+            rank < self.zero_count, 0.0,
+            self._value(self._offset + idx) if len(self._bins) else 0.0,
+        )
+        result = np.clip(values, self.min, self.max)
+        return float(result) if result.ndim == 0 else result
+
+    def rank(self, value):
+        """Approximate number of values strictly below ``value``."""
+        if value <= 0:
+            return 0
+        below = self._key(np.float64(value)) - self._offset
+        return self.zero_count + int(self._bins[:max(below, 0)].sum())
+
+    def merge(self, other):
+        """Return a new sketch summarizing both inputs (associative, commutative)."""
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        merged = self.copy()
+        merged.max_bins = max(self.max_bins, other.max_bins)
+        if len(other._bins):
+            merged._add_bins(other._offset, other._bins)
+        merged.zero_count += other.zero_count
+        merged.count += other.count
+        merged.min = min(self.min, other.min)
+        merged.max = max(self.max, other.max)
+        return merged
+
+    def copy(self):
+        clone = QuantileSketch(self.relative_accuracy, self.max_bins)
+        clone._bins = self._bins.copy()
+        clone._offset = self._offset
+        clone.zero_count, clone.count = self.zero_count, self.count
+        clone.min, clone.max = self.min, self.max
+        return clone
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'offset': int(self._offset),
+            'bins': self._bins.tolist(),
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d['relative_accuracy'], d['max_bins'])
+        sketch._bins = np.asarray(d['bins'], dtype=np.int64)
+        sketch._offset = d['offset']
+        sketch.zero_count, sketch.count = d['zero_count'], d['count']
+        if d['count']:
+            sketch.min, sketch.max = d['min'], d['max']
+        return sketch
+
+    def percentile(self, p):
+        """Approximate value at percentile ``p`` in ``[0, 100]``."""
+        return self.quantile(np.asarray(p, dtype=np.float64) / 100)
+
+
+def sketch_file(path, column=CALLS, relative_accuracy=0.005, chunk_rows=1_000_000):
+    """Stream one numeric column of a Parquet/CSV file into a sketch."""
+    sketch = QuantileSketch(relative_accuracy=relative_accuracy)
+    for chunk in iter_chunks(path, [column], chunk_rows=chunk_rows):
+        sketch.update(chunk[column].to_numpy())
+    return sketch
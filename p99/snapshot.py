@@ -0,0 +1,234 @@
+"""
+Versioned, memory-mappable columnar snapshot of per-user totals
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .data import UserData, load_users
+
+FORMAT = "p99-snapshot"
+FORMAT_VERSION = 1
+META = "meta.json"
+
+# Column files: fixed-width so every process can map them straight from the
+# page cache (2M users is ~24MB plus the id dictionary).
+COLUMN_FILES = {
+    'user_code': ("user_code.npy", np.uint32),
+    'calls': ("calls.npy", np.uint32),
+    'cost': ("cost.npy", np.float32),
+}
+DICTIONARY_FILE = "user_dictionary.npy"
+
+
+def is_snapshot(path):
+    return (Path(path) / META).is_file()
+
+
+def read_meta(path):
+    with open(Path(path) / META) as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT:
+        raise ValueError(f"Not a {FORMAT} directory: {path}")
+    if meta['format_version'] > FORMAT_VERSION:
+        raise ValueError(f"Snapshot format version {meta['format_version']} is newer than "
+                         f"supported ({FORMAT_VERSION}): {path}")
+    return meta
+
+
+def snapshot_version(path):
+    """Data version recorded when the snapshot was written."""
+    return read_meta(path)['version']
+
+
+class _ContentHash:
+    """Data version from the calls and cost bytes, fed one chunk at a time."""
+
+    def __init__(self):
+        self.calls, self.cost = hashlib.sha1(), hashlib.sha1()
+
+    def update(self, calls, cost):
+        self.calls.update(np.ascontiguousarray(calls).tobytes())
+        self.cost.update(np.ascontiguousarray(cost).tobytes())
+
+    def hexdigest(self):
+        return hashlib.sha1(self.calls.digest() + self.cost.digest()).hexdigest()[:16]
+
+
+def _meta(version, users, id_kind):
+    return {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'users': users,
+        'id_kind': id_kind,
+        'columns': {name: file for name, (file, _) in COLUMN_FILES.items()},
+        'dictionary': DICTIONARY_FILE,
+    }
+
+
+def _swap_in(tmp, path, meta):
+    """Finish a snapshot built in ``tmp`` and atomically replace ``path`` with it."""
+    with open(tmp / META, 'w') as f:
+        json.dump(meta, f, indent=2)
+    old = None
+    if path.exists():
+        old = path.with_name(f".{path.name}.old-{os.getpid()}")
+        os.replace(path, old)
+    os.replace(tmp, path)
+    if old is not None:
+        shutil.rmtree(old)
+
+
+def write_snapshot(users, path, version=None):
+    """Write ``users`` as a snapshot directory at ``path``.
+
+    User ids are dictionary-encoded: a sorted dictionary of distinct ids
+    (int64, or fixed-width UTF-8 bytes for strings) plus one uint32 code per
+    row. The directory is built next to ``path`` and swapped in at the end,
+    so readers never see a half-written snapshot; processes still mapping
+    the old files keep reading them until they reopen.
+    """
+    import pandas as pd
+    path = Path(path)
+    calls = np.asarray(users.calls)
+    if len(calls) and (calls.min() < 0 or calls.max() > np.iinfo(np.uint32).max):
+        raise ValueError("llm_calls must fit in uint32")
+    if len(calls) > np.iinfo(np.uint32).max:
+        raise ValueError("Too many users for uint32 user codes")
+    codes, dictionary = pd.factorize(users.ids(), sort=True)
+    dictionary = np.asarray(dictionary)
+    if dictionary.dtype.kind in 'iu':
+        dictionary = dictionary.astype(np.int64)
+        id_kind = 'int'
+    else:
+        dictionary = pd.Series(dictionary.astype(str)).str.encode('utf-8').to_numpy().astype('S')
+        id_kind = 'str'
+    columns = {
+        'user_code': codes.astype(np.uint32),
+        'calls': calls.astype(np.uint32),
+        'cost': np.asarray(users.cost).astype(np.float32),
+    }
+    if version is None:
+        digest = _ContentHash()
+        digest.update(columns['calls'], columns['cost'])
+        version = digest.hexdigest()
+    meta = _meta(version, len(calls), id_kind)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent))
+    try:
+        for name, (file, _) in COLUMN_FILES.items():
+            np.save(tmp / file, columns[name])
+        np.save(tmp / DICTIONARY_FILE, dictionary)
+        _swap_in(tmp, path, meta)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return meta
+
+
+class SnapshotWriter:
+    """Write a snapshot chunk by chunk in bounded memory.
+
+    The row count is fixed up front. User ids must be integers ascending
+    across chunks (e.g. a running counter), so they are their own sorted
+    dictionary; omitted ids default to the row number.
+    """
+
+    def __init__(self, path, users, version=None):
+        self.path = Path(path)
+        self.users = users
+        self.version = version
+        self.written = 0
+        self._digest = _ContentHash()
+        self._last_id = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = Path(tempfile.mkdtemp(prefix=f".{self.path.name}.", dir=self.path.parent))
+        self._columns = {
+            name: np.lib.format.open_memmap(self._tmp / file, mode='w+', dtype=dtype, shape=(users,))
+            for name, (file, dtype) in COLUMN_FILES.items()
+        }
+        self._dictionary = np.lib.format.open_memmap(self._tmp / DICTIONARY_FILE, mode='w+',
+                                                     dtype=np.int64, shape=(users,))
+
+    def write(self, calls, cost, user_ids=None):
+        start, end = self.written, self.written + len(calls)
+        if end > self.users:
+            raise ValueError(f"More than the declared {self.users} users")
+        if user_ids is None:
+            user_ids = np.arange(start, end, dtype=np.int64)
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(user_ids) and (np.any(np.diff(user_ids) <= 0)
+                              or (self._last_id is not None and user_ids[0] <= self._last_id)):
+            raise ValueError("SnapshotWriter needs strictly ascending integer user ids")
+        calls = np.asarray(calls)
+        if len(calls) and (calls.min() < 0 or calls.max() > np.iinfo(np.uint32).max):
+            raise ValueError("llm_calls must fit in uint32")
+        self._columns['calls'][start:end] = calls
+        self._columns['cost'][start:end] = cost
+        self._columns['user_code'][start:end] = np.arange(start, end, dtype=np.uint32)
+        self._dictionary[start:end] = user_ids
+        self._digest.update(self._columns['calls'][start:end], self._columns['cost'][start:end])
+        if len(user_ids):
+            self._last_id = user_ids[-1]
+        self.written = end
+
+    def close(self):
+        if self.written != self.users:
+            self.abort()
+            raise ValueError(f"Wrote {self.written} of the declared {self.users} users")
+        for column in [*self._columns.values(), self._dictionary]:
+            column.flush()
+        self._columns = self._dictionary = None
+        meta = _meta(self.version or self._digest.hexdigest(), self.users, 'int')
+        _swap_in(self._tmp, self.path, meta)
+        return meta
+
+    def abort(self):
+        self._columns = self._dictionary = None
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def open_snapshot(path):
+    """Memory-map a snapshot as ``UserData`` without reading it into memory."""
+    path = Path(path)
+    meta = read_meta(path)
+    columns = {}
+    for name, (_, dtype) in COLUMN_FILES.items():
+        columns[name] = np.load(path / meta['columns'][name], mmap_mode='r')
+        if columns[name].dtype != dtype:
+            raise ValueError(f"Snapshot column {name} is {columns[name].dtype}, expected {np.dtype(dtype)}")
+    dictionary = np.load(path / meta['dictionary'], mmap_mode='r')
+    return UserData(columns['user_code'], columns['calls'], columns['cost'], id_dictionary=dictionary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a per-user export as a memory-mappable snapshot.")
+    parser.add_argument("source", help="Parquet file/directory or CSV with user_id, llm_calls, cost")
+    parser.add_argument("snapshot", help="Snapshot directory to (re)write")
+    parser.add_argument("--version", help="Data version to record (default: content hash)")
+    args = parser.parse_args(argv)
+
+    meta = write_snapshot(load_users(args.source), args.snapshot, version=args.version)
+    print(f"Wrote {meta['users']:,} users to {args.snapshot} (version {meta['version']})")
+
+
+if __name__ == "__main__":
+    main()
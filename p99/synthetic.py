@@ -0,0 +1,153 @@
+"""
+Synthetic per-user workloads calibrated to the dashboard's reference tables
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS
+from .data import CALLS, COST, PARQUET_SUFFIXES, USER_ID, UserData
+
+# Users are generated in fixed-size blocks, each seeded by (seed, block), so
+# the output depends only on the seed, never on how it is chunked.
+BLOCK_USERS = 1 << 20
+COST_SIGMA = 0.35  # spread of a user's cost per call around its bucket's
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """Inverse CDF of per-user calls plus the cost per call of each bucket.
+
+    ``probs``/``log_calls`` are knots of the calls CDF, interpolated
+    log-linearly; a uniform draw maps to ``ceil(exp(log_calls))``.
+    """
+    probs: np.ndarray
+    log_calls: np.ndarray
+    buckets: object
+    cost_per_call: np.ndarray
+
+    @classmethod
+    def from_tables(cls, percentile_data, distribution_data, p99_distribution=None,
+                    distribution_buckets=DISTRIBUTION_BUCKETS, p99_buckets=P99_BUCKETS):
+        """Fit to a percentile table, bucket shares and (optionally) the P99 split.
+
+        Every percentile gives a knot ``F(value) = p``; every bucket gives
+        ``F(upper edge) = cumulative share``. P99 buckets refine the tail
+        within the mass the distribution table puts above their first edge.
+        """
+        knots = [(0.0, 0.5)]  # ceil() of anything in (0.5, 1] is one call
+        knots += [(p / 100, v) for p, v in zip(percentile_data['percentile'], percentile_data['llm_calls'])]
+
+        counts = np.array([row['user_count'] for row in distribution_data], dtype=np.float64)
+        cum = np.cumsum(counts) / counts.sum()
+        edges = distribution_buckets.edges
+        knots += [(cum[k], edges[k + 1] - 1) for k in range(len(edges) - 1)]
+
+        if p99_distribution:
+            tail_counts = np.array([row['user_count'] for row in p99_distribution], dtype=np.float64)
+            p_edges = p99_buckets.edges
+            below = _cdf_at(knots, p_edges[0] - 1)
+            tail_cum = np.cumsum(tail_counts) / tail_counts.sum()
+            knots += [(below + (1 - below) * tail_cum[k], p_edges[k + 1] - 1) for k in range(len(p_edges) - 1)]
+
+        probs, values = (np.array(col, dtype=np.float64) for col in zip(*sorted(knots)))
+        # The tables round independently; keep the inverse CDF non-decreasing.
+        values = np.maximum.accumulate(values)
+        probs, first = np.unique(probs, return_index=True)
+        values = values[first]
+        cpc = np.array([row['cost_per_call'] for row in distribution_data], dtype=np.float64)
+        return cls(probs, np.log(values), distribution_buckets, cpc)
+
+    @classmethod
+    def reference(cls):
+        """Calibration to the pasted Trino snapshot in ``p99.reference``."""
+        from .reference import distribution_data, p99_distribution, percentile_data
+        return cls.from_tables(percentile_data, distribution_data, p99_distribution)
+
+
+def _cdf_at(knots, value):
+    probs, values = zip(*sorted(knots))
+    values = np.maximum.accumulate(values)
+    return float(np.interp(value, values, probs))
+
+
+def _block(calibration, seed, block, n, start):
+    rng = np.random.default_rng([seed, block])
+    # The epsilon keeps exp(log(v)) landing a hair above an integer knot v in v's bucket.
+    calls = np.ceil(np.exp(np.interp(rng.random(n), calibration.probs, calibration.log_calls)) - 1e-9)
+    calls = np.maximum(calls, 1).astype(np.uint32)
+    # Mean-one noise keeps each bucket's total cost / total calls on target.
+    noise = rng.lognormal(-COST_SIGMA ** 2 / 2, COST_SIGMA, n)
+    cost = calls * calibration.cost_per_call[calibration.buckets.assign(calls)] * noise
+    return UserData(np.arange(start, start + n, dtype=np.int64), calls, cost)
+
+
+def iter_users(users, seed=0, chunk_users=8 * BLOCK_USERS, calibration=None):
+    """Yield ``UserData`` chunks for ``users`` synthetic users with ids 0..users-1.
+
+    ``chunk_users`` is rounded up to whole blocks; memory use is bounded by it.
+    """
+    if users < 0:
+        raise ValueError("users must be non-negative")
+    calibration = calibration or Calibration.reference()
+    blocks_per_chunk = max(1, -(-chunk_users // BLOCK_USERS))
+    n_blocks = -(-users // BLOCK_USERS)
+    for first in range(0, n_blocks, blocks_per_chunk):
+        parts = []
+        for block in range(first, min(first + blocks_per_chunk, n_blocks)):
+            start = block * BLOCK_USERS
+            parts.append(_block(calibration, seed, block, min(BLOCK_USERS, users - start), start))
+        if len(parts) == 1:
+            yield parts[0]
+        else:
+            yield UserData(*(np.concatenate(cols) for cols in
+                             zip(*((p.user_ids, p.calls, p.cost) for p in parts))))
+
+
+def generate_users(users, seed=0, calibration=None):
+    """All ``users`` synthetic users in memory at once."""
+    if users == 0:
+        return UserData(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint32), np.zeros(0))
+    return next(iter_users(users, seed, chunk_users=users, calibration=calibration))
+
+
+def write_parquet(path, users, seed=0, chunk_users=8 * BLOCK_USERS, calibration=None):
+    """Stream synthetic users to one Parquet file, a row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(USER_ID, pa.int64()), (CALLS, pa.uint32()), (COST, pa.float32())])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter_users(users, seed, chunk_users, calibration):
+            writer.write_table(pa.table({USER_ID: chunk.user_ids, CALLS: chunk.calls,
+                                         COST: chunk.cost.astype(np.float32)}, schema=schema))
+
+
+def write_snapshot(path, users, seed=0, chunk_users=8 * BLOCK_USERS, calibration=None):
+    """Stream synthetic users into a memory-mappable snapshot."""
+    from .snapshot import SnapshotWriter
+    with SnapshotWriter(path, users) as writer:
+        for chunk in iter_users(users, seed, chunk_users, calibration):
+            writer.write(chunk.calls, chunk.cost, chunk.user_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic per-user calls/costs calibrated to the reference tables.")
+    parser.add_argument("out", help="Output .parquet file, or a snapshot directory")
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-users", type=int, default=8 * BLOCK_USERS)
+    args = parser.parse_args(argv)
+
+    if Path(args.out).suffix in PARQUET_SUFFIXES:
+        write_parquet(args.out, args.users, args.seed, args.chunk_users)
+    else:
+        write_snapshot(args.out, args.users, args.seed, args.chunk_users)
+    print(f"Wrote {args.users:,} synthetic users to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+P99 trend over time from per-day mergeable aggregates
+"""
+
+import argparse
+import datetime as dt
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from .aggregate import TAIL_SIZE, PartialAggregate, save_aggregate
+from .data import CALLS, COST, USER_ID, file_version, iter_chunks
+
+TREND_PERCENTILES = (50, 90, 99, 99.9)
+WINDOWS = {"Daily": 1, "7 days": 7, "30 days": 30}
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    return a if b is None else a.merge(b)
+
+
+class _SlidingWindow:
+    """Merge of the last few pushed aggregates with amortized O(1) merges per step.
+
+    Two stacks: pushes fold into a running ``back`` aggregate, and when the
+    front runs dry the back is flipped into suffix merges, so every
+    aggregate is merged about three times in total however long the window.
+    ``None`` stands for a day with no data.
+    """
+
+    def __init__(self):
+        self.front = []  # suffix merges, oldest on top
+        self.back = []
+        self.back_merged = None
+
+    def push(self, aggregate):
+        self.back.append(aggregate)
+        self.back_merged = _merge(self.back_merged, aggregate)
+
+    def pop(self):
+        if not self.front:
+            merged = None
+            for aggregate in reversed(self.back):
+                merged = _merge(aggregate, merged)
+                self.front.append(merged)
+            self.back, self.back_merged = [], None
+        self.front.pop()
+
+    def merged(self):
+        return _merge(self.front[-1] if self.front else None, self.back_merged)
+
+
+class TrendStore:
+    """A directory of per-day ``PartialAggregate`` files, one per date.
+
+    Each day summarises that day's per-user totals, so windows are answered
+    by merging day summaries, never by rescanning calls. A window's
+    percentiles are therefore over user-days: "P99 over 7 days" is the P99
+    of a user's daily calls across those 7 days, and its P99 users are the
+    user-days at or above it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._days = {}  # date -> (file stamp, aggregate)
+
+    def _file(self, date):
+        return self.path / f"{date.isoformat()}.json"
+
+    def dates(self):
+        return sorted(dt.date.fromisoformat(p.stem) for p in self.path.glob("*.json"))
+
+    def version(self):
+        return file_version(self.path)
+
+    def _stamp(self, date):
+        try:
+            stat = self._file(date).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def day(self, date):
+        """The aggregate for ``date``, or ``None`` if that day has no data.
+
+        Days are cached against their file's mtime and size, so a day that
+        is re-added or back-filled is read again.
+        """
+        stamp = self._stamp(date)
+        cached = self._days.get(date)
+        if cached is None or cached[0] != stamp:
+            aggregate = PartialAggregate.loads(self._file(date).read_text()) if stamp else None
+            cached = self._days[date] = (stamp, aggregate)
+        return cached[1]
+
+    def add_day(self, date, user_ids, calls, cost, tail_size=TAIL_SIZE):
+        """Summarise one day's per-user rows (several rows per user are summed)."""
+        from .parallel import group_by_user
+        _, user_calls, user_cost = group_by_user(user_ids, np.asarray(cost, dtype=np.float64),
+                                                 np.asarray(calls, dtype=np.int64))
+        aggregate = PartialAggregate(tail_size=tail_size).update(user_calls, user_cost)
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self._file(date).with_suffix(".tmp")
+        save_aggregate(aggregate, tmp)
+        tmp.replace(self._file(date))
+        self._days[date] = (self._stamp(date), aggregate)
+        return aggregate
+
+    def add_file(self, date, path, tail_size=TAIL_SIZE, chunk_rows=1_000_000):
+        """Summarise a per-user (or per-call-batch) file of ``user_id, llm_calls, cost`` for one day."""
+        import pandas as pd
+        chunks = list(iter_chunks(path, columns=(USER_ID, CALLS, COST), chunk_rows=chunk_rows))
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=[USER_ID, CALLS, COST])
+        return self.add_day(date, df[USER_ID].to_numpy(), df[CALLS].to_numpy(), df[COST].to_numpy(), tail_size)
+
+    def window(self, end, days):
+        """Merged aggregate over the ``days`` dates ending at ``end`` (``None`` if all empty)."""
+        merged = None
+        for offset in range(days):
+            merged = _merge(merged, self.day(end - dt.timedelta(days=offset)))
+        return merged
+
+    def series(self, days=1, start=None, end=None, percentiles=TREND_PERCENTILES):
+        """One row per date: percentiles, P99 user count and P99 cost share of the window ending there.
+
+        Rolling windows slide over the calendar with two-stack merging, so
+        a 30-day series costs about three merges per date, not thirty.
+        """
+        dates = self.dates()
+        if not dates:
+            return []
+        # By default only full windows: the first one ends days-1 after the first date.
+        start = start or dates[0] + dt.timedelta(days=days - 1)
+        end = end or dates[-1]
+        window = _SlidingWindow()
+        first = start - dt.timedelta(days=days - 1)
+        for offset in range(days - 1):
+            window.push(self.day(first + dt.timedelta(days=offset)))
+        rows = []
+        date = start
+        while date <= end:
+            window.push(self.day(date))
+            merged = window.merged()
+            if merged is not None and merged.count:
+                rows.append(_trend_row(date, days, merged, percentiles))
+            window.pop()
+            date += dt.timedelta(days=1)
+        return rows
+
+
+def _trend_row(date, days, aggregate, percentiles):
+    dashboard = aggregate.to_dashboard(percentiles)
+    stats = dashboard.stats
+    row = {'date': date.isoformat(), 'window_days': days, 'user_days': stats['total_users']}
+    for p in percentiles:
+        row[f"p{p:g}"] = dashboard.percentile(p)
+    row['p99_users'] = stats['p99_user_count']
+    row['total_cost'] = stats['total_cost']
+    row['p99_cost_share'] = stats['p99_total_cost'] / stats['total_cost'] * 100 if stats['total_cost'] else 0.0
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m p99.trend",
+        description="Maintain per-day P99 summaries and print trend series from them.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Summarise one day's per-user file into the store")
+    add.add_argument("store", help="Trend store directory")
+    add.add_argument("date", type=dt.date.fromisoformat, help="YYYY-MM-DD")
+    add.add_argument("source", help="Per-user Parquet/CSV (user_id, llm_calls, cost) for that day")
+    add.add_argument("--tail-size", type=int, default=TAIL_SIZE)
+    series = sub.add_parser("series", help="Print the trend as JSON")
+    series.add_argument("store")
+    series.add_argument("--window", type=int, default=1, help="Rolling window in days")
+    args = parser.parse_args(argv)
+
+    store = TrendStore(args.store)
+    if args.command == "add":
+        aggregate = store.add_file(args.date, args.source, tail_size=args.tail_size)
+        print(f"{args.date}: {aggregate.count:,} users summarised into {args.store}")
+    else:
+        json.dump(store.series(args.window), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
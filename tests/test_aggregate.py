@@ -0,0 +1,85 @@
+"""
+Merged partial aggregates against one aggregate over every user
+"""
+
+import numpy as np
+import pytest
+
+from p99.aggregate import PartialAggregate, load_aggregates, merge_all, save_aggregate
+from p99.buckets import Buckets
+from p99.data import UserData
+from p99.metrics import compute_dashboard
+
+
+def make_users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    calls = np.maximum(1, (rng.pareto(1.1, n) * 60).astype(np.int64))
+    return UserData(np.arange(n), calls, np.round(calls * rng.uniform(0.005, 0.05, n), 4))
+
+
+def assert_same_aggregate(got, expected):
+    assert got.count == expected.count and got.total_calls == expected.total_calls
+    np.testing.assert_allclose(got.dist, expected.dist, rtol=1e-9)
+    np.testing.assert_allclose(got.p99, expected.p99, rtol=1e-9)
+    got, expected = got.to_dashboard(), expected.to_dashboard()
+    assert got.percentile_data == expected.percentile_data
+    assert got.p99_internal == expected.p99_internal
+    for key, value in expected.stats.items():
+        assert got.stats[key] == pytest.approx(value, rel=1e-9), key
+
+
+@pytest.fixture(scope="module")
+def users():
+    return make_users(20_000)
+
+
+def partials(users, shards, **kwargs):
+    rows = np.array_split(np.random.default_rng(1).permutation(len(users)), shards)
+    return [PartialAggregate(**kwargs).update(users.calls[r], users.cost[r]) for r in rows]
+
+
+def test_merged_partials_match_full_aggregate(users):
+    parts = partials(users, 7)
+    full = PartialAggregate.from_users(users)
+    assert_same_aggregate(merge_all(parts), full)
+    # Merging is order-independent, and an empty partial changes nothing.
+    assert_same_aggregate(merge_all(parts[::-1]), full)
+    assert_same_aggregate(merge_all([PartialAggregate(), *parts]), full)
+
+
+def test_merged_tail_is_exact(users):
+    merged = merge_all(partials(users, 4))
+    expected = compute_dashboard(users).stats
+    for key in ("p99_threshold", "p99_user_count", "p99_total_calls", "max_calls"):
+        assert merged.to_dashboard().stats[key] == expected[key], key
+    assert merged.to_dashboard().stats["p99_total_cost"] == pytest.approx(expected["p99_total_cost"])
+
+
+def test_short_tail_falls_back_to_sketch(users):
+    # 20,000 users have 200 in their top 1%; a 50-user tail cannot hold them.
+    merged = merge_all(partials(users, 4, tail_size=50))
+    assert merged.tail_size == 50 and len(merged.tail_calls) == 50
+    got, expected = merged.to_dashboard().stats, compute_dashboard(users).stats
+    assert got["p99_threshold"] == pytest.approx(expected["p99_threshold"], rel=0.01)
+    assert got["p99_user_count"] == pytest.approx(expected["p99_user_count"], rel=0.05)
+    assert got["p99_total_cost"] == pytest.approx(expected["p99_total_cost"], rel=0.05)
+    assert got["max_calls"] == expected["max_calls"]
+
+
+def test_save_and_load_merge(users, tmp_path):
+    parts, paths = partials(users, 3), []
+    for i, part in enumerate(parts):
+        paths.append(tmp_path / f"part{i}.json")
+        save_aggregate(part, paths[-1])
+    assert_same_aggregate(load_aggregates(paths), PartialAggregate.from_users(users))
+    assert_same_aggregate(PartialAggregate.loads(parts[0].dumps()), parts[0])
+    with pytest.raises(ValueError, match="No partial aggregates"):
+        load_aggregates([])
+
+
+def test_mismatched_buckets_and_empty():
+    other = PartialAggregate(distribution_buckets=Buckets((0, 10), ("0-9", "10+")))
+    with pytest.raises(ValueError, match="different bucket edges"):
+        PartialAggregate().merge(other)
+    with pytest.raises(ValueError, match="No users"):
+        PartialAggregate().to_dashboard()
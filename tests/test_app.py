@@ -0,0 +1,43 @@
+"""
+The dashboard renders every tab on awkward data without raising
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p99.data import CALLS, COST, USER_ID
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+testing = pytest.importorskip("streamlit.testing.v1")
+
+
+def render(path, monkeypatch):
+    monkeypatch.setenv("P99_DATA_PATH", str(path))
+    return testing.AppTest.from_file(str(APP), default_timeout=120).run()
+
+
+def test_sample_snapshot(monkeypatch):
+    monkeypatch.delenv("P99_DATA_PATH", raising=False)
+    at = testing.AppTest.from_file(str(APP), default_timeout=120).run()
+    assert not at.exception
+
+
+def test_median_user_without_calls(tmp_path, monkeypatch):
+    calls = np.zeros(1_000, dtype=np.int64)
+    calls[-30:] = np.arange(1, 31) * 100
+    path = tmp_path / "users.parquet"
+    pd.DataFrame({USER_ID: np.arange(len(calls)), CALLS: calls, COST: calls * 0.01 + 0.001}).to_parquet(path)
+    at = render(path, monkeypatch)
+    assert not at.exception
+    assert any("P99 users make n/a more LLM calls" in m.value for m in at.markdown)
+
+
+def test_no_user_reaches_5k_calls(tmp_path, monkeypatch):
+    calls = np.random.default_rng(1).integers(1, 1_000, 5_000)
+    path = tmp_path / "users.parquet"
+    pd.DataFrame({USER_ID: np.arange(len(calls)), CALLS: calls, COST: calls * 0.01}).to_parquet(path)
+    assert not render(path, monkeypatch).exception
@@ -0,0 +1,69 @@
+"""
+Density grids and downsampled curves against NumPy's own histograms
+"""
+
+import numpy as np
+import pytest
+
+from p99.binning import calls_cost_density, density_grid, log_edges, sorted_curve
+
+
+@pytest.fixture(scope="module")
+def users():
+    rng = np.random.default_rng(8)
+    calls = np.maximum(1, (rng.pareto(1.2, 50_000) * 50).astype(np.int64))
+    cost = calls * rng.lognormal(-4, 0.5, len(calls))
+    cost[::50] = 0.0
+    return calls, cost
+
+
+@pytest.mark.parametrize("log", [False, True])
+def test_density_grid_matches_histogram2d(log):
+    rng = np.random.default_rng(9)
+    x, y, w = rng.lognormal(2, 1, 20_000), rng.lognormal(0, 1, 20_000), rng.random(20_000)
+    make = log_edges if log else (lambda lo, hi, n: np.linspace(lo, hi, n + 1))
+    x_edges, y_edges = make(1, 200, 30), make(0.1, 20, 20)
+    counts, sums = density_grid(x, y, x_edges, y_edges, weights=w, log=log)
+    # Out-of-range y is clamped into the edge cells, out-of-range x dropped.
+    keep = (x >= x_edges[0]) & (x <= x_edges[-1])
+    clamped = np.clip(y[keep], y_edges[0], y_edges[-1])
+    expected, _, _ = np.histogram2d(clamped, x[keep], bins=[y_edges, x_edges])
+    expected_w, _, _ = np.histogram2d(clamped, x[keep], bins=[y_edges, x_edges], weights=w[keep])
+    assert counts.shape == (20, 30)
+    assert np.array_equal(counts, expected)
+    np.testing.assert_allclose(sums, expected_w)
+
+
+def test_calls_cost_density_totals(users):
+    calls, cost = users
+    grid = calls_cost_density(calls, cost)
+    assert grid['users'].shape == (60, 80)
+    assert grid['users'].sum() == grid['total_users'] == len(calls)
+    assert grid['cost'].sum() == pytest.approx(cost.sum())
+    zoom = calls_cost_density(calls, cost, calls_range=(100, 1_000))
+    in_range = (calls >= 100) & (calls <= 1_000)
+    assert zoom['users'].sum() == zoom['total_users'] == in_range.sum()
+    assert zoom['calls_edges'][0] == 100 and zoom['calls_edges'][-1] == pytest.approx(1_000)
+    assert calls_cost_density(calls, np.zeros(len(calls))) is None
+
+
+def test_log_edges_degenerate_range():
+    edges = log_edges(5, 5, 4)
+    assert len(edges) == 5 and edges[0] == 5 and (np.diff(edges) > 0).all()
+    assert log_edges(0, 10, 3)[0] > 0
+
+
+def test_sorted_curve_windows(users):
+    ordered = np.sort(users[1])
+    pct, values = sorted_curve(ordered, points=500)
+    assert len(pct) == 500
+    assert pct[0] == pytest.approx(100 / len(ordered)) and pct[-1] == 100
+    # Each point is the nearest-rank value at its percentile.
+    ranks = np.round(pct / 100 * len(ordered)).astype(np.int64) - 1
+    assert np.array_equal(values, ordered[ranks])
+    assert values.max() == ordered[-1]
+    zoom_pct, zoom_values = sorted_curve(ordered, 99, 100, points=100)
+    assert zoom_pct[0] >= 99 and zoom_pct[-1] == 100
+    assert len(zoom_pct) == 100 and (np.diff(zoom_values) >= 0).all()
+    tiny_pct, tiny_values = sorted_curve(ordered[:3], 50, 60)
+    assert len(tiny_pct) == 1 and tiny_values[0] == ordered[1]
@@ -0,0 +1,32 @@
+"""
+Bucket labels built from edges
+"""
+
+import numpy as np
+import pytest
+
+from p99.buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS, Buckets, format_calls
+
+
+@pytest.mark.parametrize("buckets", [DISTRIBUTION_BUCKETS, P99_BUCKETS])
+def test_builtin_labels_from_edges(buckets):
+    assert Buckets.from_edges(buckets.edges).labels == buckets.labels
+
+
+def test_one_value_buckets_and_collisions():
+    assert Buckets.from_edges([1, 2, 3, 1500, 1501]).labels == ("1", "2", "3-1,499", "1.5K", "1,501+")
+    assert Buckets.from_edges([1000, 1001, 1002]).labels == ("1K", "1,001", "1,002+")
+
+
+@pytest.mark.parametrize("n, label", [(999, "999"), (1000, "1K"), (1499, "1,499"), (1500, "1.5K"),
+                                      (12500, "12.5K"), (2_000_000, "2M"), (1_234_000, "1,234,000")])
+def test_format_calls(n, label):
+    assert format_calls(n) == label
+
+
+def test_labels_unique():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        edges = np.unique(rng.choice([1, 2, 999, 1000, 1001, 1500, 1501, 2000, 2001, 5000, 5001], 6))
+        labels = Buckets.from_edges(edges).labels
+        assert len(set(labels)) == len(labels), labels
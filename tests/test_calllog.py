@@ -0,0 +1,68 @@
+"""
+Call-log totals against a pandas group-by over the same events
+"""
+
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p99.calllog import CallLogAccumulator, UserIdEncoder, read_call_logs
+from p99.data import COST, USER_ID
+
+
+@pytest.fixture(scope="module")
+def logs(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("calllog")
+    rng = np.random.default_rng(5)
+    n = 40_000
+    events = pd.DataFrame({USER_ID: [f"u{i}" for i in rng.zipf(1.4, n) % 3_000],
+                           COST: rng.uniform(0.001, 0.05, n).round(6)})
+    paths = []
+    for i, rows in enumerate(np.array_split(np.arange(n), 3)):
+        path = tmp / (f"calls{i}.jsonl" + (".gz" if i == 2 else ""))
+        opener = gzip.open if i == 2 else open
+        with opener(path, "wt") as f:
+            for user, cost in events.iloc[rows].itertuples(index=False):
+                f.write(json.dumps({USER_ID: user, COST: cost, "model": "m", "tokens": 12}) + "\n")
+        paths.append(path)
+    return events, paths
+
+
+def test_read_call_logs_matches_group_by(logs):
+    events, paths = logs
+    # A small block size makes every file span several Arrow batches.
+    users = read_call_logs(paths, block_size=64 << 10)
+    expected = events.groupby(USER_ID, sort=False)[COST].agg(['size', 'sum'])
+    assert list(users.ids()) == list(expected.index)  # order of first appearance
+    assert np.array_equal(users.calls, expected['size'])
+    np.testing.assert_allclose(users.cost, expected['sum'], rtol=1e-9)
+
+
+def test_null_user_id_is_rejected(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    path.write_text('{"user_id": "a", "cost": 0.1}\n{"user_id": null, "cost": 0.2}\n')
+    with pytest.raises(ValueError, match="1 call events have no user_id"):
+        read_call_logs([path])
+
+
+def test_encoder_is_dense_and_stable():
+    encoder = UserIdEncoder()
+    assert encoder.encode(["b", "a"]).tolist() == [0, 1]
+    assert encoder.encode(["c", "a", "b"]).tolist() == [2, 1, 0]
+    assert encoder.encode(["c"]).dtype == np.int32
+    assert len(encoder) == 3 and encoder.ids().tolist() == ["b", "a", "c"]
+    assert len(UserIdEncoder().ids()) == 0
+
+
+def test_accumulator_arrays_with_call_counts():
+    acc = CallLogAccumulator()
+    acc.update([7, 3, 7], [0.1, 0.2, 0.3])
+    acc.update([3, 9], [1.0, 2.0], calls=[4, 2])
+    users = acc.users()
+    assert users.ids().tolist() == [7, 3, 9]
+    assert users.calls.tolist() == [2, 5, 2]
+    np.testing.assert_allclose(users.cost, [0.4, 1.2, 2.0])
+    assert acc.events == 5
@@ -0,0 +1,80 @@
+"""
+Cube slices too small to have a P99 tail: no tab may divide by zero
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from p99.cube import CostCube, load_cube
+from p99.data import UserData
+from p99.metrics import compute_dashboard
+from p99.report import build_report
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+
+@pytest.fixture(scope="module")
+def tenants():
+    rng = np.random.default_rng(0)
+    calls = np.maximum(1, (rng.pareto(1.2, 20_000) * 50).astype(np.int64))
+    # "tiny" never reaches 5K calls, "free" costs nothing, "one" is a single user.
+    return {
+        "big": UserData(None, calls, calls * 0.02),
+        "tiny": UserData(None, [1, 3, 7, 12, 20], [0.01, 0.03, 0.07, 0.1, 0.2]),
+        "free": UserData(None, [2, 2, 5, 9], np.zeros(4)),
+        "one": UserData(None, [4], [0.5]),
+    }
+
+
+@pytest.fixture(scope="module")
+def cube(tenants):
+    cube = CostCube(["tenant"])
+    for tenant, users in tenants.items():
+        cube.update(users.calls, users.cost, {"tenant": np.full(len(users), tenant)})
+    return cube
+
+
+@pytest.mark.parametrize("tenant, has_ratio", [("tiny", True), ("free", False), ("one", False)])
+def test_report_on_small_slice(cube, tenant, has_ratio):
+    filters = {"tenant": [tenant]}
+    dashboard = cube.dashboard(filters)
+    with np.errstate(all="raise"):
+        split = build_report(dashboard, cube.simulator(filters))["pareto"]
+    assert split["p99_users"] == dashboard.stats["p99_user_count"]
+    assert split["p99_users"] + split["below_p99_users"] == dashboard.stats["total_users"]
+    assert (split["cost_per_user_ratio"] is not None) == has_ratio
+
+
+@pytest.mark.parametrize("tenant", ["tiny", "free", "one"])
+def test_app_renders_small_slice(cube, tenant, tmp_path, monkeypatch):
+    testing = pytest.importorskip("streamlit.testing.v1")
+    path = tmp_path / "cube.npz"
+    cube.save(path)
+    monkeypatch.setenv("P99_CUBE_PATH", str(path))
+    at = testing.AppTest.from_file(str(APP), default_timeout=120).run()
+    at.multiselect(key="cube_tenant").set_value([tenant]).run()
+    assert not at.exception
+
+
+def test_save_load_round_trip(cube, tmp_path):
+    path = tmp_path / "cube.npz"
+    cube.save(path)
+    loaded = load_cube(path)
+    for filters in (None, {"tenant": ["big"]}, {"tenant": ["tiny", "one"]}):
+        expected, got = cube.dashboard(filters), loaded.dashboard(filters)
+        assert got.percentile_data == expected.percentile_data
+        assert got.stats == pytest.approx(expected.stats, rel=1e-9)
+        limits = [10, 1000, 5000]
+        np.testing.assert_allclose(loaded.simulator(filters).sweep(limits)["capped_cost"],
+                                   cube.simulator(filters).sweep(limits)["capped_cost"], rtol=1e-6)
+
+
+def test_rollup_beyond_tail_is_close(cube, tenants):
+    # "big" has 20,000 users: its top 1% is far more than a cell's tail.
+    exact = compute_dashboard(tenants["big"]).stats
+    got = cube.dashboard({"tenant": ["big"]}).stats
+    assert got["p99_threshold"] == pytest.approx(exact["p99_threshold"], rel=0.01)
+    assert got["p99_user_count"] == pytest.approx(exact["p99_user_count"], rel=0.02)
+    assert got["p99_total_cost"] == pytest.approx(exact["p99_total_cost"], rel=0.02)
@@ -0,0 +1,47 @@
+"""
+Drill-down pages and lookups against sorting the users directly
+"""
+
+import numpy as np
+import pytest
+
+from p99.data import UserData
+from p99.drilldown import SORTS, UserIndex
+
+
+@pytest.fixture(scope="module")
+def users():
+    rng = np.random.default_rng(0)
+    calls = np.maximum(1, (rng.pareto(1.1, 10_000) * 40).astype(np.int64))
+    return UserData(np.array([f"u{i}" for i in range(len(calls))]), calls, calls * rng.uniform(0.005, 0.05, len(calls)))
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("min_calls, max_calls", [(1, None), (100, 1000), (5000, None), (10**9, None)])
+def test_pages_match_sort(users, sort, min_calls, max_calls):
+    index = UserIndex(users)
+    inside = (users.calls >= min_calls) & (users.calls < (max_calls or np.inf))
+    key = {"calls": users.calls, "cost": users.cost, "cost_per_call": users.cost / users.calls}[sort]
+    expected = np.sort(key[inside])[::-1]
+    got = []
+    for offset in range(0, len(expected) + 50, 50):
+        total, rows = index.page(min_calls, max_calls, offset=offset, limit=50, sort=sort)
+        assert total == inside.sum()
+        assert [r['rank'] for r in rows] == list(range(offset + 1, offset + 1 + len(rows)))
+        got += [r[sort] for r in rows]
+    # Rows round cost to 4 decimals and cost per call to 6.
+    np.testing.assert_allclose(got, expected, rtol=1e-9, atol={"calls": 0, "cost": 1e-4, "cost_per_call": 1e-6}[sort])
+
+
+def test_find(users):
+    index = UserIndex(users)
+    for row in (0, 17, int(np.argmax(users.calls))):
+        found = index.find(users.user_ids[row])
+        assert found['user_id'] == users.user_ids[row]
+        assert found['rank'] == 1 + int((users.calls > users.calls[row]).sum())
+    assert index.find("missing") is None
+
+
+def test_unknown_sort(users):
+    with pytest.raises(ValueError):
+        UserIndex(users).page(1, sort="name")
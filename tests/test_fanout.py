@@ -0,0 +1,67 @@
+"""
+Fan-out results, partial dashboards and errors against a gated backend
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from p99.backends import InMemoryBackend
+from p99.data import UserData
+from p99.fanout import DashboardFanout
+
+
+class GatedBackend(InMemoryBackend):
+    """Holds ``percentile_summary`` until the test opens the gate."""
+
+    def __init__(self, users):
+        super().__init__(users)
+        self.gate = threading.Event()
+
+    def percentile_summary(self, *args, **kwargs):
+        assert self.gate.wait(30)
+        return super().percentile_summary(*args, **kwargs)
+
+
+class BrokenBackend(InMemoryBackend):
+    def lorenz(self):
+        raise RuntimeError("lorenz query failed")
+
+
+@pytest.fixture(scope="module")
+def users():
+    rng = np.random.default_rng(10)
+    calls = np.maximum(1, (rng.pareto(1.2, 10_000) * 50).astype(np.int64))
+    return UserData(None, calls, calls * 0.01)
+
+
+def test_partial_then_full_dashboard(users):
+    backend = GatedBackend(users)
+    fanout = DashboardFanout(backend)
+    try:
+        fanout.result('totals', timeout=30)
+        fanout.wait_any(['distribution'], timeout=30)
+        assert fanout.ready(['totals', 'distribution'])
+        assert not fanout.ready(['summary'])
+        partial = fanout.dashboard()
+        assert partial.stats is None and partial.percentile_data is None
+        assert partial.distribution_data == backend.dashboard().distribution_data
+    finally:
+        backend.gate.set()
+    for name in fanout.futures:
+        fanout.result(name, timeout=30)
+    assert fanout.ready(list(fanout.futures))
+    full, expected = fanout.dashboard(), backend.dashboard()
+    assert full.stats == pytest.approx(expected.stats)
+    assert full.percentile_data == expected.percentile_data
+    assert full.p99_distribution == expected.p99_distribution
+    # The fan-out's simulator is the backend's cached one, not a second sort.
+    assert fanout.result('simulator') is backend.simulator()
+
+
+def test_query_error_is_reraised(users):
+    fanout = DashboardFanout(BrokenBackend(users))
+    with pytest.raises(RuntimeError, match="lorenz query failed"):
+        fanout.result('lorenz', timeout=30)
+    assert fanout.result('totals', timeout=30)[0] == len(users)
@@ -0,0 +1,85 @@
+"""
+Space-Saving bounds against exact per-user call counts
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p99.heavy import SpaceSaving, load_heavy_hitters
+
+CAPACITY = 200
+
+
+@pytest.fixture(scope="module")
+def events():
+    rng = np.random.default_rng(6)
+    n = 200_000
+    return rng.zipf(1.3, n) % 20_000, rng.uniform(0.001, 0.05, n)
+
+
+def feed(user_ids, cost, batches=17):
+    summary = SpaceSaving(CAPACITY)
+    for rows in np.array_split(np.arange(len(user_ids)), batches):
+        summary.update(user_ids[rows], cost[rows])
+    return summary
+
+
+def check_bounds(summary, user_ids, cost):
+    exact = pd.DataFrame({'id': user_ids, 'cost': cost}).groupby('id')['cost'].agg(['size', 'sum'])
+    assert summary.events == len(user_ids)
+    assert len(summary) == CAPACITY
+    assert summary.floor <= summary.events / CAPACITY
+    true = exact['size'].reindex(summary.ids).to_numpy()
+    assert (summary.counts - summary.errors <= true).all()
+    assert (true <= summary.counts).all()
+    assert (summary.errors <= summary.floor).all()
+    assert (summary.cost <= exact['sum'].reindex(summary.ids).to_numpy() + 1e-9).all()
+    # Anyone heavier than the floor is monitored.
+    assert set(exact.index[exact['size'] > summary.floor]) <= set(summary.ids.tolist())
+    return exact
+
+
+def test_stream_bounds(events):
+    summary = feed(*events)
+    exact = check_bounds(summary, *events)
+    top = summary.top(10)
+    assert [row['rank'] for row in top] == list(range(1, 11))
+    true_top = set(exact['size'].nlargest(10).index)
+    assert all(row['user_id'] in true_top for row in top if row['guaranteed'])
+    assert any(row['guaranteed'] for row in top)
+
+
+def test_merged_shards_keep_bounds(events):
+    user_ids, cost = events
+    shards = [feed(user_ids[rows], cost[rows], batches=5)
+              for rows in np.array_split(np.arange(len(user_ids)), 4)]
+    merged = SpaceSaving(CAPACITY)
+    for shard in shards:
+        merged.merge(shard)
+    check_bounds(merged, user_ids, cost)
+    assert merged.total_cost == pytest.approx(cost.sum())
+
+
+def test_save_load_round_trip(events, tmp_path):
+    summary = feed(*events)
+    path = tmp_path / "hh.json"
+    summary.save(path)
+    loaded = load_heavy_hitters(path)
+    assert loaded.top(50) == summary.top(50)
+    assert loaded.floor == summary.floor and loaded.events == summary.events
+    empty = tmp_path / "empty.json"
+    SpaceSaving().save(empty)
+    assert load_heavy_hitters(empty).top() == []
+    path.write_text('{"format": "something-else"}')
+    with pytest.raises(ValueError, match="heavy-hitters"):
+        load_heavy_hitters(path)
+
+
+def test_exact_below_capacity():
+    summary = SpaceSaving(10).update(["a", "b", "a"], [1.0, 2.0, 3.0]).update(["c"], calls=[5])
+    assert summary.floor == 0
+    assert [(row['user_id'], row['calls'], row['calls_min'], row['cost']) for row in summary.top()] == [
+        ("c", 5, 5, 0.0), ("a", 2, 2, 4.0), ("b", 1, 1, 2.0)]
+    with pytest.raises(ValueError, match="capacity"):
+        SpaceSaving(0)
@@ -0,0 +1,78 @@
+"""
+Incremental daily updates against recomputing the month from scratch
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p99.aggregate import PartialAggregate
+from p99.data import CALLS, COST, USER_ID, UserData
+from p99.incremental import IncrementalState
+
+from test_aggregate import assert_same_aggregate, make_users
+
+
+def days(n_days, id_space, seed=2):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_days):
+        # Existing and new users, some repeated within the day.
+        ids = rng.integers(0, id_space, 2_000)
+        calls = rng.integers(1, 400, len(ids))
+        yield ids, calls, np.round(calls * 0.02, 4)
+
+
+def recompute(month, day_list):
+    totals = pd.DataFrame({CALLS: month.calls, COST: month.cost}, index=month.ids())
+    for ids, calls, cost in day_list:
+        day = pd.DataFrame({CALLS: calls, COST: cost}, index=ids).groupby(level=0).sum()
+        totals = totals.add(day, fill_value=0)
+    return UserData(totals.index.to_numpy(), totals[CALLS].to_numpy(np.int64), totals[COST].to_numpy())
+
+
+@pytest.mark.parametrize("tail_size", [65536, 100])
+def test_incremental_matches_recompute(tail_size):
+    month = make_users(5_000, seed=3)
+    day_list = list(days(5, 6_000))
+    state = IncrementalState.from_users(month, tail_size=tail_size)
+    for day in day_list:
+        state.apply_day(*day)
+    recomputed = recompute(month, day_list)
+    assert len(state) == len(recomputed)
+    got = state.users
+    order = np.argsort(got.user_ids)
+    assert np.array_equal(got.user_ids[order], recomputed.user_ids)
+    assert np.array_equal(got.calls[order], recomputed.calls)
+    # The tail kept from yesterday's top-K and today's active users is the true top-K.
+    assert np.array_equal(np.sort(state.aggregate.tail_calls), np.sort(recomputed.calls)[-tail_size:])
+    assert_same_aggregate(state.aggregate, PartialAggregate.from_users(recomputed, tail_size=tail_size))
+
+
+def test_string_ids_from_empty_state():
+    state = IncrementalState()
+    state.apply_day(np.array(["a", "b", "a"]), [1, 2, 3], [0.1, 0.2, 0.3])
+    state.apply_day(np.array(["c", "a"]), [5, 1], [0.5, 0.1])
+    users = state.users
+    assert dict(zip(users.user_ids, users.calls)) == {"a": 5, "b": 2, "c": 5}
+    assert state.dashboard().stats['total_users'] == 3
+
+
+def test_save_load_then_continue(tmp_path):
+    month = make_users(3_000, seed=4)
+    day_list = list(days(3, 4_000, seed=5))
+    state = IncrementalState.from_users(month)
+    state.apply_day(*day_list[0])
+    state.save(tmp_path / "state.npz")
+    loaded = IncrementalState.load(tmp_path / "state.npz")
+    for day in day_list[1:]:
+        loaded.apply_day(*day)
+    assert_same_aggregate(loaded.aggregate, PartialAggregate.from_users(recompute(month, day_list)))
+
+
+def test_apply_file(tmp_path):
+    month = make_users(2_000, seed=6)
+    ids, calls, cost = next(days(1, 3_000, seed=7))
+    path = tmp_path / "day.parquet"
+    pd.DataFrame({USER_ID: ids, CALLS: calls, COST: cost}).to_parquet(path)
+    state = IncrementalState.from_users(month).apply_file(path, chunk_rows=300)
+    assert_same_aggregate(state.aggregate, PartialAggregate.from_users(recompute(month, [(ids, calls, cost)])))
@@ -0,0 +1,70 @@
+"""
+Lorenz curve, Gini and LTTB against brute-force definitions
+"""
+
+import numpy as np
+import pytest
+
+from p99.lorenz import LorenzCurve, lttb
+
+
+def costs(n=4_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.pareto(1.1, n) * rng.uniform(0.5, 2, n)
+
+
+def brute_gini(x):
+    # Mean absolute difference over all pairs, halved and scaled by the mean.
+    return np.abs(x[:, None] - x[None, :]).sum() / (2 * len(x) ** 2 * x.mean())
+
+
+@pytest.mark.parametrize("values", [costs(), costs(n=7, seed=1), np.ones(50), np.r_[np.zeros(99), 5.0]])
+def test_gini_matches_pairwise_definition(values):
+    assert LorenzCurve.from_costs(values).gini == pytest.approx(brute_gini(values), abs=1e-12)
+
+
+def test_top_share_matches_sorting():
+    values = costs(n=5_000)
+    curve = LorenzCurve.from_costs(values)
+    ordered = np.sort(values)[::-1]
+    for pct in (0.1, 1, 5, 10, 20, 50, 100):
+        k = round(len(values) * pct / 100)
+        assert curve.top_share(pct) == pytest.approx(ordered[:k].sum() / values.sum() * 100)
+    # Between whole users the share is linear in the fraction of a user.
+    half = (ordered[0] + ordered[1] / 2) / values.sum() * 100
+    assert curve.top_share(1.5 / len(values) * 100) == pytest.approx(half)
+    assert curve.top_shares()[0] == {'top_pct': 0.1, 'cost_pct': pytest.approx(float(curve.top_share(0.1)))}
+
+
+def test_sampled_ranks_interpolate_the_full_curve():
+    full = LorenzCurve.from_costs(costs())
+    ranks = np.r_[0:full.users:97, full.users]
+    sampled = LorenzCurve(full.cum_cost[ranks], full.users, full.gini, ranks=ranks)
+    at_ranks = 100 * (1 - ranks / full.users)
+    np.testing.assert_allclose(sampled.top_share(at_ranks), full.top_share(at_ranks))
+    for pct in (10, 50):
+        assert sampled.top_share(pct) == pytest.approx(full.top_share(pct), rel=0.02)
+    x, y = sampled.points(max_points=20)
+    assert len(x) == 20 and x[0] == 0 and x[-1] == 100 and y[-1] == pytest.approx(100)
+
+
+def test_free_and_empty():
+    free = LorenzCurve.from_costs(np.zeros(10))
+    assert free.gini == 0 and free.top_share(10) == 0
+    assert free.points(max_points=5)[1].tolist() == [0.0] * 5
+    with pytest.raises(ValueError, match="No users"):
+        LorenzCurve.from_costs(np.zeros(0))
+
+
+def test_lttb_keeps_ends_and_spikes():
+    y = np.sin(np.linspace(0, 20, 10_000))
+    y[6_543] = 50.0
+    idx = lttb(None, y, 300)
+    assert len(idx) == 300 and idx[0] == 0 and idx[-1] == len(y) - 1
+    assert (np.diff(idx) > 0).all()
+    assert 6_543 in idx
+    # Explicit x gives the same picks as implicit evenly spaced x.
+    assert np.array_equal(lttb(np.arange(len(y)) * 2.5, y, 300), idx)
+    assert np.array_equal(lttb(None, y[:10], 50), np.arange(10))
+    with pytest.raises(ValueError, match="at least 3"):
+        lttb(None, y, 2)
@@ -0,0 +1,57 @@
+"""
+Sharded ingestion of call logs against a plain group-by
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p99.aggregate import PartialAggregate
+from p99.data import COST, USER_ID
+from p99.parallel import aggregate_call_logs, ingest_call_logs
+
+
+@pytest.fixture(scope="module")
+def partitions(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("logs")
+    rng = np.random.default_rng(0)
+    events = pd.DataFrame({USER_ID: rng.zipf(1.3, 60_000) % 5_000, COST: rng.uniform(0.001, 0.05, 60_000)})
+    paths = []
+    for i, rows in enumerate(np.array_split(np.arange(len(events)), 4)):
+        path = tmp / f"part{i}.parquet"
+        events.iloc[rows].to_parquet(path)
+        paths.append(path)
+    empty = tmp / "empty.parquet"
+    events.iloc[:0].to_parquet(empty)
+    return events, paths + [empty]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ingest_matches_group_by(partitions, workers):
+    events, paths = partitions
+    users = ingest_call_logs(paths, workers=workers, shards=3, chunk_rows=7_000)
+    expected = events.groupby(USER_ID)[COST].agg(['size', 'sum'])
+    got = pd.DataFrame({'size': users.calls, 'sum': users.cost}, index=users.user_ids).sort_index()
+    assert got.index.is_unique
+    assert np.array_equal(got.index, expected.index)
+    assert np.array_equal(got['size'], expected['size'])
+    np.testing.assert_allclose(got['sum'], expected['sum'], rtol=1e-9)
+
+
+def test_aggregate_matches_ingest(partitions):
+    _, paths = partitions
+    users = ingest_call_logs(paths, workers=1)
+    agg = aggregate_call_logs(paths, workers=2, shards=5)
+    full = PartialAggregate.from_users(users)
+    assert agg.count == full.count and agg.total_calls == full.total_calls
+    np.testing.assert_allclose(agg.dist, full.dist, rtol=1e-9)
+    assert agg.to_dashboard().stats['p99_threshold'] == full.to_dashboard().stats['p99_threshold']
+
+
+def test_empty_inputs(partitions):
+    _, paths = partitions
+    assert len(ingest_call_logs(paths[-1:], workers=1)) == 0
+    assert aggregate_call_logs(paths[-1:], workers=1).count == 0
+    for ingest in (ingest_call_logs, aggregate_call_logs):
+        with pytest.raises(ValueError, match="No call-log partitions"):
+            ingest([])
@@ -0,0 +1,94 @@
+"""
+Every engine agrees with the exact in-memory one on the same users
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p99.backends import DuckDBBackend, InMemoryBackend, SQLiteBackend, connect
+from p99.buckets import DISTRIBUTION_BUCKETS, P99_BUCKETS
+from p99.data import CALLS, COST, USER_ID, UserData
+from p99.metrics import PERCENTILES
+
+LIMITS = [1, 50, 500, 1000, 1500, 5000, 25000, 10**7]
+
+
+def make_users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    calls = np.maximum(1, (rng.pareto(1.1, n) * 60).astype(np.int64))
+    cost = np.round(calls * rng.uniform(0.005, 0.05, n), 4)
+    return UserData(np.arange(n), calls, cost)
+
+
+@pytest.fixture(scope="module")
+def users():
+    return make_users(20_000)
+
+
+@pytest.fixture(scope="module")
+def memory(users):
+    return InMemoryBackend(users)
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb"])
+def sql(request, users, tmp_path_factory):
+    tmp = tmp_path_factory.mktemp(request.param)
+    if request.param == "sqlite":
+        path = tmp / "users.sqlite"
+        SQLiteBackend.from_users(users, path=str(path)).connection.close()
+    else:
+        pytest.importorskip("duckdb")
+        source = tmp / "users.parquet"
+        pd.DataFrame({USER_ID: users.user_ids, CALLS: users.calls, COST: users.cost}).to_parquet(source)
+        path = tmp / "users.duckdb"
+        DuckDBBackend.from_file(source, path=str(path)).connection.close()
+    return connect(f"{request.param}://{path}")
+
+
+def test_sql_percentiles(memory, sql):
+    assert np.array_equal(sql.percentiles(PERCENTILES), memory.percentiles(PERCENTILES))
+    assert np.array_equal(sql.percentiles([50, 90, 99], min_calls=1000),
+                          memory.percentiles([50, 90, 99], min_calls=1000))
+
+
+@pytest.mark.parametrize("buckets", [DISTRIBUTION_BUCKETS, P99_BUCKETS])
+def test_sql_bucket_totals(memory, sql, buckets):
+    expected, got = memory.bucket_totals(buckets), sql.bucket_totals(buckets)
+    assert np.array_equal(got[0], expected[0])
+    np.testing.assert_allclose(got[1:], expected[1:], rtol=1e-9)
+
+
+def test_sql_capped_cost(memory, sql):
+    expected, got = memory.capped(LIMITS), sql.capped(LIMITS)
+    np.testing.assert_allclose(got[0], expected[0], rtol=1e-9)
+    assert np.array_equal(got[1], expected[1])
+
+
+def test_sql_gini(memory, sql):
+    assert sql.lorenz().gini == pytest.approx(memory.lorenz().gini, rel=1e-9)
+
+
+def test_sql_dashboard_stats(memory, sql):
+    expected, got = memory.dashboard().stats, sql.dashboard().stats
+    assert got.keys() == expected.keys()
+    for key, value in expected.items():
+        assert got[key] == pytest.approx(value, rel=1e-9), key
+
+
+def test_connect_relative_path(users, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SQLiteBackend.from_users(users, path="users.sqlite").connection.close()
+    assert connect("sqlite://users.sqlite").totals() == pytest.approx(InMemoryBackend(users).totals(), rel=1e-9)
+    with pytest.raises(ValueError, match="no file path"):
+        connect("sqlite://")
+
+
+def test_sql_find_user_ranks_ties_alike(users, memory, sql):
+    # Heavy, median and light users; the light ones share their call count with many others.
+    order = np.argsort(users.calls, kind='stable')
+    for row in order[[-1, -2, len(order) // 2, 10, 0]]:
+        expected, got = memory.find_user(int(users.user_ids[row])), sql.find_user(int(users.user_ids[row]))
+        assert (got['rank'], got['calls']) == (expected['rank'], expected['calls'])
+        assert expected['rank'] == 1 + int((users.calls > users.calls[row]).sum())
+    assert sql.find_user("nobody") is None and memory.find_user("nobody") is None
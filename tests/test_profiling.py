@@ -0,0 +1,73 @@
+"""
+Profiler sections, allocation accounting and the disabled no-op path
+"""
+
+import time
+import tracemalloc
+
+import pytest
+
+from p99.profiling import Profiler
+
+MB = 1 << 20
+
+
+def test_sections_nest_and_marks_close():
+    profiler = Profiler(trace_allocations=False).start()
+    profiler.mark("load")
+    with profiler.section("parse"):
+        time.sleep(0.01)
+    profiler.mark("render")
+    with profiler.section("chart"):
+        with profiler.section("lorenz"):
+            pass
+    profiler.stop()
+    assert [(s.name, s.depth) for s in profiler.sections] == [
+        ("load", 0), ("parse", 1), ("render", 0), ("chart", 1), ("lorenz", 2)]
+    load, parse = profiler.sections[:2]
+    assert parse.seconds >= 0.01 and load.seconds >= parse.seconds
+    assert profiler.total_seconds >= load.seconds
+    assert profiler.rows()[1] == {'section': "  parse", 'ms': round(parse.seconds * 1000, 1),
+                                  'alloc_net_kb': None, 'alloc_peak_kb': None}
+
+
+def test_allocations_net_and_peak():
+    profiler = Profiler().start()
+    profiler.mark("outer")
+    with profiler.section("kept"):
+        kept = bytearray(4 * MB)
+    with profiler.section("freed"):
+        scratch = bytearray(8 * MB)
+        del scratch
+    profiler.stop()
+    outer, kept_section, freed = profiler.sections
+    assert kept_section.alloc_net == pytest.approx(4 * MB, rel=0.05)
+    assert abs(freed.alloc_net) < MB and freed.alloc_peak == pytest.approx(8 * MB, rel=0.05)
+    # The parent's peak covers its children's, though the child reset the peak.
+    assert outer.alloc_peak >= 4 * MB + freed.alloc_peak - MB
+    assert not tracemalloc.is_tracing()
+    assert len(kept) == 4 * MB
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = Profiler(enabled=False, cprofile_dir=tmp_path).start()
+    profiler.mark("load")
+    with profiler.section("parse"):
+        pass
+    profiler.record_payload("chart", 123)
+    profiler.stop()
+    assert profiler.sections == [] and profiler.payloads == {}
+    assert profiler.top_functions() is None and list(tmp_path.iterdir()) == []
+
+
+def test_payloads_and_cprofile_dump(tmp_path):
+    profiler = Profiler(trace_allocations=False, cprofile_dir=tmp_path / "prof").start()
+    profiler.record_payload("lorenz", 32_000)
+    sum(i * i for i in range(10_000))
+    profiler.stop()
+    profiler.record_payload("late", 1)  # after stop: ignored
+    assert profiler.payloads == {"lorenz": 32_000}
+    if profiler.stats_path is None:
+        pytest.skip("another profiler owns this interpreter")
+    assert (tmp_path / "prof").is_dir() and profiler.stats_path.endswith(".pstats")
+    assert "function calls" in profiler.top_functions()
@@ -0,0 +1,71 @@
+"""
+Policy grids against capping every user directly
+"""
+
+import numpy as np
+import pytest
+
+from p99.simulator import AnchorSimulator, CostSimulator, policy_grid
+
+from test_aggregate import make_users
+
+LIMITS = np.array([10, 100, 750, 3000, 20000])
+PRICE_FACTORS = np.array([0.8, 1.0, 1.5])
+
+
+@pytest.fixture(scope="module")
+def plans():
+    users = make_users(20_000)
+    plan = np.where(np.arange(len(users)) % 3 == 0, "pro", "free")
+    sims = {p: CostSimulator(users.calls[plan == p], users.cost[plan == p]) for p in ("free", "pro")}
+    return users, plan, sims
+
+
+def brute_force(users, plan, limits, overage_rate, tier_ratios):
+    cost = np.zeros(len(limits))
+    affected = np.zeros(len(limits), dtype=np.int64)
+    for i, limit in enumerate(limits):
+        cap = np.rint(limit * np.vectorize(tier_ratios.get)(plan))
+        over = users.calls > cap
+        capped = np.where(over, users.cost * cap / users.calls, users.cost)
+        cost[i] = capped.sum() + overage_rate * (users.cost - capped).sum()
+        affected[i] = over.sum()
+    return cost, affected
+
+
+@pytest.mark.parametrize("overage_rate", [0.0, 0.2])
+def test_policy_grid_matches_brute_force(plans, overage_rate):
+    users, plan, sims = plans
+    tier_ratios = {"free": 1.0, "pro": 2.5}
+    grid = policy_grid(sims, LIMITS, PRICE_FACTORS, overage_rate, tier_ratios)
+    cost, affected = brute_force(users, plan, LIMITS, overage_rate, tier_ratios)
+    assert grid['cost'].shape == (len(PRICE_FACTORS), len(LIMITS))
+    np.testing.assert_allclose(grid['cost'], np.outer(PRICE_FACTORS, cost), rtol=1e-9)
+    np.testing.assert_allclose(grid['savings'], users.cost.sum() - np.outer(PRICE_FACTORS, cost), rtol=1e-9)
+    assert np.array_equal(grid['users_affected'], affected)
+    assert grid['baseline_cost'] == pytest.approx(users.cost.sum(), rel=1e-12)
+
+
+def test_full_overage_is_price_change_only(plans):
+    users, _, sims = plans
+    grid = policy_grid(sims, LIMITS, PRICE_FACTORS, overage_rate=1.0)
+    expected = np.outer(PRICE_FACTORS, np.full(len(LIMITS), users.cost.sum()))
+    np.testing.assert_allclose(grid['cost'], expected, rtol=1e-9)
+
+
+def test_single_plan_matches_sweep(plans):
+    users, _, _ = plans
+    sim = CostSimulator.from_users(users)
+    grid = policy_grid({"all": sim}, LIMITS, [1.0])
+    np.testing.assert_allclose(grid['cost'][0], sim.sweep(LIMITS)['capped_cost'])
+    assert np.array_equal(grid['users_affected'], sim.sweep(LIMITS)['users_affected'])
+
+
+def test_anchor_simulator_in_grid(plans):
+    users, _, _ = plans
+    sim = CostSimulator.from_users(users)
+    sweep = sim.sweep(LIMITS)
+    anchors = AnchorSimulator(dict(zip(LIMITS, sweep['capped_cost'])), dict(zip(LIMITS, sweep['users_affected'])),
+                              sim.total_cost, sim.total_users)
+    grid = policy_grid({"all": anchors}, LIMITS, PRICE_FACTORS, overage_rate=0.5)
+    np.testing.assert_allclose(grid['cost'], policy_grid({"all": sim}, LIMITS, PRICE_FACTORS, 0.5)['cost'])
@@ -0,0 +1,86 @@
+"""
+Sketch quantiles against exact nearest-rank percentiles
+"""
+
+import numpy as np
+import pytest
+
+from p99.sketch import QuantileSketch
+
+QS = [0, 0.01, 0.25, 0.5, 0.9, 0.99, 0.999, 0.9999, 1]
+
+
+def exact(values, q):
+    ordered = np.sort(values)
+    rank = np.clip(np.ceil(np.asarray(q) * len(ordered)) - 1, 0, len(ordered) - 1).astype(int)
+    return ordered[rank]
+
+
+def samples():
+    rng = np.random.default_rng(3)
+    calls = np.maximum(1, (rng.pareto(1.2, 200_000) * 50).astype(np.int64))
+    yield "calls", calls
+    yield "lognormal", rng.lognormal(0, 3, 100_000)
+    yield "with_zeros", np.where(rng.random(50_000) < 0.3, 0.0, rng.exponential(5, 50_000))
+
+
+@pytest.mark.parametrize("name, values", list(samples()))
+@pytest.mark.parametrize("accuracy", [0.01, 0.005])
+def test_quantiles_within_relative_accuracy(name, values, accuracy):
+    sketch = QuantileSketch(relative_accuracy=accuracy)
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+    assert len(sketch) == len(values)
+    got, want = sketch.quantile(QS), exact(values, QS)
+    np.testing.assert_array_less(np.abs(got - want), accuracy * want + 1e-12)
+
+
+def test_merge_matches_single_pass():
+    values = dict(samples())["calls"]
+    whole = QuantileSketch().update(values)
+    parts = [QuantileSketch().update(chunk) for chunk in np.array_split(values, 5)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged = merged.merge(part)
+    assert merged.to_dict() == whole.to_dict()
+    with pytest.raises(ValueError, match="relative accuracy"):
+        whole.merge(QuantileSketch(relative_accuracy=0.01))
+
+
+def test_remove_undoes_update():
+    rng = np.random.default_rng(4)
+    kept, stale = rng.exponential(10, 5_000), rng.exponential(10, 1_000)
+    sketch = QuantileSketch().update(kept).update(stale).remove(stale)
+    np.testing.assert_array_equal(sketch.quantile(QS[1:-1]), QuantileSketch().update(kept).quantile(QS[1:-1]))
+
+
+def test_collapse_keeps_the_tail_accurate():
+    values = dict(samples())["lognormal"]
+    assert len(QuantileSketch(relative_accuracy=0.005).update(values)._bins) > 2048
+    sketch = QuantileSketch(relative_accuracy=0.005, max_bins=1024).update(values)
+    assert len(sketch._bins) == 1024
+    tail = [0.9, 0.99, 0.999, 1]
+    np.testing.assert_array_less(np.abs(sketch.quantile(tail) - exact(values, tail)),
+                                 0.005 * exact(values, tail))
+
+
+def test_weights_and_rank():
+    sketch = QuantileSketch().update([1.0, 10.0, 100.0], weights=[5, 3, 2])
+    assert len(sketch) == 10
+    assert sketch.rank(10.0) == 5
+    assert sketch.rank(0) == 0
+    assert sketch.percentile(50) == pytest.approx(1.0, rel=0.005)
+
+
+def test_round_trip_and_errors():
+    sketch = QuantileSketch().update(dict(samples())["with_zeros"])
+    clone = QuantileSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(clone.quantile(QS), sketch.quantile(QS))
+    with pytest.raises(ValueError, match="empty"):
+        QuantileSketch().quantile(0.5)
+    with pytest.raises(ValueError, match="non-negative"):
+        QuantileSketch().update([-1.0])
+    with pytest.raises(ValueError, match="in \\[0, 1\\]"):
+        sketch.quantile(1.5)
+    with pytest.raises(ValueError, match="relative_accuracy"):
+        QuantileSketch(relative_accuracy=0)
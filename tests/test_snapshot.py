@@ -0,0 +1,110 @@
+"""
+Snapshot round trips and the atomic swap readers rely on
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from p99.data import UserData
+from p99.snapshot import (META, SnapshotWriter, is_snapshot, open_snapshot, snapshot_version,
+                          write_snapshot)
+
+
+def make_users(n=5_000, seed=0, ids=None):
+    rng = np.random.default_rng(seed)
+    calls = np.maximum(1, (rng.pareto(1.2, n) * 50).astype(np.int64))
+    return UserData(ids, calls, calls * rng.uniform(0.001, 0.05, n))
+
+
+def leftovers(directory):
+    return sorted(p.name for p in directory.iterdir() if p.name.startswith("."))
+
+
+@pytest.mark.parametrize("ids", [
+    None,
+    np.random.default_rng(1).choice(10**12, 5_000, replace=False),
+    np.array([f"user-{i}-é" for i in np.random.default_rng(2).permutation(5_000)]),
+])
+def test_round_trip(tmp_path, ids):
+    users = make_users(ids=ids)
+    path = tmp_path / "users.p99snap"
+    meta = write_snapshot(users, path)
+    assert is_snapshot(path) and meta['users'] == len(users)
+    snap = open_snapshot(path)
+    assert not snap.calls.flags.owndata  # a view of the mapped file, not a copy
+    assert np.array_equal(snap.ids(), users.ids())
+    assert np.array_equal(snap.calls, users.calls)
+    np.testing.assert_allclose(snap.cost, users.cost, rtol=1e-6)
+    assert leftovers(tmp_path) == []
+
+
+def test_version_is_content_hash(tmp_path):
+    users = make_users()
+    a = write_snapshot(users, tmp_path / "a")['version']
+    assert write_snapshot(users, tmp_path / "b")['version'] == a
+    assert write_snapshot(make_users(seed=1), tmp_path / "c")['version'] != a
+    assert write_snapshot(users, tmp_path / "d", version="2026-10")['version'] == "2026-10"
+    assert snapshot_version(tmp_path / "d") == "2026-10"
+
+
+def test_swap_keeps_open_readers_and_leaves_no_temp_dirs(tmp_path):
+    path = tmp_path / "users.p99snap"
+    old, new = make_users(seed=0), make_users(n=3_000, seed=1)
+    write_snapshot(old, path)
+    reader = open_snapshot(path)
+    write_snapshot(new, path)
+    # The old mapping still reads the old data; reopening sees the new one.
+    assert np.array_equal(reader.calls, old.calls)
+    assert np.array_equal(open_snapshot(path).calls, new.calls)
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_write_keeps_previous_snapshot(tmp_path):
+    path = tmp_path / "users.p99snap"
+    users = make_users()
+    version = write_snapshot(users, path)['version']
+    with pytest.raises(ValueError, match="uint32"):
+        write_snapshot(UserData(None, [2**33], [1.0]), path)
+    with pytest.raises(RuntimeError):
+        with SnapshotWriter(path, 10) as writer:
+            writer.write(np.ones(5), np.ones(5))
+            raise RuntimeError("source went away")
+    assert snapshot_version(path) == version
+    assert np.array_equal(open_snapshot(path).calls, users.calls)
+    assert leftovers(tmp_path) == []
+
+
+def test_writer_matches_write_snapshot(tmp_path):
+    users = make_users(ids=np.arange(5_000) * 3 + 7)
+    with SnapshotWriter(tmp_path / "chunked", len(users)) as writer:
+        for rows in np.array_split(np.arange(len(users)), 4):
+            writer.write(users.calls[rows], users.cost[rows], users.user_ids[rows])
+    write_snapshot(users, tmp_path / "whole")
+    chunked, whole = open_snapshot(tmp_path / "chunked"), open_snapshot(tmp_path / "whole")
+    assert np.array_equal(chunked.ids(), whole.ids())
+    assert np.array_equal(chunked.calls, whole.calls)
+    assert snapshot_version(tmp_path / "chunked") == snapshot_version(tmp_path / "whole")
+
+
+def test_writer_rejects_bad_input(tmp_path):
+    writer = SnapshotWriter(tmp_path / "s", 4)
+    writer.write([1, 2], [0.1, 0.2], [5, 6])
+    with pytest.raises(ValueError, match="ascending"):
+        writer.write([1], [0.1], [6])
+    with pytest.raises(ValueError, match="declared 4"):
+        writer.write([1, 2, 3], [0.1, 0.2, 0.3], [7, 8, 9])
+    with pytest.raises(ValueError, match="Wrote 2 of the declared 4"):
+        writer.close()
+    assert not (tmp_path / "s").exists() and leftovers(tmp_path) == []
+
+
+def test_newer_format_is_rejected(tmp_path):
+    path = tmp_path / "users.p99snap"
+    write_snapshot(make_users(n=10), path)
+    meta = json.loads((path / META).read_text())
+    meta['format_version'] += 1
+    (path / META).write_text(json.dumps(meta))
+    with pytest.raises(ValueError, match="newer than supported"):
+        open_snapshot(path)
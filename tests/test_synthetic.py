@@ -0,0 +1,43 @@
+"""
+Synthetic users: reproducible and calibrated to the reference tables
+"""
+
+import numpy as np
+import pytest
+
+from p99.metrics import percentiles_of
+from p99.reference import distribution_data, percentile_data
+from p99.synthetic import BLOCK_USERS, generate_users, iter_users
+
+
+def test_output_does_not_depend_on_chunking():
+    n = BLOCK_USERS + 1_000
+    whole = generate_users(n, seed=7)
+    chunks = list(iter_users(n, seed=7, chunk_users=1))
+    assert len(chunks) == 2
+    assert np.array_equal(np.concatenate([c.calls for c in chunks]), whole.calls)
+    assert np.array_equal(np.concatenate([c.user_ids for c in chunks]), np.arange(n))
+    assert not np.array_equal(generate_users(1_000, seed=8).calls, whole.calls[:1_000])
+
+
+def test_matches_reference_percentiles():
+    users = generate_users(300_000)
+    pcts = [p for p in percentile_data['percentile'] if p < 100]
+    expected = np.array([v for p, v in zip(percentile_data['percentile'], percentile_data['llm_calls']) if p < 100])
+    got = percentiles_of(users.calls, pcts).astype(np.float64)
+    # Sampling noise grows in the tail; 1-2 calls of rounding at the bottom.
+    np.testing.assert_allclose(got, expected, rtol=0.06, atol=2)
+
+
+def test_matches_reference_cost_per_call():
+    users = generate_users(300_000)
+    cost_per_call = users.cost.sum() / users.calls.sum()
+    expected = sum(r['total_cost'] for r in distribution_data) / sum(r['user_count'] * r['avg_calls']
+                                                                      for r in distribution_data)
+    assert cost_per_call == pytest.approx(expected, rel=0.05)
+
+
+def test_zero_and_negative_users():
+    assert len(generate_users(0)) == 0
+    with pytest.raises(ValueError):
+        generate_users(-1)
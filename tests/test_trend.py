@@ -0,0 +1,57 @@
+"""
+Trend windows against merging the raw user-days directly
+"""
+
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from p99.aggregate import PartialAggregate
+from p99.trend import TrendStore
+
+START = dt.date(2026, 1, 1)
+
+
+def day_users(i):
+    rng = np.random.default_rng(i)
+    n = 500 + 37 * i
+    calls = np.maximum(1, (rng.pareto(1.2, n) * (20 + i)).astype(np.int64))
+    return np.arange(n), calls, calls * 0.01
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TrendStore(tmp_path / "trend")
+    for i in range(12):
+        if i != 5:  # a missing day
+            store.add_day(START + dt.timedelta(days=i), *day_users(i))
+    return store
+
+
+@pytest.mark.parametrize("days", [1, 3, 7])
+def test_series_matches_brute_force(store, days):
+    rows = store.series(days)
+    assert [row['date'] for row in rows] == [(START + dt.timedelta(days=i)).isoformat()
+                                             for i in range(days - 1, 12) if days > 1 or i != 5]
+    for row in rows:
+        end = (dt.date.fromisoformat(row['date']) - START).days
+        parts = [day_users(i) for i in range(end - days + 1, end + 1) if i != 5]
+        calls = np.concatenate([p[1] for p in parts])
+        expected = PartialAggregate().update(calls, np.concatenate([p[2] for p in parts])).to_dashboard()
+        assert row['user_days'] == len(calls)
+        assert row['p99'] == expected.percentile(99)
+        assert row['p99_users'] == expected.stats['p99_user_count']
+        assert row['total_cost'] == pytest.approx(expected.stats['total_cost'])
+
+
+def test_rewritten_day_is_reloaded(store):
+    date = START + dt.timedelta(days=11)
+    before = store.series(1)[-1]
+    # Another process (python -m p99.trend add) rewrites the day.
+    TrendStore(store.path).add_day(date, np.arange(3), np.array([1, 2, 3]), np.ones(3))
+    after = store.series(1)[-1]
+    assert before['user_days'] != after['user_days'] == 3
+    # Back-filling the missing day shows up too.
+    TrendStore(store.path).add_day(START + dt.timedelta(days=5), np.arange(2), np.array([4, 4]), np.ones(2))
+    assert store.day(START + dt.timedelta(days=5)).count == 2